@@ -1,13 +1,14 @@
 
 from __future__ import annotations
-from typing import Dict, List, Tuple, Optional
+from typing import Any, Dict, Iterable, List, Tuple, Optional
+import functools
+import importlib.util
 import os
 import re
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
-from sklearn.model_selection import train_test_split
 from app.backend.ai.utils import get_logger
 
 ID_CANDIDATES = [
@@ -15,8 +16,17 @@ ID_CANDIDATES = [
     "k2_name","pl_name","hostname","toi","toipfx","ctoi_alias"
 ]
 
-def load_dataset(dataset: str, data_dir: str) -> pd.DataFrame:
-    logger = get_logger("data_utils")
+LABEL_CANDIDATES = [
+    "koi_disposition","koi_pdisposition","koi_score",
+    "tfopwg_disp","disposition","toi_disposition","k2_disposition"
+]
+# colunas descartadas pelo basic_clean (links, comentários, proveniência)
+DROP_KEYWORDS = ["url","link","dvr","dvs","comment","prov","provenance","reference"]
+
+def is_dropped_column(name: str) -> bool:
+    return any(k in name.lower() for k in DROP_KEYWORDS)
+
+def dataset_path(dataset: str, data_dir: str) -> str:
     file_map = {
         "kepler": "kepler_candidates.csv",
         "toi": "toi_candidates.csv",
@@ -28,8 +38,80 @@ def load_dataset(dataset: str, data_dir: str) -> pd.DataFrame:
     path = os.path.join(data_dir, fname)
     if not os.path.exists(path):
         raise FileNotFoundError(f"Expected file at {path}")
-    df = pd.read_csv(path)
-    logger.info(f"Loaded {dataset} with shape {df.shape} from {path}")
+    return path
+
+# ============================================================
+# LEITURA DOS CSVs (colunas podadas + dtypes explícitos)
+# ============================================================
+
+@functools.lru_cache(maxsize=None)
+def csv_engine() -> str:
+    # pyarrow lê em várias threads e é bem mais rápido; o parser C é o fallback
+    if importlib.util.find_spec("pyarrow") is not None:
+        return "pyarrow"
+    get_logger("data_utils").warning("pyarrow is not installed (see requirements.txt): reading CSVs with the slower C parser")
+    return "c"
+
+def csv_header(path: str) -> List[str]:
+    return list(pd.read_csv(path, nrows=0).columns)
+
+def read_typed_csv(path: str, usecols: Iterable[str], float32: Iterable[str]=(), float64: Iterable[str]=(),
+                   category: Iterable[str]=(), text: Iterable[str]=(), engine: Optional[str]=None) -> pd.DataFrame:
+    """
+    Read only `usecols` (the ones missing from the file are skipped), with explicit dtypes for
+    the listed columns (`text`: kept as written, e.g. ids; missing values stay NaN); the others
+    are inferred by the parser. If a float column holds text, the floats are read untyped and
+    coerced like `build_features` does (text -> NaN).
+    """
+    header = csv_header(path)
+    wanted = set(usecols)
+    cols = [c for c in header if c in wanted]
+    dtype: Dict[str, str] = {}
+    # texto como "string" (não "str"): com dtype=str o pyarrow grava valores ausentes como o texto 'None'
+    for kind, names in (("float32", float32), ("float64", float64), ("category", category), ("string", text)):
+        dtype.update({c: kind for c in names if c in wanted and c in header})
+    try:
+        return _text_as_object(pd.read_csv(path, usecols=cols, dtype=dtype, engine=engine or csv_engine()))
+    except (ValueError, TypeError) as e:
+        get_logger("data_utils").warning(f"Typed read of {path} failed ({e}); coercing after an untyped read")
+    floats = {c: kind for c, kind in dtype.items() if kind.startswith("float")}
+    df = pd.read_csv(path, usecols=cols, dtype={c: k for c, k in dtype.items() if c not in floats}, low_memory=False)
+    for c, kind in floats.items():
+        df[c] = pd.to_numeric(df[c], errors="coerce").astype(kind)
+    return _text_as_object(df)
+
+def _text_as_object(df: pd.DataFrame) -> pd.DataFrame:
+    # mesmo resultado do parser C com dtype=str: object com NaN nos ausentes
+    for c in df.columns:
+        if isinstance(df[c].dtype, pd.StringDtype):
+            df[c] = df[c].astype(object).where(df[c].notna(), np.nan)
+    return df
+
+def training_schema(path: str, sample_rows: int=2000) -> Dict[str, Any]:
+    """
+    `read_typed_csv` arguments for training: every column `basic_clean` keeps; numeric ones as
+    float32 (ids excepted, they may not fit), label and low-cardinality text as category.
+    Types come from the first `sample_rows` rows; columns that are empty there stay inferred.
+    """
+    sample = pd.read_csv(path, nrows=sample_rows, low_memory=False)
+    usecols = [c for c in sample.columns if not is_dropped_column(c)]
+    float32, category = [], []
+    for c in usecols:
+        col = sample[c]
+        if c in ID_CANDIDATES or col.notna().sum() == 0:
+            continue
+        if pd.api.types.is_numeric_dtype(col):
+            float32.append(c)
+        elif c in LABEL_CANDIDATES or col.nunique() <= max(col.notna().sum() // 2, 1):
+            category.append(c)
+    return {"usecols": usecols, "float32": float32, "category": category}
+
+def load_dataset(dataset: str, data_dir: str) -> pd.DataFrame:
+    logger = get_logger("data_utils")
+    path = dataset_path(dataset, data_dir)
+    df = read_typed_csv(path, **training_schema(path))
+    logger.info(f"Loaded {dataset} with shape {df.shape} from {path} "
+                f"({df.memory_usage(deep=True).sum() / 2**20:.1f}MB, engine={csv_engine()})")
     return df
 
 def infer_label(df: pd.DataFrame, dataset: str, override_label: Optional[str]=None) -> Tuple[pd.Series, str]:
@@ -42,7 +124,8 @@ def infer_label(df: pd.DataFrame, dataset: str, override_label: Optional[str]=No
     if override_label and override_label in df.columns:
         y = df[override_label]
         # attempt to coerce to binary with sensible mapping
-        if y.dtype == object:
+        if not pd.api.types.is_numeric_dtype(y):
+            y = y.astype(object)
             mapping = {
                 "CONFIRMED":1,"CANDIDATE":1,"PC":1,"CP":1,"KP":1,
                 "FALSE POSITIVE":0,"FP":0,"NOT DISPOSITIONED":0,"NOT_DISPOSITIONED":0,"KOI":0,"UNKNOWN":0
@@ -52,18 +135,14 @@ def infer_label(df: pd.DataFrame, dataset: str, override_label: Optional[str]=No
         y = y.fillna(0).astype(int)
         return y, override_label
 
-    col_candidates = [
-        "koi_disposition","koi_pdisposition","koi_score",
-        "tfopwg_disp","disposition","toi_disposition","k2_disposition"
-    ]
-    found = [c for c in col_candidates if c in df.columns]
+    found = [c for c in LABEL_CANDIDATES if c in df.columns]
     if not found:
         raise ValueError("Could not infer label column. Please pass --label with a valid column.")
     col = found[0]
     logger.info(f"Using label column: {col}")
     series = df[col]
 
-    if series.dtype == object:
+    if not pd.api.types.is_numeric_dtype(series):
         series_u = series.astype(str).str.upper().str.strip()
         pos = series_u.isin(["CONFIRMED","CANDIDATE","PC","CP","KP"])
         neg = series_u.isin(["FALSE POSITIVE","FP","NOT DISPOSITIONED","NOT_DISPOSITIONED","UNKNOWN"])
@@ -80,10 +159,7 @@ def infer_label(df: pd.DataFrame, dataset: str, override_label: Optional[str]=No
 
 def basic_clean(df: pd.DataFrame, dataset: str) -> pd.DataFrame:
     # drop obvious non-feature columns
-    drop_cols = []
-    for c in df.columns:
-        if any(k in c.lower() for k in ["url","link","dvr","dvs","comment","prov","provenance","reference"]):
-            drop_cols.append(c)
+    drop_cols = [c for c in df.columns if is_dropped_column(c)]
     df = df.drop(columns=drop_cols, errors="ignore")
 
     # keep an object id if exists
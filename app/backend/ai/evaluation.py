@@ -5,10 +5,8 @@ import os
 import numpy as np
 import pandas as pd
 from sklearn import metrics
-import matplotlib.pyplot as plt
-import shap
 
-from utils import ensure_dir, save_json, get_logger
+from app.backend.ai.utils import ensure_dir, save_json, get_logger
 
 logger = get_logger("evaluation")
 
@@ -33,7 +31,98 @@ def precision_at_k(y_true: np.ndarray, y_prob: np.ndarray, k: float=0.1) -> floa
     idx = np.argsort(-y_prob)[:n]
     return float(y_true[idx].mean())
 
+def _bootstrap_counts(n: int, n_boot: int, rng: np.random.Generator) -> np.ndarray:
+    # quantas vezes cada amostra aparece em cada reamostragem -> matriz (n_boot, n)
+    idx = rng.integers(0, n, size=(n_boot, n))
+    idx += (np.arange(n_boot) * n)[:, None]
+    return np.bincount(idx.ravel(), minlength=n_boot * n).reshape(n_boot, n)
+
+def _weighted_rank_metrics(counts: np.ndarray, y_sorted: np.ndarray, starts: np.ndarray,
+                           n_above_thr: int, m: int) -> Dict[str, np.ndarray]:
+    """
+    ROC-AUC, PR-AUC, F1 and precision@k for each row of `counts`, where `counts` holds the
+    multiplicity of every holdout sample (columns sorted by descending score) and `starts`
+    marks the first column of each group of tied scores.
+    """
+    pos = counts * y_sorted
+    neg = counts - pos
+    gpos = np.add.reduceat(pos, starts, axis=1).astype(float)
+    gneg = np.add.reduceat(neg, starts, axis=1).astype(float)
+    tp = np.cumsum(gpos, axis=1)
+    fp = np.cumsum(gneg, axis=1)
+    n_pos, n_neg = tp[:, -1], fp[:, -1]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # ROC-AUC: pares (positivo, negativo) ordenados corretamente; empates valem 1/2
+        auc_num = (gpos * (n_neg[:, None] - fp)).sum(axis=1) + 0.5 * (gpos * gneg).sum(axis=1)
+        roc_auc = auc_num / (n_pos * n_neg)
+
+        # PR-AUC no mesmo formato de average_precision_score: soma de ΔRecall * Precision
+        prec = np.where(gpos > 0, tp / np.maximum(tp + fp, 1.0), 0.0)
+        pr_auc = (gpos * prec).sum(axis=1) / n_pos
+
+    # F1 no limiar: os primeiros `n_above_thr` grupos têm score >= threshold
+    if n_above_thr > 0:
+        tp_t, fp_t = tp[:, n_above_thr - 1], fp[:, n_above_thr - 1]
+    else:
+        tp_t = fp_t = np.zeros(len(counts))
+    denom = 2 * tp_t + fp_t + (n_pos - tp_t)
+    f1 = np.divide(2 * tp_t, denom, out=np.zeros_like(denom), where=denom > 0)
+
+    # precision@k: os m primeiros elementos da reamostragem, cortando o elemento da fronteira
+    cum = np.cumsum(counts, axis=1)
+    cum_pos = np.cumsum(pos, axis=1)
+    rows = np.arange(len(counts))
+    j = np.minimum((cum < m).sum(axis=1), counts.shape[1] - 1)
+    before = cum[rows, j] - counts[rows, j]
+    pos_before = cum_pos[rows, j] - pos[rows, j]
+    patk = (pos_before + (m - before) * y_sorted[j]) / m
+
+    return {"roc_auc": roc_auc, "pr_auc": pr_auc, "f1": f1, "precision_at_k": patk}
+
+def bootstrap_metrics(
+    y_true: np.ndarray, y_prob: np.ndarray, n_boot: int=2000, threshold: float=0.5, k: float=0.1,
+    alpha: float=0.05, random_state: int=42, chunk_size: int=500
+) -> Dict[str, Dict[str, float]]:
+    """
+    Percentile bootstrap confidence intervals for ROC-AUC, PR-AUC, F1 and precision@k.
+    Scores are sorted once; every resample is a row of sample counts, so all metrics come out
+    of cumulative sums over the sorted order instead of one sklearn call per resample.
+    """
+    y_true = np.asarray(y_true).astype(np.int64)
+    y_prob = np.asarray(y_prob, dtype=float)
+    n = len(y_true)
+    order = np.argsort(-y_prob, kind="mergesort")
+    s = y_prob[order]
+    y_sorted = y_true[order]
+    starts = np.flatnonzero(np.r_[True, s[1:] != s[:-1]])
+    n_above_thr = int(np.searchsorted(-s[starts], -threshold, side="right"))
+    m = int(np.ceil(n * k))
+
+    point = _weighted_rank_metrics(np.ones((1, n), dtype=np.int64), y_sorted, starts, n_above_thr, m)
+
+    rng = np.random.default_rng(random_state)
+    parts: Dict[str, List[np.ndarray]] = {name: [] for name in point}
+    for lo in range(0, n_boot, chunk_size):
+        counts = _bootstrap_counts(n, min(chunk_size, n_boot - lo), rng)
+        for name, vals in _weighted_rank_metrics(counts, y_sorted, starts, n_above_thr, m).items():
+            parts[name].append(vals)
+
+    out: Dict[str, Dict[str, float]] = {}
+    for name, chunks in parts.items():
+        samples = np.concatenate(chunks)
+        # reamostragens com uma única classe não definem AUC -> ignoradas
+        valid = samples[np.isfinite(samples)]
+        ci_low, ci_high = (np.quantile(valid, [alpha / 2, 1 - alpha / 2]) if len(valid) else (np.nan, np.nan))
+        out[name] = {
+            "estimate": float(point[name][0]), "ci_low": float(ci_low), "ci_high": float(ci_high),
+            "std": float(valid.std(ddof=1)) if len(valid) > 1 else float("nan"), "n_valid": float(len(valid)),
+        }
+    logger.info(f"Bootstrap: {n_boot} resamples over {n} holdout samples")
+    return out
+
 def plot_roc(y_true: np.ndarray, y_prob: np.ndarray, path: str) -> None:
+    import matplotlib.pyplot as plt
     fpr, tpr, _ = metrics.roc_curve(y_true, y_prob)
     auc = metrics.roc_auc_score(y_true, y_prob)
     plt.figure()
@@ -47,6 +136,7 @@ def plot_roc(y_true: np.ndarray, y_prob: np.ndarray, path: str) -> None:
     plt.close()
 
 def plot_pr(y_true: np.ndarray, y_prob: np.ndarray, path: str) -> None:
+    import matplotlib.pyplot as plt
     precision, recall, _ = metrics.precision_recall_curve(y_true, y_prob)
     ap = metrics.average_precision_score(y_true, y_prob)
     plt.figure()
@@ -59,6 +149,7 @@ def plot_pr(y_true: np.ndarray, y_prob: np.ndarray, path: str) -> None:
     plt.close()
 
 def plot_calibration(y_true: np.ndarray, y_prob: np.ndarray, path: str) -> None:
+    import matplotlib.pyplot as plt
     from sklearn.calibration import calibration_curve
     prob_true, prob_pred = calibration_curve(y_true, y_prob, n_bins=10, strategy="quantile")
     plt.figure()
@@ -86,6 +177,8 @@ def plot_feature_importance(model, feature_names: List[str], path: str, top_n: i
 
 def plot_shap_summary(model, X: np.ndarray, feature_names: List[str], path: str) -> None:
     import warnings
+    import matplotlib.pyplot as plt
+    import shap
     # Silenciar avisos conhecidos do SHAP com LightGBM binário e do RNG futuro do NumPy
     warnings.filterwarnings("ignore", message="LightGBM binary classifier.*", category=UserWarning, module="shap")
     warnings.filterwarnings("ignore", category=FutureWarning, module="shap")
@@ -0,0 +1,93 @@
+from __future__ import annotations
+from typing import Dict, List, Sequence, Tuple
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from app.backend.ai.utils import get_logger
+
+logger = get_logger("explanations")
+
+EXPLANATION_VERSION = 1
+DEFAULT_TOP_K = 5
+DEFAULT_CHUNK_ROWS = 5_000
+
+def _shap_chunk(model, X: np.ndarray) -> Tuple[np.ndarray, float]:
+    import warnings
+    import shap
+    # Silenciar avisos conhecidos do SHAP com LightGBM binário (como em evaluation.plot_shap_summary)
+    warnings.filterwarnings("ignore", message="LightGBM binary classifier.*", category=UserWarning, module="shap")
+    warnings.filterwarnings("ignore", category=FutureWarning, module="shap")
+
+    # o Booster nativo: BoosterClassifier (bundles low_memory) não é um modelo que o SHAP reconheça
+    explainer = shap.TreeExplainer(getattr(model, "booster_", model))
+    vals = explainer.shap_values(X)
+    base = np.atleast_1d(explainer.expected_value)
+    # binário: lista [classe_0, classe_1] ou (n, features, 2) conforme a versão do SHAP
+    if isinstance(vals, list):
+        vals = vals[1]
+    elif vals.ndim == 3:
+        vals = vals[:, :, 1]
+    return np.asarray(vals, dtype=np.float32), float(base[-1])
+
+def shap_values(model, X: np.ndarray, n_jobs: int=-1, chunk_rows: int=DEFAULT_CHUNK_ROWS) -> Tuple[np.ndarray, float]:
+    """
+    TreeSHAP values (log-odds of the positive class) of every row, computed in parallel
+    chunks of `chunk_rows`; returns (values (n_rows, n_features) float32, base value).
+    """
+    bounds = [(a, min(a + chunk_rows, len(X))) for a in range(0, len(X), chunk_rows)]
+    workers = min(len(bounds), n_jobs if n_jobs > 0 else (os.cpu_count() or 1))
+    if workers <= 1:
+        parts = [_shap_chunk(model, X[a:b]) for a, b in bounds]
+    else:
+        from joblib import Parallel, delayed
+        parts = Parallel(n_jobs=workers)(delayed(_shap_chunk)(model, X[a:b]) for a, b in bounds)
+    if not parts:
+        return np.empty((0, X.shape[1]), dtype=np.float32), 0.0
+    return np.concatenate([v for v, _ in parts]), parts[0][1]
+
+def top_contributions(values: np.ndarray, k: int) -> np.ndarray:
+    """Per row, the column indices of the `k` largest |SHAP| values, largest first."""
+    k = min(k, values.shape[1])
+    mag = np.abs(values)
+    top = np.argpartition(-mag, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(mag, top, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1)
+
+def _number(v) -> float | None:
+    return None if v is None or not np.isfinite(v) else round(float(v), 6)
+
+def explanation_payloads(
+    ids: Sequence[str], X_raw: np.ndarray, values: np.ndarray, base_value: float,
+    feature_names: List[str], model_version: str, top_k: int=DEFAULT_TOP_K,
+) -> Dict[str, str]:
+    """
+    Compact JSON per planet: the `top_k` features that moved its score the most, with the
+    feature value fed to the model (null = missing, imputed) and its SHAP contribution in
+    log-odds; `other` is the sum of the remaining contributions, so
+    base_value + Σ shap + other = the model's log-odds for the planet.
+    """
+    top = top_contributions(values, top_k)
+    totals = values.sum(axis=1, dtype=np.float64)
+    out: Dict[str, str] = {}
+    for i, pid in enumerate(ids):
+        cols = top[i]
+        contribs = [
+            {"feature": feature_names[j], "value": _number(X_raw[i, j]), "shap": _number(values[i, j])}
+            for j in cols
+        ]
+        body = {
+            "version": EXPLANATION_VERSION,
+            "id": pid,
+            "model_version": model_version,
+            "base_value": _number(base_value),
+            "contributions": contribs,
+            "other": _number(totals[i] - values[i, cols].sum(dtype=np.float64)),
+        }
+        out[pid] = json.dumps(body, separators=(",", ":"), ensure_ascii=False)
+    return out
+
+def payload_etag(payload: str) -> str:
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
@@ -0,0 +1,54 @@
+from __future__ import annotations
+from typing import Optional, Tuple
+import glob
+import hashlib
+import os
+
+import pandas as pd
+
+from app.backend.ai import data_utils, feature_engineering
+from app.backend.ai.data_utils import dataset_path, load_dataset, basic_clean, infer_label
+from app.backend.ai.feature_engineering import build_features
+from app.backend.ai.utils import get_logger, ensure_dir
+
+logger = get_logger("feature_cache")
+
+def _code_digest() -> str:
+    # o cache fica inválido quando a limpeza/engenharia de features muda
+    h = hashlib.sha1()
+    for mod in (data_utils, feature_engineering):
+        with open(mod.__file__, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+def cache_path(cache_dir: str, dataset: str, data_dir: str, label: Optional[str]=None) -> str:
+    csv = dataset_path(dataset, data_dir)
+    st = os.stat(csv)
+    key = f"{dataset}|{label}|{os.path.abspath(csv)}|{st.st_size}|{st.st_mtime_ns}|{_code_digest()}"
+    return os.path.join(cache_dir, f"features_{dataset}_{hashlib.sha1(key.encode()).hexdigest()[:16]}.pkl")
+
+def load_or_build(dataset: str, data_dir: str, cache_dir: str, label: Optional[str]=None) -> Tuple[pd.DataFrame, pd.DataFrame, pd.Series, bool]:
+    """
+    (df_raw, Xfe, y, cache_hit) for a dataset. The frames are built once per CSV version and
+    pickled to `cache_dir`; concurrent builders race harmlessly thanks to the atomic rename.
+    """
+    path = cache_path(cache_dir, dataset, data_dir, label)
+    if os.path.exists(path):
+        cached = pd.read_pickle(path)
+        return cached["df_raw"], cached["Xfe"], cached["y"], True
+
+    df_raw = load_dataset(dataset, data_dir)
+    df = basic_clean(df_raw, dataset)
+    y, _ = infer_label(df, dataset, label)
+    Xfe, _ = build_features(df, dataset)
+
+    ensure_dir(cache_dir)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    pd.to_pickle({"df_raw": df_raw, "Xfe": Xfe, "y": y}, tmp)
+    os.replace(tmp, path)
+    # versões antigas do mesmo dataset não servem mais
+    for old in glob.glob(os.path.join(cache_dir, f"features_{dataset}_*.pkl")):
+        if old != path:
+            os.remove(old)
+    logger.info(f"Cached features for {dataset} ({len(df_raw)} rows) at {path}")
+    return df_raw, Xfe, y, False
@@ -1,6 +1,6 @@
 
 from __future__ import annotations
-from typing import Tuple, Dict, List, Optional
+from typing import Tuple, Dict, Iterable, List, Optional, Set
 import numpy as np
 import pandas as pd
 
@@ -8,6 +8,53 @@ from app.backend.ai.utils import get_logger
 
 logger = get_logger("feature_engineering")
 
+# Standard rename for shared columns
+RENAME_MAP = {
+    # Period
+    "koi_period":"period",
+    "pl_orbper":"period",
+    # Depth
+    "koi_depth":"depth_ppm",
+    "pl_trandep":"depth_ppm",   # TOI uses ppm
+    # Duration
+    "koi_duration":"duration_hours",
+    "pl_trandurh":"duration_hours",
+    "pl_trandur":"duration_hours",
+    # Radius ratio
+    "koi_ror":"rprstar",
+    "pl_ratror":"rprstar",
+    # a/R*
+    "koi_dor":"a_over_rstar",
+    "pl_ratdor":"a_over_rstar",
+    # SNR / MES
+    "koi_model_snr":"snr",
+    "koi_max_mult_ev":"mes_multi",
+    "koi_max_sngle_ev":"mes_single",
+    # Stellar params
+    "koi_steff":"st_teff",
+    "st_teff":"st_teff",
+    "koi_slogg":"st_logg",
+    "st_logg":"st_logg",
+    "koi_smet":"st_met",
+    "st_met":"st_met",
+    "koi_srad":"st_rad",
+    "st_rad":"st_rad",
+    "sy_kepmag":"kepmag",
+    "koi_kepmag":"kepmag",
+    "st_tmag":"tmag",
+    "sy_tmag":"tmag",
+}
+
+# Derived feature -> the (renamed) columns it is computed from
+DERIVED_INPUTS = {
+    "depth_frac": ["depth_ppm"],
+    "snr_per_hour": ["snr", "duration_hours"],
+    "period_times_depth": ["period", "depth_frac"],
+    "period_over_dur": ["period", "duration_hours"],
+    "depth_over_dur": ["depth_frac", "duration_hours"],
+    "kepmag_minus_tmag": ["kepmag", "tmag"],
+}
+
 # Helper conversions
 def ppm_to_fraction(ppm: pd.Series) -> pd.Series:
     return pd.to_numeric(ppm, errors="coerce") / 1e6
@@ -21,43 +68,7 @@ def build_features(df: pd.DataFrame, dataset: str) -> Tuple[pd.DataFrame, Dict[s
 
     X = df.copy()
 
-    # Standard rename for shared columns
-    rename_map = {
-        # Period
-        "koi_period":"period",
-        "pl_orbper":"period",
-        # Depth
-        "koi_depth":"depth_ppm",
-        "pl_trandep":"depth_ppm",   # TOI uses ppm
-        # Duration
-        "koi_duration":"duration_hours",
-        "pl_trandurh":"duration_hours",
-        "pl_trandur":"duration_hours",
-        # Radius ratio
-        "koi_ror":"rprstar",
-        "pl_ratror":"rprstar",
-        # a/R*
-        "koi_dor":"a_over_rstar",
-        "pl_ratdor":"a_over_rstar",
-        # SNR / MES
-        "koi_model_snr":"snr",
-        "koi_max_mult_ev":"mes_multi",
-        "koi_max_sngle_ev":"mes_single",
-        # Stellar params
-        "koi_steff":"st_teff",
-        "st_teff":"st_teff",
-        "koi_slogg":"st_logg",
-        "st_logg":"st_logg",
-        "koi_smet":"st_met",
-        "st_met":"st_met",
-        "koi_srad":"st_rad",
-        "st_rad":"st_rad",
-        "sy_kepmag":"kepmag",
-        "koi_kepmag":"kepmag",
-        "st_tmag":"tmag",
-        "sy_tmag":"tmag",
-    }
-    for k,v in rename_map.items():
+    for k,v in RENAME_MAP.items():
         if k in X.columns and v not in X.columns:
             X = X.rename(columns={k:v})
 
@@ -99,6 +110,22 @@ def build_features(df: pd.DataFrame, dataset: str) -> Tuple[pd.DataFrame, Dict[s
 
     return X, feats_info
 
+def raw_columns_for(features: Iterable[str]) -> Set[str]:
+    """Raw CSV columns `build_features` may read to produce `features` (every rename source included)."""
+    sources: Dict[str, List[str]] = {}
+    for k, v in RENAME_MAP.items():
+        sources.setdefault(v, []).append(k)
+    out: Set[str] = set()
+    pending = list(features)
+    while pending:
+        f = pending.pop()
+        if f in out:
+            continue
+        out.add(f)
+        out.update(sources.get(f, []))
+        pending.extend(DERIVED_INPUTS.get(f, []))
+    return out
+
 def select_feature_columns(df: pd.DataFrame) -> List[str]:
     import re
     # Padrões de colunas que geram vazamento ou não agregam como feature
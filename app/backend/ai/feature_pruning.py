@@ -0,0 +1,129 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.backend.ai.utils import get_logger
+
+logger = get_logger("feature_pruning")
+
+DEFAULT_AUC_TOLERANCE = 0.002
+DEFAULT_DROP_FRACTION = 0.25
+DEFAULT_MIN_FEATURES = 5
+DEFAULT_MAX_ROUNDS = 12
+PERMUTATION_REPEATS = 3
+SCORING_REPEATS = 5
+
+def gain_importance(model, feature_names: List[str]) -> pd.Series:
+    """Total split gain per feature, normalized to sum 1 (0 for features the trees never use)."""
+    gain = np.asarray(model.booster_.feature_importance(importance_type="gain"), dtype=np.float64)
+    total = gain.sum()
+    return pd.Series(gain / total if total > 0 else gain, index=feature_names)
+
+def permutation_importance(model, X: pd.DataFrame, y: np.ndarray, columns: List[str],
+                           n_repeats: int=PERMUTATION_REPEATS, random_state: int=42) -> np.ndarray:
+    """Mean AUC lost when each of `columns` of `X` is shuffled (negative = the feature only adds noise)."""
+    from sklearn.metrics import roc_auc_score
+    rng = np.random.default_rng(random_state)
+    base = roc_auc_score(y, model.predict_proba(X)[:, 1])
+    drops = np.zeros(len(columns))
+    # DataFrame (não array): o modelo foi ajustado com nomes de colunas
+    Xp = X.copy()
+    for i, col in enumerate(columns):
+        original = Xp[col].to_numpy(copy=True)
+        for _ in range(n_repeats):
+            Xp[col] = rng.permutation(original)
+            drops[i] += base - roc_auc_score(y, model.predict_proba(Xp)[:, 1])
+        Xp[col] = original
+    return drops / n_repeats
+
+def rank_features(model, X: pd.DataFrame, y: np.ndarray, feature_names: List[str], random_state: int=42) -> pd.DataFrame:
+    """
+    Least valuable first: features without gain (never split on) lead, the rest ordered by
+    permutation AUC drop with the gain share breaking ties.
+    """
+    gain = gain_importance(model, feature_names)
+    used = [f for f in feature_names if gain[f] > 0]
+    perm = pd.Series(0.0, index=feature_names)
+    if used:
+        # colunas sem ganho não mudam a predição: a permutação só roda nas usadas
+        perm[used] = permutation_importance(model, X, y, used, random_state=random_state)
+    table = pd.DataFrame({"gain": gain, "permutation_auc_drop": perm, "unused": gain <= 0})
+    return table.sort_values(["unused", "permutation_auc_drop", "gain"], ascending=[False, True, True])
+
+def prune_features(fit, X_train: pd.DataFrame, y_train: np.ndarray, X_val: pd.DataFrame, y_val: np.ndarray,
+                   tolerance: float=DEFAULT_AUC_TOLERANCE, drop_fraction: float=DEFAULT_DROP_FRACTION,
+                   min_features: int=DEFAULT_MIN_FEATURES, max_rounds: int=DEFAULT_MAX_ROUNDS,
+                   random_state: int=42) -> Tuple[List[str], pd.DataFrame]:
+    """
+    Backward elimination driven by importances. Each round refits `fit(X, y)` without the
+    lowest-ranked `drop_fraction` of the current features and keeps the cut only if the
+    validation AUC stays within `tolerance` of the model with every feature; a rejected cut is
+    retried with half as many features, and the search stops when not even one can go.
+
+    Returns the kept features (in their original order) and one row per attempted cut.
+    """
+    from sklearn.metrics import roc_auc_score
+    features = list(X_train.columns)
+    model = fit(X_train[features], y_train)
+    base_auc = roc_auc_score(y_val, model.predict_proba(X_val[features])[:, 1])
+    history = [{"round": 0, "n_features": len(features), "val_auc": base_auc, "accepted": True, "dropped": ""}]
+    logger.info(f"Pruning from {len(features)} features; validation AUC {base_auc:.4f}, tolerance {tolerance}")
+
+    ranking = rank_features(model, X_val[features], y_val, features, random_state)
+    n_drop = max(int(len(features) * drop_fraction), 1)
+    for rnd in range(1, max_rounds + 1):
+        n_drop = min(n_drop, len(features) - min_features)
+        if n_drop < 1:
+            break
+        dropped = ranking.index[:n_drop].tolist()
+        candidate = [f for f in features if f not in set(dropped)]
+        cand_model = fit(X_train[candidate], y_train)
+        auc = roc_auc_score(y_val, cand_model.predict_proba(X_val[candidate])[:, 1])
+        accepted = base_auc - auc <= tolerance
+        history.append({"round": rnd, "n_features": len(candidate), "val_auc": auc, "accepted": accepted,
+                        "dropped": " ".join(dropped)})
+        logger.info(f"Round {rnd}: {len(candidate)} features, AUC {auc:.4f} ({'kept' if accepted else 'rejected'})")
+        if accepted:
+            features, model = candidate, cand_model
+            ranking = rank_features(model, X_val[features], y_val, features, random_state)
+            n_drop = max(int(len(features) * drop_fraction), 1)
+        else:
+            n_drop //= 2
+
+    kept = [f for f in X_train.columns if f in set(features)]
+    return kept, pd.DataFrame(history)
+
+def scoring_cost(model, X: pd.DataFrame, repeats: int=SCORING_REPEATS) -> Dict[str, Any]:
+    """Inference cost of one batch: median latency, input matrix size and serialized model size."""
+    model.predict_proba(X.iloc[:1])  # aquecimento
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        model.predict_proba(X)
+        times.append(time.perf_counter() - t0)
+    latency = float(np.median(times))
+    return {
+        "n_features": int(X.shape[1]),
+        "batch_rows": int(X.shape[0]),
+        "latency_ms": latency * 1000,
+        "latency_us_per_row": latency * 1e6 / max(X.shape[0], 1),
+        "input_bytes_per_row": int(X.shape[1] * X.to_numpy().dtype.itemsize),
+        "model_bytes": len(pickle.dumps(model)),
+    }
+
+def pruning_report(full: Dict[str, Any], pruned: Dict[str, Any], extra: Optional[Dict[str, Any]]=None) -> pd.DataFrame:
+    """One row per model plus the relative savings of the pruned one."""
+    rows = [dict(model="full", **full), dict(model="pruned", **pruned)]
+    savings = {"model": "savings_pct"}
+    for k in ["n_features", "latency_ms", "latency_us_per_row", "input_bytes_per_row", "model_bytes", "raw_csv_columns"]:
+        if k in full and full[k]:
+            savings[k] = 100 * (1 - pruned[k] / full[k])
+    rows.append(savings)
+    df = pd.DataFrame(rows)
+    for k, v in (extra or {}).items():
+        df[k] = v
+    return df
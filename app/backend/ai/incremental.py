@@ -0,0 +1,97 @@
+from __future__ import annotations
+from typing import Any, Dict, Optional, Tuple
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from app.backend.ai.utils import get_logger
+
+logger = get_logger("incremental")
+
+N_BINS = 10
+DRIFT_THRESHOLD = 0.2   # PSI > 0.2 = mudança relevante (regra usual em risco de crédito)
+MIN_DRIFT_ROWS = 50     # abaixo disso o PSI é ruído demais para decidir um re-tuning
+
+def state_path(bundle_path: str) -> str:
+    """Training state saved next to the bundle (`model_kepler.joblib` -> `model_kepler.state.joblib`)."""
+    root, ext = os.path.splitext(bundle_path)
+    return f"{root}.state{ext}"
+
+def row_hashes(df_raw: pd.DataFrame) -> np.ndarray:
+    """Content hash per raw row: new candidates and rows whose values changed both count as new."""
+    return pd.util.hash_pandas_object(df_raw, index=False).to_numpy()
+
+def reference_bins(X: pd.DataFrame, n_bins: int=N_BINS) -> Dict[str, Dict[str, Any]]:
+    """Per-feature quantile edges and bin proportions of the data the current params were tuned on."""
+    ref: Dict[str, Dict[str, Any]] = {}
+    for c in X.columns:
+        v = pd.to_numeric(X[c], errors="coerce").dropna().to_numpy(dtype=float)
+        if len(v) == 0:
+            continue
+        edges = np.unique(np.quantile(v, np.linspace(0, 1, n_bins + 1)[1:-1]))
+        counts = np.bincount(np.searchsorted(edges, v, side="right"), minlength=len(edges) + 1)
+        ref[c] = {"edges": edges, "props": counts / counts.sum(), "n": len(v)}
+    return ref
+
+def population_stability(ref: Dict[str, Any], values: np.ndarray) -> Optional[float]:
+    """
+    PSI of `values` against a reference histogram, minus its expected value under no drift
+    (≈ (bins-1)·(1/n + 1/n_ref)), so small deltas do not look drifted just from sampling noise.
+    """
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return None
+    counts = np.bincount(np.searchsorted(ref["edges"], values, side="right"), minlength=len(ref["props"]))
+    eps = 1e-4
+    p = np.clip(ref["props"], eps, None)
+    q = np.clip(counts / counts.sum(), eps, None)
+    psi = float(np.sum((q - p) * np.log(q / p)))
+    bias = (len(p) - 1) * (1 / len(values) + 1 / ref["n"])
+    return max(psi - bias, 0.0)
+
+def drift_report(reference: Dict[str, Dict[str, Any]], X_new: pd.DataFrame,
+                 threshold: float=DRIFT_THRESHOLD, min_rows: int=MIN_DRIFT_ROWS) -> Dict[str, Any]:
+    psi = {}
+    for c, ref in reference.items():
+        if c in X_new.columns:
+            val = population_stability(ref, pd.to_numeric(X_new[c], errors="coerce").to_numpy(dtype=float))
+            if val is not None:
+                psi[c] = val
+    drifted_cols = sorted([c for c, v in psi.items() if v > threshold], key=lambda c: -psi[c])
+    enough = len(X_new) >= min_rows
+    return {
+        "n_rows": int(len(X_new)), "psi": psi, "drifted_features": drifted_cols,
+        "drifted": bool(enough and drifted_cols), "checked": enough,
+    }
+
+def load_training_state(bundle_path: str) -> Optional[Dict[str, Any]]:
+    path = state_path(bundle_path)
+    if not (os.path.exists(path) and os.path.exists(bundle_path)):
+        return None
+    return joblib.load(path)
+
+def save_training_state(bundle_path: str, state: Dict[str, Any]) -> None:
+    joblib.dump(state, state_path(bundle_path))
+
+def new_training_state(hashes: np.ndarray, idx_tr: np.ndarray, idx_te: np.ndarray,
+                       X_train: pd.DataFrame, best_params: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "train_hashes": np.unique(hashes[idx_tr]),
+        "holdout_hashes": np.unique(hashes[idx_te]),
+        "reference": reference_bins(X_train),
+        "best_params": dict(best_params),
+        "n_train": int(len(idx_tr)),
+    }
+
+def incremental_rounds(best_params: Dict[str, Any], n_new: int, n_train: int, min_rounds: int=10) -> int:
+    """Boosting rounds for the delta, proportional to its share of the training set."""
+    n_estimators = int(best_params.get("n_estimators", 100))
+    return max(min_rounds, int(np.ceil(n_estimators * n_new / max(n_train, 1))))
+
+def split_delta(hashes: np.ndarray, state: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(new rows, rows already used for training, rows of the previous holdout) as positional indices."""
+    seen_train = np.isin(hashes, state["train_hashes"])
+    seen_holdout = np.isin(hashes, state["holdout_hashes"])
+    return np.flatnonzero(~(seen_train | seen_holdout)), np.flatnonzero(seen_train), np.flatnonzero(seen_holdout)
@@ -0,0 +1,183 @@
+from __future__ import annotations
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from app.backend.ai.utils import get_logger, ensure_dir, save_json, load_json, load_model
+
+logger = get_logger("model_registry")
+
+BUNDLE_FILE = "bundle.joblib"
+METADATA_FILE = "metadata.json"
+ACTIVE_FILE = "ACTIVE"
+LEGACY_VERSION = "legacy"
+
+class ModelRegistry:
+    """
+    Versioned model bundles on disk:
+
+        <root>/<name>/<version>/bundle.joblib   {"model", "imputer", "features"}
+        <root>/<name>/<version>/metadata.json
+        <root>/<name>/ACTIVE                    active version (replaced atomically)
+
+    `name` is the mission (koi, toi, k2). Promotion only rewrites the ACTIVE pointer, so a
+    reader sees either the old or the new version, never a partial state.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _dir(self, name: str, version: Optional[str]=None) -> str:
+        return os.path.join(self.root, name, version) if version else os.path.join(self.root, name)
+
+    def pointer_path(self, name: str) -> str:
+        return os.path.join(self._dir(name), ACTIVE_FILE)
+
+    def register(self, name: str, bundle_path: str, metadata: Optional[Dict[str, Any]]=None) -> str:
+        with open(bundle_path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:8]
+        version = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{digest}"
+        final_dir = self._dir(name, version)
+        if os.path.exists(final_dir):
+            return version
+
+        # copia para um diretório temporário e renomeia: versão aparece completa ou não aparece
+        ensure_dir(self._dir(name))
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=self._dir(name))
+        shutil.copy2(bundle_path, os.path.join(tmp_dir, BUNDLE_FILE))
+        meta = dict(metadata or {})
+        meta.update({"name": name, "version": version, "sha256_prefix": digest,
+                     "registered_at": datetime.now(timezone.utc).isoformat()})
+        save_json(meta, os.path.join(tmp_dir, METADATA_FILE))
+        os.replace(tmp_dir, final_dir)
+        logger.info(f"Registered {name} model version {version}")
+        return version
+
+    def promote(self, name: str, version: str) -> None:
+        if not os.path.exists(os.path.join(self._dir(name, version), BUNDLE_FILE)):
+            raise FileNotFoundError(f"Unknown {name} model version {version}")
+        pointer = self.pointer_path(name)
+        tmp = f"{pointer}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, pointer)
+        logger.info(f"Promoted {name} model version {version}")
+
+    def active_version(self, name: str) -> Optional[str]:
+        try:
+            with open(self.pointer_path(name), "r", encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def list_versions(self, name: str) -> List[Dict[str, Any]]:
+        base = self._dir(name)
+        if not os.path.isdir(base):
+            return []
+        active = self.active_version(name)
+        out = []
+        for v in sorted(os.listdir(base)):
+            meta_path = os.path.join(base, v, METADATA_FILE)
+            if v.startswith(".") or not os.path.exists(meta_path):
+                continue
+            meta = load_json(meta_path)
+            meta["active"] = v == active
+            out.append(meta)
+        return out
+
+    def load(self, name: str, version: Optional[str]=None) -> Tuple[Dict[str, Any], str]:
+        version = version or self.active_version(name)
+        if version is None:
+            raise FileNotFoundError(f"No active {name} model in {self.root}")
+        return load_model(os.path.join(self._dir(name, version), BUNDLE_FILE)), version
+
+def load_active_bundle(registry: ModelRegistry, name: str, legacy_path: Optional[str]=None) -> Tuple[Dict[str, Any], str]:
+    """Active registry bundle, falling back to the unversioned file from settings.data."""
+    if registry.active_version(name) is not None:
+        return registry.load(name)
+    if legacy_path and os.path.exists(legacy_path):
+        logger.info(f"No active {name} model in registry; using {legacy_path}")
+        return load_model(legacy_path), LEGACY_VERSION
+    raise FileNotFoundError(f"No model available for {name}")
+
+class ModelProvider:
+    """
+    Hot-reloading access to active models inside a long-running process (the API calls
+    `refresh()` every `poll_interval` seconds from a background task).
+
+    `get()` never blocks on a reload: at most every `poll_interval` seconds it stats the ACTIVE
+    pointer, and when it changed a background thread loads the new bundle while requests keep
+    being served by the current one; the reference is swapped once loading finished.
+    """
+
+    def __init__(self, registry: ModelRegistry, legacy_paths: Optional[Dict[str, str]]=None, poll_interval: float=5.0):
+        self.registry = registry
+        self.legacy_paths = legacy_paths or {}
+        self.poll_interval = poll_interval
+        self._models: Dict[str, Tuple[Dict[str, Any], str]] = {}
+        self._last_check: Dict[str, float] = {}
+        self._loading: set = set()
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Tuple[Dict[str, Any], str]:
+        current = self._models.get(name)
+        if current is None:
+            # primeira carga é síncrona
+            with self._lock:
+                current = self._models.get(name)
+                if current is None:
+                    current = load_active_bundle(self.registry, name, self.legacy_paths.get(name))
+                    self._models[name] = current
+                    self._last_check[name] = time.monotonic()
+            return current
+
+        now = time.monotonic()
+        if now - self._last_check.get(name, 0.0) >= self.poll_interval:
+            self._last_check[name] = now
+            active = self.registry.active_version(name)
+            if active is not None and active != current[1]:
+                self._reload_async(name)
+        return current
+
+    def _reload_async(self, name: str) -> None:
+        with self._lock:
+            if name in self._loading:
+                return
+            self._loading.add(name)
+
+        def run():
+            try:
+                loaded = self.registry.load(name)
+                self._models[name] = loaded
+                logger.info(f"Hot-reloaded {name} model version {loaded[1]}")
+            except Exception as e:
+                logger.warning(f"Reload of {name} model failed: {e}")
+            finally:
+                with self._lock:
+                    self._loading.discard(name)
+
+        threading.Thread(target=run, name=f"model-reload-{name}", daemon=True).start()
+
+    def refresh(self, names: Optional[List[str]]=None) -> None:
+        """`get()` every model (default: the `legacy_paths` names); models with no bundle yet are skipped."""
+        for name in names or list(self.legacy_paths):
+            try:
+                self.get(name)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Loading {name} model failed: {e}")
+
+    def status(self) -> Dict[str, Dict[str, Optional[str]]]:
+        names = set(self._models) | set(self.legacy_paths)
+        return {
+            n: {"loaded": self._models[n][1] if n in self._models else None, "active": self.registry.active_version(n)}
+            for n in sorted(names)
+        }
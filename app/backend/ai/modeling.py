@@ -1,15 +1,13 @@
 from __future__ import annotations
 from typing import Dict, Any, Tuple, List, Optional
+import time
 import numpy as np
-import optuna
-from sklearn.model_selection import StratifiedKFold, GroupKFold
-from sklearn.metrics import roc_auc_score, average_precision_score
-from lightgbm import LGBMClassifier
-from utils import get_logger
+from app.backend.ai.utils import get_logger
+from app.backend.ai.out_of_core import BoosterClassifier
 
 logger = get_logger("modeling")
 
-def build_param_space(trial: optuna.trial.Trial, use_gpu: bool=False) -> Dict[str, Any]:
+def build_param_space(trial: optuna.trial.Trial, use_gpu: bool=False, n_threads: int=-1) -> Dict[str, Any]:
     params = {
         "objective":"binary",
         "boosting_type":"gbdt",
@@ -25,7 +23,7 @@ def build_param_space(trial: optuna.trial.Trial, use_gpu: bool=False) -> Dict[st
         "n_estimators": trial.suggest_int("n_estimators", 200, 3000),
         "random_state": 42,
         "class_weight": "balanced",
-        "n_jobs": -1,
+        "n_jobs": n_threads,
     }
     if use_gpu:
         params["device_type"] = "gpu"
@@ -34,19 +32,30 @@ def build_param_space(trial: optuna.trial.Trial, use_gpu: bool=False) -> Dict[st
 def optuna_cv(
     X: np.ndarray, y: np.ndarray, feature_names: List[str],
     n_splits: int = 5, groups: Optional[np.ndarray]=None, n_trials: int = 100, use_gpu: bool=False,
-    study_name: Optional[str]=None, study_path: Optional[str]=None
+    study_name: Optional[str]=None, study_path: Optional[str]=None,
+    study: Optional[optuna.Study]=None, enqueue_params: Optional[Dict[str, Any]]=None, n_threads: int=-1
 ) -> Tuple[Dict[str, Any], optuna.Study]:
+    """
+    TPE search with CV AUC as objective. Passing a previous `study` resumes it (its trials warm
+    up the sampler) and `enqueue_params` are evaluated first; the best params are then picked
+    among the trials of this call only, since older values were measured on other data.
+    """
+    import optuna
+    from lightgbm import LGBMClassifier
+    from sklearn.model_selection import StratifiedKFold, GroupKFold
+    from sklearn.metrics import roc_auc_score, average_precision_score
 
     def objective(trial: optuna.trial.Trial):
-        params = build_param_space(trial, use_gpu=use_gpu)
+        params = build_param_space(trial, use_gpu=use_gpu, n_threads=n_threads)
         if groups is not None:
             cv = GroupKFold(n_splits=n_splits)
             splits = cv.split(X, y, groups)
         else:
             cv = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42)
             splits = cv.split(X, y)
-        aucs, prs = [], []
+        aucs, prs, fold_seconds = [], [], []
         for train_idx, val_idx in splits:
+            t0 = time.perf_counter()
             Xtr, Xva = X[train_idx], X[val_idx]
             ytr, yva = y[train_idx], y[val_idx]
             model = LGBMClassifier(**params)
@@ -54,13 +63,21 @@ def optuna_cv(
             p = model.predict_proba(Xva)[:,1]
             aucs.append(roc_auc_score(yva, p))
             prs.append(average_precision_score(yva, p))
+            fold_seconds.append(time.perf_counter() - t0)
         trial.set_user_attr("mean_pr_auc", float(np.mean(prs)))
+        trial.set_user_attr("fold_seconds", fold_seconds)
         return float(np.mean(aucs))
 
-    study = optuna.create_study(direction="maximize", study_name=study_name, sampler=optuna.samplers.TPESampler(seed=42))
+    if study is None:
+        study = optuna.create_study(direction="maximize", study_name=study_name, sampler=optuna.samplers.TPESampler(seed=42))
+    if enqueue_params:
+        search_keys = set(study.best_trial.params) if study.trials else set(enqueue_params)
+        study.enqueue_trial({k: v for k, v in enqueue_params.items() if k in search_keys})
+    first_new = len(study.trials)
     study.optimize(objective, n_trials=n_trials, n_jobs=1, show_progress_bar=False)
 
-    best_params = study.best_trial.params
+    new_trials = [t for t in study.trials[first_new:] if t.state == optuna.trial.TrialState.COMPLETE]
+    best_params = dict(max(new_trials, key=lambda t: t.value).params)
 
     # Parâmetros FIXOS que não são parte da busca
     fixed = {
@@ -68,7 +85,7 @@ def optuna_cv(
         "boosting_type": "gbdt",
         "random_state": 42,
         "class_weight": "balanced",
-        "n_jobs": -1,
+        "n_jobs": n_threads,
     }
     if use_gpu:
         fixed["device_type"] = "gpu"
@@ -84,6 +101,103 @@ def optuna_cv(
     return best_params, study
 
 def fit_final_model(X, y, params: Dict[str, Any]) -> LGBMClassifier:
+    from lightgbm import LGBMClassifier
     model = LGBMClassifier(**params)
     model.fit(X, y)
-    return model
\ No newline at end of file
+    return model
+
+def continue_training(init_model, X, y, params: Dict[str, Any], n_rounds: int) -> LGBMClassifier:
+    """Add `n_rounds` trees fitted on (X, y) on top of an existing model (LightGBM `init_model`)."""
+    from lightgbm import LGBMClassifier
+    booster = getattr(init_model, "booster_", init_model)
+    model = LGBMClassifier(**dict(params, n_estimators=n_rounds))
+    model.fit(X, y, init_model=booster)
+    return model
+
+# ============================================================
+# TREINO A PARTIR DE lgb.Dataset (modo --low_memory)
+# ============================================================
+
+def balanced_weights(y: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Per-row weights equivalent to class_weight="balanced" (n / (n_classes * n_c)), counted on `rows`."""
+    y = y.astype(np.int64)
+    counts = np.bincount(y[rows], minlength=2).astype(np.float64)
+    w = len(rows) / (2 * np.maximum(counts, 1))
+    return w[y].astype(np.float32)
+
+def build_lgb_dataset(X: np.ndarray, y: np.ndarray, weight: np.ndarray, feature_names: List[str]) -> lgb.Dataset:
+    """
+    Bin `X` (a float32 memmap is fine: it is read in place, not copied) into a LightGBM Dataset.
+    The binned matrix takes ~1 byte per value; folds and holdout are `subset`s of it.
+    """
+    import lightgbm as lgb
+    ds = lgb.Dataset(
+        X, label=y, weight=weight, feature_name=feature_names, free_raw_data=True,
+        # feature_pre_filter=False: min_child_samples muda entre trials sem reconstruir o Dataset
+        params={"feature_pre_filter": False, "verbosity": -1},
+    )
+    return ds.construct()
+
+def lgb_train_params(params: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+    """LGBMClassifier params -> (lgb.train params, num_boost_round); the sklearn names are native aliases."""
+    p = dict(params)
+    num_boost_round = int(p.pop("n_estimators", 100))
+    p.pop("class_weight", None)  # pesos já vão no Dataset
+    p.setdefault("verbosity", -1)
+    return p, num_boost_round
+
+def optuna_cv_dataset(
+    dataset: lgb.Dataset, rows: np.ndarray, y: np.ndarray,
+    n_splits: int = 5, groups: Optional[np.ndarray]=None, n_trials: int = 100, use_gpu: bool=False,
+    study_name: Optional[str]=None, study_path: Optional[str]=None, n_threads: int=-1
+) -> Tuple[Dict[str, Any], optuna.Study]:
+    """Same search as `optuna_cv`, with folds as subsets of a binned Dataset restricted to `rows`."""
+    import lightgbm as lgb
+    import optuna
+    from sklearn.model_selection import StratifiedKFold, GroupKFold
+    y_rows = y[rows]
+    g_rows = groups[rows] if groups is not None else None
+    if g_rows is not None:
+        folds = list(GroupKFold(n_splits=n_splits).split(rows, y_rows, g_rows))
+    else:
+        folds = list(StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42).split(rows, y_rows))
+    fold_sets = [(dataset.subset(rows[tr]), dataset.subset(rows[va])) for tr, va in folds]
+
+    def objective(trial: optuna.trial.Trial):
+        params, num_boost_round = lgb_train_params(build_param_space(trial, use_gpu=use_gpu, n_threads=n_threads))
+        params["metric"] = ["auc", "average_precision"]
+        aucs, prs, fold_seconds = [], [], []
+        for tr_set, va_set in fold_sets:
+            t0 = time.perf_counter()
+            evals: Dict[str, Any] = {}
+            lgb.train(params, tr_set, num_boost_round=num_boost_round, valid_sets=[va_set],
+                      valid_names=["valid"], callbacks=[lgb.record_evaluation(evals)])
+            aucs.append(evals["valid"]["auc"][-1])
+            prs.append(evals["valid"]["average_precision"][-1])
+            fold_seconds.append(time.perf_counter() - t0)
+        trial.set_user_attr("mean_pr_auc", float(np.mean(prs)))
+        trial.set_user_attr("fold_seconds", fold_seconds)
+        return float(np.mean(aucs))
+
+    study = optuna.create_study(direction="maximize", study_name=study_name, sampler=optuna.samplers.TPESampler(seed=42))
+    study.optimize(objective, n_trials=n_trials, n_jobs=1, show_progress_bar=False)
+
+    best_params = study.best_trial.params
+    fixed = {"objective": "binary", "boosting_type": "gbdt", "random_state": 42, "class_weight": "balanced", "n_jobs": n_threads}
+    if use_gpu:
+        fixed["device_type"] = "gpu"
+    for k, v in fixed.items():
+        best_params.setdefault(k, v)
+
+    if study_path:
+        import joblib, os
+        os.makedirs(os.path.dirname(study_path), exist_ok=True)
+        joblib.dump(study, study_path)
+
+    return best_params, study
+
+def fit_final_booster(dataset: lgb.Dataset, rows: np.ndarray, feature_names: List[str], params: Dict[str, Any]) -> BoosterClassifier:
+    import lightgbm as lgb
+    train_params, num_boost_round = lgb_train_params(params)
+    booster = lgb.train(train_params, dataset.subset(rows), num_boost_round=num_boost_round)
+    return BoosterClassifier(booster, feature_names)
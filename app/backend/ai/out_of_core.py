@@ -0,0 +1,147 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+import os
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from app.backend.ai.data_utils import basic_clean, infer_label, training_schema
+from app.backend.ai.feature_engineering import build_features, select_feature_columns
+from app.backend.ai.imputation import MedianImputer, StreamingMedianImputer
+from app.backend.ai.utils import get_logger, ensure_dir
+
+logger = get_logger("out_of_core")
+
+DEFAULT_CHUNK_ROWS = 50_000
+# mesma ordem de preferência do train_model para evitar vazamento entre estrelas
+GROUP_COLUMNS = ["kepid", "k2_name", "tid", "tic_id", "epic_hostname", "hostname"]
+
+@dataclass
+class StreamedDataset:
+    """Row-major float32 feature matrix on disk plus the (small) per-row label and group arrays."""
+    path: str
+    feature_cols: List[str]
+    y: np.ndarray
+    groups: Optional[np.ndarray]
+    non_null: np.ndarray
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.y)
+
+    def open(self, mode: str="r") -> np.memmap:
+        return np.memmap(self.path, dtype=np.float32, mode=mode, shape=(self.n_rows, len(self.feature_cols)))
+
+def row_chunks(n_rows: int, chunk_rows: int) -> Iterator[Tuple[int, int]]:
+    for start in range(0, n_rows, chunk_rows):
+        yield start, min(start + chunk_rows, n_rows)
+
+def stream_csv_to_memmap(
+    csv_path: str, dataset: str, out_path: str, label: Optional[str]=None, chunk_rows: int=DEFAULT_CHUNK_ROWS
+) -> StreamedDataset:
+    """
+    Read the CSV in chunks, apply `basic_clean` / `infer_label` / `build_features` per chunk and
+    append the numeric features as float32 rows to `out_path`. Only one chunk is held in memory;
+    the feature set is fixed by the first chunk (later chunks are reindexed and coerced to it).
+    """
+    ensure_dir(os.path.dirname(out_path) or ".")
+    feature_cols: Optional[List[str]] = None
+    group_col: Optional[str] = None
+    ys, groups = [], []
+    non_null = None
+
+    # colunas podadas como no load_dataset; os floats viram float32 bloco a bloco logo abaixo
+    schema = training_schema(csv_path)
+    dtype = {c: "category" for c in schema["category"]}
+    with open(out_path, "wb") as f:
+        for chunk in pd.read_csv(csv_path, chunksize=chunk_rows, usecols=schema["usecols"], dtype=dtype, low_memory=False):
+            df = basic_clean(chunk, dataset)
+            y, _ = infer_label(df, dataset, label)
+            Xfe, _ = build_features(df, dataset)
+            if feature_cols is None:
+                feature_cols = select_feature_columns(Xfe)
+                group_col = next((c for c in GROUP_COLUMNS if c in chunk.columns), None)
+                non_null = np.zeros(len(feature_cols), dtype=np.int64)
+
+            block = Xfe.reindex(columns=feature_cols).apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float32)
+            f.write(np.ascontiguousarray(block).tobytes())
+            non_null += (~np.isnan(block)).sum(axis=0)
+            ys.append(y.to_numpy(dtype=np.int8))
+            if group_col is not None:
+                groups.append(chunk[group_col].to_numpy())
+
+    if feature_cols is None:
+        raise ValueError(f"No rows in {csv_path}")
+    y_all = np.concatenate(ys)
+    g_all = None
+    if groups:
+        g_all = pd.factorize(np.concatenate(groups))[0]
+        # sem identificador (-1): cada linha é o seu próprio grupo
+        missing = g_all < 0
+        g_all[missing] = g_all.max() + 1 + np.arange(missing.sum())
+    logger.info(f"Streamed {len(y_all)} rows x {len(feature_cols)} features to {out_path}")
+    return StreamedDataset(out_path, feature_cols, y_all, g_all, non_null)
+
+def compact_columns(src: StreamedDataset, keep: List[int], out_path: str, chunk_rows: int=DEFAULT_CHUNK_ROWS) -> StreamedDataset:
+    """Copy only the `keep` columns into a new file, chunk by chunk; the source file is removed."""
+    if len(keep) == len(src.feature_cols):
+        return src
+    mm = src.open()
+    with open(out_path, "wb") as f:
+        for a, b in row_chunks(src.n_rows, chunk_rows):
+            f.write(np.ascontiguousarray(mm[a:b][:, keep]).tobytes())
+    del mm
+    os.remove(src.path)
+    return StreamedDataset(out_path, [src.feature_cols[j] for j in keep], src.y, src.groups, src.non_null[keep])
+
+def _sketch_rows(data: StreamedDataset, rows: np.ndarray, chunk_rows: int) -> StreamingMedianImputer:
+    mm = data.open()
+    imputer = StreamingMedianImputer(data.feature_cols)
+    for a, b in row_chunks(len(rows), chunk_rows):
+        imputer.partial_fit(np.asarray(mm[rows[a:b]]))
+    return imputer
+
+def fit_median_imputer(data: StreamedDataset, rows: np.ndarray, n_jobs: int=1, chunk_rows: int=DEFAULT_CHUNK_ROWS) -> StreamingMedianImputer:
+    """
+    Medians over the training `rows` in one pass: each worker sketches a contiguous share of the
+    rows (the memmap is shared, not copied) and the per-worker sketches are merged.
+    """
+    parts = [p for p in np.array_split(np.sort(rows), max(n_jobs, 1)) if len(p)]
+    if len(parts) == 1:
+        return _sketch_rows(data, parts[0], chunk_rows)
+    imputers = Parallel(n_jobs=len(parts))(delayed(_sketch_rows)(data, p, chunk_rows) for p in parts)
+    return StreamingMedianImputer.merge_all(imputers)
+
+def impute_inplace(data: StreamedDataset, imputer: MedianImputer, chunk_rows: int=DEFAULT_CHUNK_ROWS) -> None:
+    mm = data.open(mode="r+")
+    for a, b in row_chunks(data.n_rows, chunk_rows):
+        imputer.transform_inplace(mm[a:b])
+    mm.flush()
+
+def predict_rows(model, data: StreamedDataset, rows: np.ndarray, chunk_rows: int=DEFAULT_CHUNK_ROWS) -> np.ndarray:
+    mm = data.open()
+    out = np.empty(len(rows), dtype=np.float64)
+    for a, b in row_chunks(len(rows), chunk_rows):
+        out[a:b] = model.predict_proba(np.asarray(mm[rows[a:b]]))[:, 1]
+    return out
+
+class BoosterClassifier:
+    """
+    `predict_proba` / `feature_importances_` facade over a native `lgb.Booster`, so bundles
+    trained from a LightGBM Dataset are used exactly like the `LGBMClassifier` ones.
+    """
+
+    def __init__(self, booster, feature_names: List[str]):
+        self.booster_ = booster
+        self.feature_name_ = list(feature_names)
+        self.classes_ = np.array([0, 1])
+
+    @property
+    def feature_importances_(self) -> np.ndarray:
+        return self.booster_.feature_importance(importance_type="split")
+
+    def predict_proba(self, X) -> np.ndarray:
+        p = self.booster_.predict(np.asarray(X, dtype=np.float64))
+        return np.column_stack([1 - p, p])
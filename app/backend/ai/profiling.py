@@ -0,0 +1,177 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import pandas as pd
+
+from app.backend.ai.utils import get_logger, ensure_dir, save_json
+
+try:
+    import resource  # Unix
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+logger = get_logger("profiling")
+
+RSS_SAMPLE_INTERVAL_S = 0.05
+
+def peak_rss_mb() -> Optional[float]:
+    """Process-wide peak resident set size (high-water mark) in MB."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reporta KB, macOS reporta bytes
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    try:
+        import psutil  # type: ignore
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    except Exception:
+        return None
+
+def current_rss_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except Exception:
+        pass
+    try:
+        import psutil  # type: ignore
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except Exception:
+        return None
+
+class RssSampler:
+    """
+    Highest RSS seen while the block runs, polled by a background thread. Unlike `peak_rss_mb`
+    (the process high-water mark) it drops back after a memory-hungry block, so each stage
+    reports its own peak.
+    """
+
+    def __init__(self, interval: float=RSS_SAMPLE_INTERVAL_S):
+        self.interval = interval
+        self.peak: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _sample(self) -> None:
+        rss = current_rss_mb()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self) -> "RssSampler":
+        self._sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+class StageProfiler:
+    """
+    Records wall time, CPU time and memory for named pipeline stages (`peak_rss_mb` is the
+    stage's own sampled peak, `process_peak_rss_mb` the process high-water mark at its end).
+    Stages listed in `profile_stages` are additionally profiled with cProfile (`.prof` files,
+    readable by pstats/snakeviz) or sampled by an attached `py-spy record` (speedscope files).
+    """
+
+    def __init__(self, profile_stages: Iterable[str]=(), profile_dir: Optional[str]=None, profiler: str="cprofile"):
+        if profiler not in ("cprofile", "pyspy"):
+            raise ValueError(f"Unknown profiler {profiler}")
+        self.profile_stages = set(profile_stages)
+        self.profile_dir = profile_dir
+        self.profiler = profiler
+        self.stages: List[Dict[str, Any]] = []
+        self.trials: List[Dict[str, Any]] = []
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        stop_profiler = self._start_profiler(name) if name in self.profile_stages else None
+        rss_before = current_rss_mb()
+        sampler = RssSampler()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            with sampler:
+                yield
+        finally:
+            wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+            if stop_profiler is not None:
+                stop_profiler()
+            rss_after = current_rss_mb()
+            rec = {
+                "stage": name, "wall_s": wall, "cpu_s": cpu,
+                "cpu_util": cpu / wall if wall > 0 else None,
+                "rss_mb": rss_after,
+                "rss_delta_mb": (rss_after - rss_before) if rss_after is not None and rss_before is not None else None,
+                "peak_rss_mb": sampler.peak,
+                "process_peak_rss_mb": peak_rss_mb(),
+            }
+            self.stages.append(rec)
+            logger.info(f"[{name}] wall={wall:.2f}s cpu={cpu:.2f}s peak_rss={rec['peak_rss_mb']}MB")
+
+    def _start_profiler(self, name: str):
+        out_dir = self.profile_dir or "."
+        ensure_dir(out_dir)
+        if self.profiler == "cprofile":
+            import cProfile
+            prof = cProfile.Profile()
+            prof.enable()
+            def stop():
+                prof.disable()
+                prof.dump_stats(os.path.join(out_dir, f"profile_{name}.prof"))
+            return stop
+
+        exe = shutil.which("py-spy")
+        if exe is None:
+            logger.warning(f"py-spy not found on PATH; skipping sampling profile for stage {name}")
+            return None
+        out_path = os.path.join(out_dir, f"profile_{name}.speedscope.json")
+        proc = subprocess.Popen([exe, "record", "--pid", str(os.getpid()), "--format", "speedscope", "--output", out_path, "--nonblocking"])
+        def stop():
+            # SIGINT faz o py-spy encerrar a amostragem e gravar o arquivo
+            proc.send_signal(signal.SIGINT)
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        return stop
+
+    def add_optuna_trials(self, study) -> None:
+        for t in study.trials:
+            duration = (t.datetime_complete - t.datetime_start).total_seconds() if t.datetime_complete and t.datetime_start else None
+            fold_s = t.user_attrs.get("fold_seconds", [])
+            self.trials.append({
+                "trial": t.number, "state": t.state.name, "value": t.value, "duration_s": duration,
+                "n_folds": len(fold_s), "mean_fold_s": float(sum(fold_s) / len(fold_s)) if fold_s else None,
+                "max_fold_s": max(fold_s) if fold_s else None,
+            })
+
+    def report(self) -> Dict[str, Any]:
+        total = time.perf_counter() - self._t0
+        return {
+            "total_wall_s": total,
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": [dict(s, wall_pct=100 * s["wall_s"] / total if total > 0 else None) for s in self.stages],
+            "trials": self.trials,
+        }
+
+    def save(self, out_dir: str, dataset: str) -> Dict[str, Any]:
+        rep = self.report()
+        save_json(rep, os.path.join(out_dir, f"profile_{dataset}.json"))
+        pd.DataFrame(rep["stages"]).to_csv(os.path.join(out_dir, f"profile_{dataset}_stages.csv"), index=False)
+        if rep["trials"]:
+            pd.DataFrame(rep["trials"]).to_csv(os.path.join(out_dir, f"profile_{dataset}_trials.csv"), index=False)
+        return rep
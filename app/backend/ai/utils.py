@@ -1,13 +1,13 @@
 from __future__ import annotations
+from contextlib import contextmanager
 import json
 import logging
 import os
 import random
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, List, Optional
 
 import numpy as np
-import joblib
 
 SEED_DEFAULT = 42
 
@@ -24,8 +24,16 @@ def set_seed(seed: int = SEED_DEFAULT) -> None:
         # torch não instalado ou indisponível -> ok
         pass
 
+class _DeferredFileHandler(logging.FileHandler):
+    # o diretório e o arquivo de log só são criados no primeiro registro emitido
+    def __init__(self, filename: str, **kwargs):
+        super().__init__(filename, delay=True, **kwargs)
+
+    def _open(self):
+        Path(os.path.dirname(self.baseFilename)).mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
 def get_logger(name: str, log_dir: str = "logs", level: int = logging.INFO) -> logging.Logger:
-    Path(log_dir).mkdir(parents=True, exist_ok=True)
     logger = logging.getLogger(name)
     logger.setLevel(level)
     logger.propagate = False
@@ -36,7 +44,7 @@ def get_logger(name: str, log_dir: str = "logs", level: int = logging.INFO) -> l
         ch.setFormatter(fmt)
         logger.addHandler(ch)
 
-        fh = logging.FileHandler(os.path.join(log_dir, f"{name}.log"))
+        fh = _DeferredFileHandler(os.path.join(log_dir, f"{name}.log"))
         fh.setLevel(level)
         fh.setFormatter(fmt)
         logger.addHandler(fh)
@@ -52,11 +60,54 @@ def load_json(path: str) -> Dict[str, Any]:
         return json.load(f)
 
 def save_model(model: Any, path: str) -> None:
+    import joblib
     Path(os.path.dirname(path)).mkdir(parents=True, exist_ok=True)
     joblib.dump(model, path)
 
 def load_model(path: str) -> Any:
+    import joblib
     return joblib.load(path)
 
 def ensure_dir(path: str) -> None:
-    Path(path).mkdir(parents=True, exist_ok=True)
\ No newline at end of file
+    Path(path).mkdir(parents=True, exist_ok=True)
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """Exclusive inter-process lock on `<path>.lock` (no-op where fcntl is unavailable)."""
+    try:
+        import fcntl
+    except ImportError:  # pragma: no cover - Windows
+        yield
+        return
+    Path(os.path.dirname(path) or ".").mkdir(parents=True, exist_ok=True)
+    with open(f"{path}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def upsert_csv_rows(path: str, rows: List[Dict[str, Any]], keys: List[str],
+                    defaults: Optional[Dict[str, Any]]=None, sort_by: Optional[str]=None, ascending: bool=False) -> pd.DataFrame:
+    """
+    Replace the rows matching `keys` and add the new ones, under a file lock and through an
+    atomic rename, so concurrent writers neither lose updates nor expose a half-written file.
+    """
+    import pandas as pd
+    new = pd.DataFrame(rows)
+    with file_lock(path):
+        if os.path.exists(path):
+            df = pd.read_csv(path)
+            for col, value in (defaults or {}).items():
+                if col not in df.columns:
+                    df[col] = value
+            replaced = df.set_index(keys).index.isin(new.set_index(keys).index)
+            df = pd.concat([df[~replaced], new], ignore_index=True)
+        else:
+            df = new
+        if sort_by:
+            df = df.sort_values(by=sort_by, ascending=ascending)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        df.to_csv(tmp, index=False)
+        os.replace(tmp, path)
+    return df
@@ -0,0 +1,78 @@
+import os
+import re
+import hashlib
+from typing import Optional, Set, Tuple
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from settings import settings
+
+# shards estáticos gerados na ingestão (scripts/build_static_catalog.py): só arquivos, nada calculado por requisição
+router = APIRouter(prefix="/catalog")
+
+IMMUTABLE = "public, max-age=31536000, immutable"  # o nome do shard muda quando o conteúdo muda
+SHARD_NAME = re.compile(r"^[A-Za-z0-9_-]+\.[0-9a-f]{16}\.json$")
+MISSION_NAME = re.compile(r"^[a-z0-9]+$")
+# preferência do servidor entre as variantes pré-comprimidas
+ENCODING_SUFFIXES = (("br", ".br"), ("gzip", ".gz"))
+
+_manifest: Optional[Tuple] = None  # ((mtime, size), conteúdo, etag)
+
+def accepted_encodings(header: str) -> Set[str]:
+  # "gzip, deflate, br;q=0.8" -> {"gzip", "deflate", "br"}; q=0 exclui
+  accepted = set()
+  for part in header.split(","):
+    name, _, params = part.strip().partition(";")
+    if name and params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+      accepted.add(name.strip().lower())
+  return accepted
+
+def load_manifest() -> Optional[Tuple[bytes, str]]:
+  global _manifest
+  path = os.path.join(settings.database.static_catalog_path, "manifest.json")
+  try:
+    st = os.stat(path)
+  except FileNotFoundError:
+    return None
+  stamp = (st.st_mtime_ns, st.st_size)
+  cached = _manifest
+  if cached is None or cached[0] != stamp:
+    with open(path, "rb") as f:
+      content = f.read()
+    cached = _manifest = (stamp, content, hashlib.sha256(content).hexdigest()[:16])
+  return cached[1], cached[2]
+
+@router.get("/manifest.json")
+def getManifest(request: Request):
+  manifest = load_manifest()
+  if manifest is None:
+    raise HTTPException(status_code=404, detail="Static catalog not built")
+  content, etag = manifest
+
+  # muda a cada ingestão: revalidado sempre (304 quando igual)
+  headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+  if request.headers.get("if-none-match") == headers["ETag"]:
+    return Response(status_code=304, headers=headers)
+  return Response(content=content, media_type="application/json", headers=headers)
+
+@router.get("/{mission}/{name}")
+def getShard(mission: str, name: str, request: Request):
+  if not MISSION_NAME.match(mission) or not SHARD_NAME.match(name):
+    raise HTTPException(status_code=404, detail="Shard not found")
+  path = os.path.join(settings.database.static_catalog_path, mission, name)
+  digest = name.rsplit(".", 2)[1]
+
+  accepted = accepted_encodings(request.headers.get("accept-encoding", ""))
+  encoding, file = None, path
+  for enc, suffix in ENCODING_SUFFIXES:
+    if enc in accepted and os.path.exists(path + suffix):
+      encoding, file = enc, path + suffix
+      break
+  if encoding is None and not os.path.exists(path):
+    raise HTTPException(status_code=404, detail="Shard not found")
+
+  headers = {"ETag": f'"{digest}-{encoding or "identity"}"', "Cache-Control": IMMUTABLE, "Vary": "Accept-Encoding"}
+  if request.headers.get("if-none-match") == headers["ETag"]:
+    return Response(status_code=304, headers=headers)
+  if encoding is not None:
+    headers["Content-Encoding"] = encoding
+  return FileResponse(file, media_type="application/json", headers=headers)
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+from database.database import get_db
+from database.schemas import SimilarExoplanetResponse, SimilarResponse
+from database.repositorys.exoplanet_repository import ExoplanetRepository
+from database.repositorys.explanation_repository import ExplanationRepository
+from app.backend.catalog.similarity import IndexFile
+from settings import settings
+
+MAX_SIMILAR = 100
+
+router = APIRouter(prefix="/exoplanets")
+
+# índice construído na ingestão (scripts/build_similarity_index.py); recarregado quando o arquivo muda
+similarity_index = IndexFile(settings.database.similarity_index_path)
+
+@router.get("/{exoplanet_id}/similar")
+def getSimilar(exoplanet_id: str, k: int = 10, db: Session = Depends(get_db)):
+  if not 1 <= k <= MAX_SIMILAR:
+    raise HTTPException(status_code=422, detail=f"k must be between 1 and {MAX_SIMILAR}")
+
+  neighbours = similarity_index.get().query(exoplanet_id, k)
+  if neighbours is None:
+    raise HTTPException(status_code=404, detail="Exoplanet not found in similarity index")
+
+  planets = ExoplanetRepository.getByIds(db, [pid for pid, _ in neighbours])
+  similar = [
+    SimilarExoplanetResponse(
+      id=e.id,
+      star_id=e.star_id,
+      name=e.name,
+      probability=e.probability,
+      radius_earth=e.radius_earth,
+      equilibrium_tempk=e.equilibrium_tempk,
+      orbital_period_days=e.orbital_period_days,
+      semi_major_axis=e.semi_major_axis,
+      eccentricity=e.eccentricity,
+      inclination_deg=e.inclination_deg,
+      distance=dist)
+    for pid, dist in neighbours if (e := planets.get(pid)) is not None
+  ]
+  return SimilarResponse(id=exoplanet_id, similar=similar)
+
+@router.get("/{exoplanet_id}/explain")
+def getExplanation(exoplanet_id: str, request: Request, db: Session = Depends(get_db)):
+  # top-k contribuições SHAP pré-calculadas na ingestão (scripts/build_explanations.py)
+  row = ExplanationRepository.getByExoplanetId(db, exoplanet_id)
+  if row is None:
+    raise HTTPException(status_code=404, detail="Explanation not found")
+
+  headers = {"ETag": f'"{row.etag}"', "Cache-Control": "public, max-age=3600"}
+  if request.headers.get("if-none-match") == headers["ETag"]:
+    return Response(status_code=304, headers=headers)
+  return Response(content=row.payload, media_type="application/json", headers=headers)
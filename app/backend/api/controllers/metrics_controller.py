@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.backend.api.middlewares.instrumentation import registry
+from app.backend.api.middlewares.admission import admission_stats
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+  return PlainTextResponse(registry.render() + admission_stats.render(), media_type="text/plain; version=0.0.4")
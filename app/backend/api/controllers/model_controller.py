@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from app.backend.api.model_provider import provider
+
+router = APIRouter(prefix="/models")
+
+@router.get("")
+def getModels():
+  return {
+    "models": provider.status(),
+    "versions": {name: provider.registry.list_versions(name) for name in ("koi", "toi", "k2")},
+  }
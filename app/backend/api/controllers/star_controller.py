@@ -1,15 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from typing import Optional
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from sqlalchemy.orm import Session
 from database.database import get_db
-from database.schemas import PageRespose
+from database.schemas import PageRespose, SearchPageResponse
 from database.repositorys.star_repository import StarRepository
+from database.repositorys.catalog_backend import SORTABLE_STAR_COLUMNS
 from database.repositorys.exoplanet_repository import ExoplanetRepository
+from database.repositorys.system_payload_repository import SystemPayloadRepository
+from app.backend.catalog import ephemeris
+
+MAX_EPHEMERIS_POINTS = 2_000_000  # timesteps × planetas por requisição
 
 router = APIRouter(prefix="/stars")
 
 @router.get("")
-def getPage(page: int, db: Session = Depends(get_db)):
-  stars = StarRepository.getPerPage(db, page)
+def getPage(page: int, sort: Optional[str] = None, order: str = "desc", db: Session = Depends(get_db)):
+  # ranking por colunas de resumo (ex.: ?sort=hz_candidate_count&order=desc) -> varredura do índice
+  if sort is not None and sort not in SORTABLE_STAR_COLUMNS:
+    raise HTTPException(status_code=422, detail=f"sort must be one of: {', '.join(SORTABLE_STAR_COLUMNS)}")
+  if order not in ("asc", "desc"):
+    raise HTTPException(status_code=422, detail="order must be asc or desc")
+  stars = StarRepository.getPerPage(db, page, sort=sort, descending=order == "desc")
   
   for s in stars:
     s.planets = ExoplanetRepository.getByStarId(db, s.id)
@@ -18,13 +30,72 @@ def getPage(page: int, db: Session = Depends(get_db)):
   return res
 
 @router.get("/search")
-def getPage(page: int, mission: int = 0, search: str = "", db: Session = Depends(get_db)):
-  starsIds = ExoplanetRepository.getStarIdByLike(db, mission, search, page)
-  print("IDS: ", starsIds)
+def getPage(page: int, mission: int = 0, search: str = "", facets: bool = False, db: Session = Depends(get_db)):
+  if mission not in (0, 1, 2, 3):
+    raise HTTPException(status_code=422, detail="mission must be 0 (all), 1 (KOI), 2 (TOI) or 3 (K2)")
+  # facets=true: contagens por missão, faixa de probabilidade e classe de raio de todos os resultados
+  counts = None
+  if facets:
+    starsIds, counts = ExoplanetRepository.getStarIdByLikeWithFacets(db, mission, search, page)
+  else:
+    starsIds = ExoplanetRepository.getStarIdByLike(db, mission, search, page)
   stars = StarRepository.getByIds(db, starsIds)
   
   for s in stars:
     s.planets = ExoplanetRepository.getByStarId(db, s.id)
   
+  if counts is not None:
+    return SearchPageResponse(page=page, stars=stars, facets=counts)
   res = PageRespose(page=page, stars=stars)
-  return res
\ No newline at end of file
+  return res
+
+@router.get("/{star_id}/system")
+def getSystem(star_id: str, request: Request, db: Session = Depends(get_db)):
+  # payload pré-calculado na ingestão (scripts/build_system_payloads.py)
+  row = SystemPayloadRepository.getByStarId(db, star_id)
+  if row is None:
+    raise HTTPException(status_code=404, detail="System not found")
+
+  headers = {"ETag": f'"{row.etag}"', "Cache-Control": "public, max-age=3600"}
+  if request.headers.get("if-none-match") == headers["ETag"]:
+    return Response(status_code=304, headers=headers)
+  return Response(content=row.payload, media_type="application/json", headers=headers)
+
+
+@router.get("/{star_id}/ephemeris")
+def getEphemeris(
+  star_id: str, start: float = 0.0, end: float = 365.25, steps: int = 365,
+  times: Optional[str] = None, db: Session = Depends(get_db)
+):
+  star = StarRepository.getById(db, star_id)
+  if star is None:
+    raise HTTPException(status_code=404, detail="Star not found")
+  planets = ExoplanetRepository.getByStarId(db, star_id)
+
+  # limite checado antes de qualquer alocação: `times` só é convertido e a grade só é criada depois
+  n_times = times.count(",") + 1 if times else steps
+  if not times and steps < 1:
+    raise HTTPException(status_code=422, detail="steps must be >= 1")
+  if n_times * max(len(planets), 1) > MAX_EPHEMERIS_POINTS:
+    raise HTTPException(status_code=422, detail=f"At most {MAX_EPHEMERIS_POINTS} timesteps x planets per request")
+
+  # `times` (lista separada por vírgulas, em dias) tem prioridade sobre start/end/steps
+  if times:
+    try:
+      times_arr = np.array([float(t) for t in times.split(",")], dtype=np.float64)
+    except ValueError:
+      raise HTTPException(status_code=422, detail="times must be a comma-separated list of numbers")
+    times_key = ("times", tuple(times_arr.tolist())) if len(times_arr) <= ephemeris.MAX_KEYED_TIMES else None
+  else:
+    times_arr = ephemeris.time_grid(start, end, steps)
+    times_key = ("range", start, end, steps)
+
+  elements = ephemeris.orbital_elements(planets, star.mass_solar)
+  buf = ephemeris.cache.get_or_compute(elements, times_key, times_arr)
+  headers = {
+    "X-Ephemeris-Shape": f"{len(times_arr)},{len(planets)},3",
+    "X-Ephemeris-Dtype": "float32",
+    "X-Ephemeris-Units": "AU",
+    "X-Planet-Ids": ",".join(elements.planet_ids),
+  }
+  return Response(content=buf, media_type="application/octet-stream", headers=headers)
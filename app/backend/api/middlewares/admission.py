@@ -0,0 +1,193 @@
+import asyncio
+import json
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from starlette.routing import Match
+
+# headers que mudam a resposta: entram na chave de coalescência
+COALESCE_HEADERS = (b"accept", b"accept-encoding", b"if-none-match")
+
+# ============================================================
+# MÉTRICAS
+# ============================================================
+
+class AdmissionStats:
+  """Outcome counters per route: admitted, queued, shed (queue_full / timeout) and coalesced."""
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self.counts: Dict[Tuple[str, str], int] = {}
+
+  def add(self, route: str, outcome: str) -> None:
+    with self._lock:
+      self.counts[(route, outcome)] = self.counts.get((route, outcome), 0) + 1
+
+  def render(self) -> str:
+    lines = [
+      "# HELP admission_requests_total Requests per route by admission outcome.",
+      "# TYPE admission_requests_total counter",
+    ]
+    with self._lock:
+      for (route, outcome), n in self.counts.items():
+        lines.append(f'admission_requests_total{{route="{route}",outcome="{outcome}"}} {n}')
+    return "\n".join(lines) + "\n"
+
+admission_stats = AdmissionStats()
+
+# ============================================================
+# LIMITES POR ROTA
+# ============================================================
+
+class RouteLimiter:
+  """`concurrency` slots plus a FIFO wait of at most `queue` requests for `queue_timeout` seconds."""
+
+  def __init__(self, limit):
+    self.limit = limit
+    self.slots = asyncio.Semaphore(limit.concurrency)
+    self.waiting = 0
+
+  async def acquire(self) -> Optional[str]:
+    """None when a slot was taken, otherwise why the request is shed ("queue_full" or "timeout")."""
+    if not self.slots.locked() and self.waiting == 0:
+      await self.slots.acquire()  # vaga livre: não bloqueia
+      return None
+    if self.waiting >= self.limit.queue:
+      return "queue_full"
+    self.waiting += 1
+    try:
+      await asyncio.wait_for(self.slots.acquire(), self.limit.queue_timeout)
+      return None
+    except asyncio.TimeoutError:
+      return "timeout"
+    finally:
+      self.waiting -= 1
+
+  def release(self) -> None:
+    self.slots.release()
+
+def _copy(message: dict) -> dict:
+  # headers em lista própria: MutableHeaders dos middlewares externos altera a lista no lugar
+  return dict(message, headers=list(message["headers"])) if "headers" in message else dict(message)
+
+class _Flight:
+  """Response of an in-flight request, replayed to identical requests that arrive meanwhile."""
+  __slots__ = ("done", "messages", "complete")
+
+  def __init__(self):
+    self.done = asyncio.Event()
+    self.messages: List[dict] = []
+    self.complete = False
+
+# ============================================================
+# MIDDLEWARE
+# ============================================================
+
+class AdmissionMiddleware:
+  """
+  Pure ASGI middleware for the routes listed in `api.admission.routes`: at most `concurrency`
+  requests of a route run at once, up to `queue` more wait `queue_timeout` seconds for a slot,
+  and the rest get an immediate 503 with `Retry-After`, so latency stays bounded under overload.
+  Identical GET requests (path, query and content-negotiation headers) that arrive while one is
+  running wait for it and receive a copy of its response instead of running again.
+  Limits are per worker process.
+  """
+
+  def __init__(self, app, router, config, stats: AdmissionStats = admission_stats):
+    self.app = app
+    self.router = router
+    self.config = config
+    self.stats = stats
+    self._loop = None
+    self._limiters: Dict[str, RouteLimiter] = {}
+    self._flights: Dict[Tuple, _Flight] = {}
+
+  def _route(self, scope):
+    for route in self.router.routes:
+      match, _ = route.matches(scope)
+      if match == Match.FULL:
+        return route
+    return None
+
+  def _state(self):
+    # semáforos e eventos do asyncio pertencem a um loop: recomeça se o app passou a outro (ex.: TestClient)
+    loop = asyncio.get_running_loop()
+    if loop is not self._loop:
+      self._loop, self._limiters, self._flights = loop, {}, {}
+
+  async def __call__(self, scope, receive, send):
+    if scope["type"] != "http" or not self.config.enabled:
+      await self.app(scope, receive, send)
+      return
+    route = self._route(scope)
+    limit = self.config.routes.get(getattr(route, "path", None))
+    if limit is None:
+      await self.app(scope, receive, send)
+      return
+
+    self._state()
+    path = route.path
+    scope["route"] = route  # métricas por template também para respostas que não passam pelo roteador (503, coalescidas)
+    limiter = self._limiters.get(path)
+    if limiter is None:
+      limiter = self._limiters[path] = RouteLimiter(limit)
+
+    if not limit.coalesce or scope["method"] not in ("GET", "HEAD"):
+      await self._admit(scope, receive, send, limiter, route)
+      return
+
+    headers = dict(scope["headers"])
+    key = (scope["method"], scope["path"], scope["query_string"], *(headers.get(h) for h in COALESCE_HEADERS))
+    flight = self._flights.get(key)
+    if flight is not None:
+      await flight.done.wait()
+      if flight.complete:
+        self.stats.add(path, "coalesced")
+        for message in flight.messages:
+          await send(_copy(message))
+        return
+      # a requisição original falhou: esta roda por conta própria
+      await self._admit(scope, receive, send, limiter, route)
+      return
+
+    flight = self._flights[key] = _Flight()
+
+    async def recording_send(message):
+      # cópia antes de repassar: middlewares externos (Server-Timing, CORS) alteram a mensagem
+      flight.messages.append(_copy(message))
+      if message["type"] == "http.response.body" and not message.get("more_body", False):
+        flight.complete = True
+      await send(message)
+
+    try:
+      await self._admit(scope, receive, recording_send, limiter, route)
+    finally:
+      del self._flights[key]
+      flight.done.set()
+
+  async def _admit(self, scope, receive, send, limiter: RouteLimiter, route):
+    queued = limiter.slots.locked() or limiter.waiting > 0
+    rejected = await limiter.acquire()
+    if rejected is not None:
+      self.stats.add(route.path, rejected)
+      await self._shed(send)
+      return
+    self.stats.add(route.path, "queued" if queued else "admitted")
+    try:
+      await self.app(scope, receive, send)
+    finally:
+      limiter.release()
+
+  async def _shed(self, send):
+    body = json.dumps({"detail": "Server busy, retry later"}).encode()
+    await send({
+      "type": "http.response.start",
+      "status": 503,
+      "headers": [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        (b"retry-after", str(self.config.retry_after).encode()),
+        (b"cache-control", b"no-store"),
+      ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,167 @@
+import time
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+# ============================================================
+# MÉTRICAS
+# ============================================================
+
+class Histogram:
+  __slots__ = ("buckets", "counts", "sum", "count")
+
+  def __init__(self, buckets: Sequence[float]):
+    self.buckets = tuple(buckets)
+    self.counts = [0] * (len(self.buckets) + 1)  # último = +Inf
+    self.sum = 0.0
+    self.count = 0
+
+  def observe(self, value: float) -> None:
+    self.counts[bisect_left(self.buckets, value)] += 1
+    self.sum += value
+    self.count += 1
+
+class RequestStats:
+  """Per-request counters filled by the SQLAlchemy hooks while the request runs."""
+  __slots__ = ("queries", "sql_time")
+
+  def __init__(self):
+    self.queries = 0
+    self.sql_time = 0.0
+
+_current_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+RouteKey = Tuple[str, str]
+
+class MetricsRegistry:
+  def __init__(self):
+    self._lock = threading.Lock()
+    self.latency: Dict[RouteKey, Histogram] = {}
+    self.queries: Dict[RouteKey, Histogram] = {}
+    self.sql_seconds: Dict[RouteKey, float] = {}
+    self.requests: Dict[Tuple[str, str, int], int] = {}
+
+  def record(self, method: str, route: str, status: int, duration: float, stats: RequestStats) -> None:
+    key = (method, route)
+    with self._lock:
+      hist = self.latency.get(key)
+      if hist is None:
+        hist = self.latency[key] = Histogram(LATENCY_BUCKETS)
+        self.queries[key] = Histogram(QUERY_COUNT_BUCKETS)
+        self.sql_seconds[key] = 0.0
+      hist.observe(duration)
+      self.queries[key].observe(stats.queries)
+      self.sql_seconds[key] += stats.sql_time
+      rkey = (method, route, status)
+      self.requests[rkey] = self.requests.get(rkey, 0) + 1
+
+  def render(self) -> str:
+    """Prometheus text exposition format."""
+    lines = []
+    with self._lock:
+      _render_histograms(lines, "http_request_duration_seconds", "Request latency per route.", self.latency)
+      _render_histograms(lines, "db_queries_per_request", "SQL statements executed per request.", self.queries)
+
+      lines.append("# HELP db_query_duration_seconds_total Time spent in SQL per route.")
+      lines.append("# TYPE db_query_duration_seconds_total counter")
+      for (method, route), total in self.sql_seconds.items():
+        lines.append(f'db_query_duration_seconds_total{{method="{method}",route="{route}"}} {total}')
+
+      lines.append("# HELP http_requests_total Requests per route and status code.")
+      lines.append("# TYPE http_requests_total counter")
+      for (method, route, status), n in self.requests.items():
+        lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"}} {n}')
+    return "\n".join(lines) + "\n"
+
+def _render_histograms(lines, name: str, help_text: str, hists: Dict[RouteKey, Histogram]) -> None:
+  lines.append(f"# HELP {name} {help_text}")
+  lines.append(f"# TYPE {name} histogram")
+  for (method, route), h in hists.items():
+    labels = f'method="{method}",route="{route}"'
+    cumulative = 0
+    for bound, n in zip(h.buckets, h.counts):
+      cumulative += n
+      lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {h.count}')
+    lines.append(f"{name}_sum{{{labels}}} {h.sum}")
+    lines.append(f"{name}_count{{{labels}}} {h.count}")
+
+registry = MetricsRegistry()
+
+# ============================================================
+# SQLALCHEMY
+# ============================================================
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+  if _current_stats.get() is not None:
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+  stats = _current_stats.get()
+  if stats is None:
+    return
+  starts = conn.info.get("query_start_time")
+  if starts:
+    stats.sql_time += time.perf_counter() - starts.pop()
+  stats.queries += 1
+
+def instrument_engine(engine: Engine) -> None:
+  """Count queries and SQL time for the request currently being served."""
+  if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+# ============================================================
+# MIDDLEWARE
+# ============================================================
+
+class InstrumentationMiddleware:
+  """
+  Pure ASGI middleware: records latency and query counts per route template and
+  adds a `Server-Timing` header (total app time and SQL time) to every response.
+  """
+
+  def __init__(self, app, metrics: MetricsRegistry = registry, server_timing: bool = True):
+    self.app = app
+    self.metrics = metrics
+    self.server_timing = server_timing
+
+  async def __call__(self, scope, receive, send):
+    if scope["type"] != "http":
+      await self.app(scope, receive, send)
+      return
+
+    stats = RequestStats()
+    token = _current_stats.set(stats)
+    start = time.perf_counter()
+    status = 500
+
+    async def send_wrapper(message):
+      nonlocal status
+      if message["type"] == "http.response.start":
+        status = message["status"]
+        if self.server_timing:
+          elapsed_ms = (time.perf_counter() - start) * 1000
+          headers = MutableHeaders(scope=message)
+          headers.append(
+            "Server-Timing",
+            f'app;dur={elapsed_ms:.2f}, db;dur={stats.sql_time * 1000:.2f};desc="{stats.queries} queries"'
+          )
+      await send(message)
+
+    try:
+      await self.app(scope, receive, send_wrapper)
+    finally:
+      _current_stats.reset(token)
+      # template da rota (ex.: /stars/search) para não explodir a cardinalidade
+      route = scope.get("route")
+      route_path = getattr(route, "path", None) or "unmatched"
+      self.metrics.record(scope["method"], route_path, status, time.perf_counter() - start, stats)
@@ -0,0 +1,12 @@
+from app.backend.ai.model_registry import ModelRegistry, ModelProvider
+from settings import settings
+
+# Modelos ativos do processo da API; recarregados em segundo plano quando o ACTIVE muda
+provider = ModelProvider(
+  ModelRegistry(settings.data.registry_folder),
+  legacy_paths={
+    "koi": settings.data.path_model_koi,
+    "toi": settings.data.path_model_toi,
+    "k2": settings.data.path_model_k2,
+  },
+)
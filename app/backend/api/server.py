@@ -0,0 +1,265 @@
+import importlib.util
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import uvicorn
+from uvicorn.importer import import_from_string
+
+from settings import ServerConfig
+
+RESTART_BACKOFF = 0.5  # segundos após a primeira falha de startup; dobra a cada falha seguida
+
+# ============================================================
+# WORKER
+# ============================================================
+
+class WorkerServer(uvicorn.Server):
+  """uvicorn server that touches a heartbeat file from its event loop (≈1x/s) while it is responsive."""
+
+  def __init__(self, config: uvicorn.Config, heartbeat_fd: int):
+    super().__init__(config)
+    self.heartbeat_fd = heartbeat_fd
+
+  async def on_tick(self, counter: int) -> bool:
+    if counter % 10 == 0:
+      os.utime(self.heartbeat_fd)
+    return await super().on_tick(counter)
+
+class Worker:
+  __slots__ = ("pid", "heartbeat", "started", "ready", "retiring_since")
+
+  def __init__(self, pid: int, heartbeat):
+    self.pid = pid
+    self.heartbeat = heartbeat
+    self.started = time.monotonic()
+    self.ready = False
+    self.retiring_since: Optional[float] = None
+
+  def last_beat(self) -> float:
+    # 0 até o primeiro tick do event loop (o mestre zera o mtime antes do fork)
+    return os.fstat(self.heartbeat.fileno()).st_mtime
+
+def check_event_loop(cfg: ServerConfig) -> None:
+  # "auto" já usa uvloop/httptools quando instalados; pedir explicitamente exige o pacote
+  for option, package in ((cfg.loop, "uvloop"), (cfg.http, "httptools")):
+    if option == package and importlib.util.find_spec(package) is None:
+      raise RuntimeError(f"api.server is set to {package} but it is not installed (pip install {package})")
+
+def resolve_workers(workers: int) -> int:
+  return workers if workers > 0 else (os.cpu_count() or 1)
+
+# ============================================================
+# MESTRE PRE-FORK
+# ============================================================
+
+class PreforkServer:
+  """
+  Production launcher: the master binds the listening socket once and forks `workers` uvicorn
+  processes that accept on it (the kernel spreads connections among them).
+
+  With `preload`, the app module is imported in the master before forking and its optional
+  `warm_caches()` is called, so workers share the loaded models/indexes copy-on-write; each
+  worker then calls the module's optional `after_fork()` (e.g. to drop inherited DB connections).
+
+  Signals: TERM/INT stop gracefully (workers finish in-flight requests for `graceful_timeout`
+  seconds), HUP replaces every worker with a fresh one before retiring the old ones (without
+  `preload` this also picks up new code), and a worker whose event loop stops touching its
+  heartbeat for `worker_timeout` seconds, or that dies, is killed and replaced. Until its first
+  heartbeat a worker has `startup_timeout` seconds instead; workers that die before becoming
+  ready are replaced with exponential backoff (up to `max_restart_backoff` seconds), so a broken
+  app does not fork in a tight loop.
+  """
+
+  def __init__(self, app_path: str, cfg: ServerConfig, host: str, port: int, workers: Optional[int]=None):
+    self.app_path = app_path
+    self.cfg = cfg
+    self.host = host
+    self.port = port
+    self.n_workers = resolve_workers(cfg.workers if workers is None else workers)
+    self.app = None
+    self.module = None
+    self.workers: Dict[int, Worker] = {}
+    self.signals: List[int] = []
+    self.stopping = False
+    self.startup_failures = 0
+    self.spawn_after = 0.0  # monotonic: próximo fork permitido (backoff)
+
+  # ---------------- setup ----------------
+
+  def bind(self) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((self.host, self.port))
+    sock.listen(self.cfg.backlog)
+    sock.set_inheritable(True)
+    return sock
+
+  def preload(self) -> None:
+    self.app = import_from_string(self.app_path)
+    self.module = sys.modules[self.app_path.split(":")[0]]
+    warm = getattr(self.module, "warm_caches", None)
+    if warm is not None:
+      t0 = time.perf_counter()
+      warm()
+      print(f"🔥 Caches warmed in the master in {time.perf_counter() - t0:.2f}s")
+
+  def uvicorn_config(self) -> uvicorn.Config:
+    return uvicorn.Config(
+      self.app if self.app is not None else self.app_path,
+      loop=self.cfg.loop,
+      http=self.cfg.http,
+      backlog=self.cfg.backlog,
+      timeout_keep_alive=self.cfg.keepalive_timeout,
+      timeout_graceful_shutdown=self.cfg.graceful_timeout,
+      access_log=self.cfg.access_log,
+      log_level="info",
+    )
+
+  # ---------------- workers ----------------
+
+  def spawn(self) -> None:
+    heartbeat = tempfile.TemporaryFile(prefix="exo_worker_")
+    os.utime(heartbeat.fileno(), (0, 0))
+    pid = os.fork()
+    if pid:
+      self.workers[pid] = Worker(pid, heartbeat)
+      return
+
+    # processo filho
+    exit_code = 0
+    try:
+      for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+        signal.signal(sig, signal.SIG_DFL)
+      after_fork = getattr(self.module, "after_fork", None)
+      if after_fork is not None:
+        after_fork()
+      WorkerServer(self.uvicorn_config(), heartbeat.fileno()).run(sockets=[self.sock])
+    except BaseException as exc:
+      print(f"Worker {os.getpid()} failed: {exc!r}", file=sys.stderr)
+      exit_code = 1
+    finally:
+      sys.stdout.flush()
+      sys.stderr.flush()
+      os._exit(exit_code)
+
+  def reap(self) -> None:
+    while self.workers:
+      try:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+      except ChildProcessError:
+        return
+      if pid == 0:
+        return
+      worker = self.workers.pop(pid, None)
+      if worker is not None:
+        ready = worker.ready or worker.last_beat() > 0
+        worker.heartbeat.close()
+        if worker.retiring_since is None and not self.stopping:
+          if ready:
+            print(f"⚠️  Worker {pid} exited (status {status}); starting a new one")
+          else:
+            self.startup_failed(f"Worker {pid} exited during startup (status {status})")
+
+  def startup_failed(self, reason: str) -> None:
+    self.startup_failures += 1
+    delay = min(RESTART_BACKOFF * 2 ** (self.startup_failures - 1), self.cfg.max_restart_backoff)
+    self.spawn_after = time.monotonic() + delay
+    print(f"⚠️  {reason}; {self.startup_failures} in a row, next worker in {delay:.1f}s")
+
+  def kill(self, worker: Worker, sig: int) -> None:
+    try:
+      os.kill(worker.pid, sig)
+    except ProcessLookupError:
+      pass
+
+  def retire(self, workers: List[Worker]) -> None:
+    now = time.monotonic()
+    for worker in workers:
+      if worker.retiring_since is None:
+        worker.retiring_since = now
+        self.kill(worker, signal.SIGTERM)
+
+  def active(self) -> List[Worker]:
+    return [w for w in self.workers.values() if w.retiring_since is None]
+
+  def check_workers(self) -> None:
+    now, wall = time.monotonic(), time.time()
+    for worker in list(self.workers.values()):
+      if worker.retiring_since is not None:
+        if now - worker.retiring_since > self.cfg.graceful_timeout:
+          self.kill(worker, signal.SIGKILL)
+        continue
+      beat = worker.last_beat()
+      if beat == 0:
+        # ainda subindo: só o prazo de startup vale
+        if now - worker.started > self.cfg.startup_timeout:
+          worker.retiring_since = now - self.cfg.graceful_timeout
+          self.kill(worker, signal.SIGKILL)
+          self.startup_failed(f"Worker {worker.pid} not ready after {self.cfg.startup_timeout}s")
+        continue
+      if not worker.ready:
+        worker.ready = True
+        self.startup_failures = 0
+      if wall - beat > self.cfg.worker_timeout:
+        print(f"⚠️  Worker {worker.pid} missed its heartbeat for {self.cfg.worker_timeout}s; restarting it")
+        worker.retiring_since = now - self.cfg.graceful_timeout
+        self.kill(worker, signal.SIGKILL)
+    while not self.stopping and len(self.active()) < self.n_workers and now >= self.spawn_after:
+      self.spawn()
+
+  # ---------------- loop ----------------
+
+  def handle_signal(self, sig: int, frame) -> None:
+    self.signals.append(sig)
+
+  def reload(self) -> None:
+    old = self.active()
+    print(f"🔄 Reloading {len(old)} workers")
+    for _ in range(self.n_workers):
+      self.spawn()
+    self.retire(old)
+
+  def run(self) -> None:
+    check_event_loop(self.cfg)
+    self.sock = self.bind()
+    if self.cfg.preload:
+      self.preload()
+    for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+      signal.signal(sig, self.handle_signal)
+    signal.signal(signal.SIGCHLD, self.handle_signal)
+
+    print(f"🚀 Serving {self.app_path} on http://{self.host}:{self.port} with {self.n_workers} workers (pid {os.getpid()})")
+    try:
+      while not (self.stopping and not self.workers):
+        while self.signals:
+          sig = self.signals.pop(0)
+          if sig in (signal.SIGTERM, signal.SIGINT) and not self.stopping:
+            print("🛑 Stopping workers gracefully...")
+            self.stopping = True
+            self.retire(list(self.workers.values()))
+          elif sig == signal.SIGHUP and not self.stopping:
+            self.reload()
+        self.reap()
+        self.check_workers()
+        time.sleep(0.2)
+    finally:
+      for worker in self.workers.values():
+        self.kill(worker, signal.SIGKILL)
+      self.sock.close()
+
+def serve(app_path: str, cfg: ServerConfig, host: str, port: int, workers: Optional[int]=None) -> None:
+  if not hasattr(os, "fork"):
+    # Windows: sem fork, o uvicorn sobe os workers com spawn (cada um importa o app)
+    check_event_loop(cfg)
+    uvicorn.run(
+      app_path, host=host, port=port, workers=resolve_workers(cfg.workers if workers is None else workers),
+      loop=cfg.loop, http=cfg.http, backlog=cfg.backlog, timeout_keep_alive=cfg.keepalive_timeout,
+      timeout_graceful_shutdown=cfg.graceful_timeout, access_log=cfg.access_log,
+    )
+    return
+  PreforkServer(app_path, cfg, host, port, workers).run()
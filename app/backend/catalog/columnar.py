@@ -0,0 +1,237 @@
+from __future__ import annotations
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import os
+import threading
+import time
+
+import numpy as np
+
+from app.backend.ai.utils import get_logger
+from app.backend.catalog.facets import PROBABILITY_EDGES, RADIUS_EDGES, bucket_codes, facet_counts
+
+logger = get_logger("columnar")
+
+STAR_FLOAT_COLUMNS = ["mass_solar", "radius_solar", "effective_tempk", "metallicity_feh", "age_gyr"]
+# resumo por estrela (scripts/build_star_summaries.py); inteiros e flags voltam ao tipo original em star_records
+STAR_SUMMARY_COLUMNS = {
+    "planet_count": int, "max_probability": float, "hz_candidate_count": int,
+    "has_koi": bool, "has_toi": bool, "has_k2": bool,
+}
+PLANET_FLOAT_COLUMNS = [
+    "probability", "radius_earth", "equilibrium_tempk", "orbital_period_days",
+    "semi_major_axis", "eccentricity", "inclination_deg",
+]
+# /stars/search?mission=: 1 = KOI ("K..."), 2 = TOI ("T..."), 3 = K2 ("EPIC...")
+MISSION_PREFIXES = {1: "k", 2: "t", 3: "epic"}
+
+def _float_column(values: Sequence) -> np.ndarray:
+    # None -> NaN (NULL)
+    return np.array(values, dtype=np.float32)
+
+def _encode(values: Sequence[Optional[str]]) -> Tuple[np.ndarray, List[Optional[str]]]:
+    """Dictionary-encode a low-cardinality string column: (int32 codes, distinct values)."""
+    lookup: Dict[Optional[str], int] = {}
+    codes = np.fromiter((lookup.setdefault(v, len(lookup)) for v in values), dtype=np.int32, count=len(values))
+    return codes, list(lookup)
+
+def to_python(values: np.ndarray, kind: type=float) -> List:
+    # float32 -> menor decimal que o representa ("1.03", não 1.0299999713897705); NaN -> None
+    if kind is not float:
+        return [None if np.isnan(v) else kind(v) for v in values.tolist()]
+    return [None if s == "nan" else float(s) for s in values.astype(str)]
+
+class ColumnarCatalog:
+    """
+    Read-only, in-memory copy of `stars` and `exoplanets` as NumPy columns.
+
+    Stars keep the table (rowid) order; physics columns are float32 with NaN for NULL and
+    `missions` is dictionary-encoded. Planets are grouped by star, CSR-style: the planets of
+    star row `i` are rows `star_offsets[i]:star_offsets[i + 1]`, and `planet_star` holds the
+    star row of each planet (the star id itself is stored once, in `star_ids`).
+    Sort permutations are computed on first use and cached, since the snapshot never changes.
+    """
+
+    def __init__(self, stars: Dict[str, Sequence], planets: Dict[str, Sequence], version=None):
+        self.version = version
+        self.star_ids = np.array(stars["id"], dtype=str)
+        self.star_index: Dict[str, int] = {sid: i for i, sid in enumerate(self.star_ids.tolist())}
+        self.star_columns = {c: _float_column(stars[c]) for c in [*STAR_FLOAT_COLUMNS, *STAR_SUMMARY_COLUMNS]}
+        self.mission_codes, self.mission_values = _encode(stars["missions"])
+
+        # estrela de cada planeta -> linha da estrela; planetas órfãos são descartados
+        star_row = np.fromiter((self.star_index.get(str(s), -1) for s in planets["star_id"]), dtype=np.int32, count=len(planets["star_id"]))
+        keep = np.flatnonzero(star_row >= 0)
+        order = keep[np.argsort(star_row[keep], kind="stable")]  # mantém a ordem da tabela dentro da estrela
+        self.planet_star = star_row[order]
+        self.star_offsets = np.zeros(len(self.star_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.planet_star, minlength=len(self.star_ids)), out=self.star_offsets[1:])
+        self.planet_ids = np.array(planets["id"], dtype=str)[order]
+        names = np.array(planets["name"], dtype=object)[order]
+        self.planet_names = np.where(names == None, "", names).astype(str)  # noqa: E711
+        self.planet_name_null = names == None  # noqa: E711
+        self.planet_columns = {c: _float_column(planets[c])[order] for c in PLANET_FLOAT_COLUMNS}
+        # linhas (no agrupamento por estrela) na ordem original da tabela
+        self.by_table_order = np.argsort(order, kind="stable")
+
+        # texto em minúsculas para a busca (o LIKE do SQLite ignora caixa em ASCII)
+        self._planet_id_lower = np.char.lower(self.planet_ids)
+        self._planet_name_lower = np.char.lower(self.planet_names)
+        self._star_id_lower = np.char.lower(self.star_ids)
+        self._planet_mission = np.zeros(len(self.planet_ids), dtype=np.int8)
+        for code, prefix in MISSION_PREFIXES.items():
+            self._planet_mission[np.char.startswith(self._planet_id_lower, prefix)] = code
+        # códigos das facetas da busca, calculados dos valores originais (float64) como no SQL
+        self._planet_prob_bucket = bucket_codes(np.array(planets["probability"], dtype=np.float64)[order], PROBABILITY_EDGES)
+        self._planet_radius_class = bucket_codes(np.array(planets["radius_earth"], dtype=np.float64)[order], RADIUS_EDGES)
+        self._sort_cache: Dict[Tuple[str, bool], np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def n_stars(self) -> int:
+        return len(self.star_ids)
+
+    @property
+    def n_planets(self) -> int:
+        return len(self.planet_ids)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self.star_ids, self.mission_codes, self.planet_star, self.star_offsets, self.planet_ids,
+                  self.planet_names, self._planet_id_lower, self._planet_name_lower, self._star_id_lower,
+                  self._planet_mission, self._planet_prob_bucket, self._planet_radius_class,
+                  *self.star_columns.values(), *self.planet_columns.values()]
+        return int(sum(a.nbytes for a in arrays))
+
+    # ---------------- consultas ----------------
+
+    def star_order(self, column: str, descending: bool=False) -> np.ndarray:
+        """
+        Star rows sorted by a column in SQLite index order: ascending puts NULLs first and ties in
+        table order, descending is the exact reverse (NULLs last), as a backwards index scan returns.
+        """
+        key = (column, descending)
+        order = self._sort_cache.get(key)
+        if order is None:
+            values = self.star_columns[column]
+            order = np.argsort(np.where(np.isnan(values), -np.inf, values), kind="stable")
+            if descending:
+                order = order[::-1].copy()
+            with self._lock:
+                self._sort_cache[key] = order
+        return order
+
+    def star_page(self, offset: int, limit: int, mask: Optional[np.ndarray]=None,
+                  sort: Optional[str]=None, descending: bool=False) -> np.ndarray:
+        """Star rows of one page, optionally restricted by a boolean `mask` over the star rows."""
+        rows = self.star_order(sort, descending) if sort else np.arange(self.n_stars)
+        if mask is not None:
+            rows = rows[mask[rows]]
+        return rows[max(offset, 0):max(offset, 0) + limit]
+
+    def star_range_mask(self, column: str, low: Optional[float]=None, high: Optional[float]=None) -> np.ndarray:
+        values = self.star_columns[column]
+        mask = ~np.isnan(values)
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+        return mask
+
+    def text_matches(self, search: str) -> np.ndarray:
+        """Mask over planets whose id, name or star id contains `search` (case-insensitive)."""
+        needle = search.lower()
+        if not needle:
+            return np.ones(self.n_planets, dtype=bool)
+        star_hit = np.char.find(self._star_id_lower, needle) >= 0
+        return (np.char.find(self._planet_id_lower, needle) >= 0) | (np.char.find(self._planet_name_lower, needle) >= 0) | star_hit[self.planet_star]
+
+    def search_planets(self, search: str, mission: int=0, matches: Optional[np.ndarray]=None) -> np.ndarray:
+        """`text_matches` (or the given `matches`) restricted to one mission."""
+        mask = self.text_matches(search) if matches is None else matches.copy()
+        if mission:
+            mask &= self._planet_mission == mission
+        return mask
+
+    def search_star_rows(self, search: str, mission: int, offset: int, limit: int,
+                         matches: Optional[np.ndarray]=None) -> np.ndarray:
+        """
+        Same paging as the SQL search: `offset`/`limit` apply to matching planets in table order,
+        and the distinct stars of that page are returned in star (table) order.
+        """
+        hits = self.by_table_order[self.search_planets(search, mission, matches)[self.by_table_order]]
+        page = hits[max(offset, 0):max(offset, 0) + limit]
+        return np.unique(self.planet_star[page])
+
+    def search_facets(self, matches: np.ndarray, mission: int=0) -> Dict:
+        """Facet counts over the full `text_matches` set (see facets.facet_counts)."""
+        return facet_counts(self._planet_mission[matches], self._planet_prob_bucket[matches],
+                            self._planet_radius_class[matches], mission)
+
+    def planet_rows(self, star_row: int) -> np.ndarray:
+        return np.arange(self.star_offsets[star_row], self.star_offsets[star_row + 1])
+
+    # ---------------- materialização ----------------
+
+    def star_records(self, rows: np.ndarray) -> List[Dict]:
+        cols = {c: to_python(v[rows], STAR_SUMMARY_COLUMNS.get(c, float)) for c, v in self.star_columns.items()}
+        ids = self.star_ids[rows].tolist()
+        missions = [self.mission_values[c] for c in self.mission_codes[rows]]
+        return [dict({c: cols[c][i] for c in cols}, id=ids[i], missions=missions[i]) for i in range(len(ids))]
+
+    def planet_records(self, rows: np.ndarray) -> List[Dict]:
+        cols = {c: to_python(v[rows]) for c, v in self.planet_columns.items()}
+        ids = self.planet_ids[rows].tolist()
+        names = [None if null else name for name, null in zip(self.planet_names[rows].tolist(), self.planet_name_null[rows])]
+        return [dict({c: cols[c][i] for c in cols}, id=ids[i], name=names[i]) for i in range(len(ids))]
+
+# ============================================================
+# CARGA E RECARGA
+# ============================================================
+
+def load_columnar_catalog(conn, version=None) -> ColumnarCatalog:
+    """Read both tables in one transaction (consistent snapshot) through a SQLAlchemy connection."""
+    t0 = time.perf_counter()
+    star_cols = ["id", *STAR_FLOAT_COLUMNS, *STAR_SUMMARY_COLUMNS, "missions"]
+    planet_cols = ["id", "star_id", "name", *PLANET_FLOAT_COLUMNS]
+    with conn.begin():
+        star_rows = conn.exec_driver_sql(f"SELECT {', '.join(star_cols)} FROM stars ORDER BY rowid").fetchall()
+        planet_rows = conn.exec_driver_sql(f"SELECT {', '.join(planet_cols)} FROM exoplanets ORDER BY rowid").fetchall()
+    stars = dict(zip(star_cols, map(list, zip(*star_rows)))) if star_rows else {c: [] for c in star_cols}
+    planets = dict(zip(planet_cols, map(list, zip(*planet_rows)))) if planet_rows else {c: [] for c in planet_cols}
+    catalog = ColumnarCatalog(stars, planets, version=version)
+    logger.info(f"Columnar catalog: {catalog.n_stars} stars, {catalog.n_planets} planets, "
+                f"{catalog.nbytes / 2**20:.1f}MB in {time.perf_counter() - t0:.2f}s")
+    return catalog
+
+def data_version(db_file: str) -> Tuple:
+    """Changes whenever a commit touches the SQLite file (main database or its WAL)."""
+    stamp = []
+    for path in (db_file, f"{db_file}-wal"):
+        try:
+            st = os.stat(path)
+            stamp.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            stamp.append(None)
+    return tuple(stamp)
+
+class CatalogHandle:
+    """
+    Catalog loaded on first use and reloaded (whole snapshot) when the database changes: either a
+    new file published by database/snapshots.py or a commit to the current one.
+    """
+
+    def __init__(self, current_engine: Callable):
+        self.current_engine = current_engine
+        self._catalog: Optional[ColumnarCatalog] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> ColumnarCatalog:
+        engine = self.current_engine()
+        db_file = engine.url.database
+        version = (db_file, data_version(db_file))
+        if self._catalog is None or self._catalog.version != version:
+            with self._lock:
+                if self._catalog is None or self._catalog.version != version:
+                    with engine.connect() as conn:
+                        self._catalog = load_columnar_catalog(conn, version=version)
+        return self._catalog
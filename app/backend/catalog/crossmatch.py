@@ -0,0 +1,109 @@
+from __future__ import annotations
+from typing import Dict
+import numpy as np
+import pandas as pd
+
+from app.backend.ai.utils import get_logger
+
+logger = get_logger("crossmatch")
+
+# missão cujo id vira o id canônico quando a mesma estrela aparece em várias
+MISSION_PRIORITY: Dict[str, int] = {"koi": 0, "k2": 1, "toi": 2}
+DEFAULT_RADIUS_ARCSEC = 2.0
+
+def radec_to_xyz(ra_deg: np.ndarray, dec_deg: np.ndarray) -> np.ndarray:
+    ra, dec = np.deg2rad(ra_deg), np.deg2rad(dec_deg)
+    cos_dec = np.cos(dec)
+    return np.column_stack([cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec)])
+
+def normalize_catalog_id(values: pd.Series) -> pd.Series:
+    """'TIC 123', 123.0 and '123' all become '123'; empty/unparseable values become NaN."""
+    s = values.astype("string").str.extract(r"(\d+)", expand=False)
+    return s.str.lstrip("0").replace("", np.nan)
+
+class _UnionFind:
+    def __init__(self, n: int, missions: np.ndarray):
+        self.parent = np.arange(n)
+        # bitmask das missões presentes em cada componente
+        self.mask = (1 << missions).astype(np.int64)
+
+    def find(self, i: int) -> int:
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, a: int, b: int, allow_same_mission: bool) -> bool:
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return False
+        # duas estrelas distintas de um mesmo catálogo nunca são fundidas via posição
+        if not allow_same_mission and self.mask[ra] & self.mask[rb]:
+            return False
+        self.parent[rb] = ra
+        self.mask[ra] |= self.mask[rb]
+        return True
+
+def crossmatch(sources: pd.DataFrame, radius_arcsec: float=DEFAULT_RADIUS_ARCSEC) -> pd.DataFrame:
+    """
+    Link star records from several missions into one canonical id per physical star.
+
+    `sources` has one row per mission-local star: source_id, mission, ra, dec (degrees, nullable)
+    and tic_id (nullable). Records sharing a TIC id are linked first; the remaining ones are
+    matched by position with a KD-tree over unit vectors (`query_pairs`, O(n log n)), closest
+    pairs first and only across missions. Returns source_id, mission, canonical_id, method.
+    """
+    n = len(sources)
+    if n == 0:
+        return pd.DataFrame(columns=["source_id", "mission", "canonical_id", "method"])
+
+    src = sources.reset_index(drop=True)
+    missions = src["mission"].map(MISSION_PRIORITY).fillna(len(MISSION_PRIORITY)).to_numpy(dtype=np.int64)
+    uf = _UnionFind(n, missions)
+    method = np.array(["self"] * n, dtype=object)
+
+    # 1) ids de catálogo compartilhados (TIC)
+    if "tic_id" in src.columns:
+        tic = normalize_catalog_id(src["tic_id"])
+        for _, idx in tic.dropna().groupby(tic.dropna()).groups.items():
+            idx = np.asarray(idx)
+            if len(idx) < 2:
+                continue
+            for j in idx[1:]:
+                if uf.union(idx[0], j, allow_same_mission=True):
+                    method[idx[0]] = method[j] = "catalog_id"
+
+    # 2) posição: pares dentro do raio, do mais próximo ao mais distante
+    ra = pd.to_numeric(src["ra"], errors="coerce").to_numpy(dtype=float)
+    dec = pd.to_numeric(src["dec"], errors="coerce").to_numpy(dtype=float)
+    has_pos = np.flatnonzero(np.isfinite(ra) & np.isfinite(dec))
+    if len(has_pos) > 1:
+        xyz = radec_to_xyz(ra[has_pos], dec[has_pos])
+        chord = 2 * np.sin(np.deg2rad(radius_arcsec / 3600) / 2)
+        from scipy.spatial import cKDTree  # scipy já é dependência do scikit-learn
+        pairs = cKDTree(xyz).query_pairs(chord, output_type="ndarray")
+        if len(pairs):
+            a, b = has_pos[pairs[:, 0]], has_pos[pairs[:, 1]]
+            cross = missions[a] != missions[b]
+            a, b = a[cross], b[cross]
+            dist = np.linalg.norm(xyz[pairs[cross, 0]] - xyz[pairs[cross, 1]], axis=1)
+            for k in np.argsort(dist, kind="stable"):
+                if uf.union(a[k], b[k], allow_same_mission=False):
+                    if method[a[k]] == "self":
+                        method[a[k]] = "position"
+                    if method[b[k]] == "self":
+                        method[b[k]] = "position"
+
+    roots = np.array([uf.find(i) for i in range(n)])
+    out = pd.DataFrame({
+        "source_id": src["source_id"].astype(str).to_numpy(),
+        "mission": src["mission"].to_numpy(),
+        "root": roots, "priority": missions, "method": method,
+    })
+    # id canônico: membro da missão de maior prioridade (empate: menor id)
+    best = out.sort_values(["root", "priority", "source_id"]).drop_duplicates("root")
+    out["canonical_id"] = out["root"].map(dict(zip(best["root"], best["source_id"])))
+    n_linked = int((out["source_id"] != out["canonical_id"]).sum())
+    logger.info(f"Cross-match: {n} records -> {out['canonical_id'].nunique()} stars ({n_linked} linked)")
+    return out[["source_id", "mission", "canonical_id", "method"]]
@@ -0,0 +1,145 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+import threading
+
+import numpy as np
+
+DEFAULT_ECCENTRICITY = 0.0
+DEFAULT_INCLINATION_DEG = 90.0  # planetas em trânsito: órbita vista de perfil
+MAX_ECCENTRICITY = 0.99
+DEFAULT_PERIOD_DAYS = 365.25
+DEFAULT_CACHE_BYTES = 64 * 2**20  # por processo
+# listas `times` explícitas maiores que isto não viram chave de cache (a chave guardaria a lista inteira)
+MAX_KEYED_TIMES = 1024
+
+@dataclass(frozen=True)
+class OrbitalElements:
+    """
+    Elements of every planet of one system, as tuples so the whole set is hashable (cache key).
+    Angles in radians, semi-major axis in AU, period in days. The catalog stores no transit
+    epochs, so all planets share a reference epoch t=0 at mean anomaly 0.
+    """
+    planet_ids: Tuple[str, ...]
+    a_au: Tuple[float, ...]
+    period_days: Tuple[float, ...]
+    eccentricity: Tuple[float, ...]
+    inclination: Tuple[float, ...]
+
+def _finite_or(values: Sequence[Optional[float]], default: float) -> np.ndarray:
+    arr = np.array([np.nan if v is None else v for v in values], dtype=float)
+    return np.where(np.isfinite(arr), arr, default)
+
+def orbital_elements(planets: Sequence, star_mass_solar: Optional[float]=None) -> OrbitalElements:
+    """
+    Build elements from `Exoplanet`-like objects (orbital_period_days, semi_major_axis,
+    eccentricity, inclination_deg). Missing values fall back to circular, edge-on orbits;
+    a missing period or axis is derived from the other through Kepler's third law.
+    """
+    mass = star_mass_solar if star_mass_solar and np.isfinite(star_mass_solar) and star_mass_solar > 0 else 1.0
+    period = np.array([np.nan if p.orbital_period_days is None else p.orbital_period_days for p in planets], dtype=float)
+    a = np.array([np.nan if p.semi_major_axis is None else p.semi_major_axis for p in planets], dtype=float)
+
+    period = np.where(np.isfinite(period) & (period > 0), period, np.nan)
+    a = np.where(np.isfinite(a) & (a > 0), a, np.nan)
+    # a³ = M·P² (AU, anos, M☉)
+    a = np.where(np.isnan(a), np.cbrt(mass * (period / 365.25) ** 2), a)
+    period = np.where(np.isnan(period), 365.25 * np.sqrt(a ** 3 / mass), period)
+    period = np.where(np.isfinite(period), period, DEFAULT_PERIOD_DAYS)
+    a = np.where(np.isfinite(a), a, np.cbrt(mass * (period / 365.25) ** 2))
+
+    ecc = np.clip(_finite_or([p.eccentricity for p in planets], DEFAULT_ECCENTRICITY), 0.0, MAX_ECCENTRICITY)
+    inc = np.deg2rad(_finite_or([p.inclination_deg for p in planets], DEFAULT_INCLINATION_DEG))
+
+    return OrbitalElements(
+        planet_ids=tuple(str(p.id) for p in planets),
+        a_au=tuple(a.tolist()), period_days=tuple(period.tolist()),
+        eccentricity=tuple(ecc.tolist()), inclination=tuple(inc.tolist()),
+    )
+
+def solve_kepler(M: np.ndarray, e: np.ndarray, tol: float=1e-10, max_iter: int=30) -> np.ndarray:
+    """Eccentric anomaly E from E - e·sin(E) = M, Newton iterations over the whole array."""
+    M = np.mod(M, 2 * np.pi)
+    e = np.broadcast_to(e, M.shape)
+    # chute inicial robusto para excentricidades altas
+    E = np.where(e < 0.8, M + e * np.sin(M), np.pi)
+    for _ in range(max_iter):
+        f = E - e * np.sin(E) - M
+        dE = f / (1 - e * np.cos(E))
+        E -= dE
+        if dE.size == 0 or np.max(np.abs(dE)) < tol:
+            break
+    return E
+
+def positions(elements: OrbitalElements, times_days: np.ndarray) -> np.ndarray:
+    """
+    Cartesian positions (AU) with shape (len(times), n_planets, 3). The orbit plane is tilted by
+    the inclination around the x axis, so z is the line of sight for i=90°.
+    """
+    if not elements.planet_ids:
+        # estrela sem planetas: buffer vazio com a forma esperada
+        return np.empty((len(times_days), 0, 3), dtype=np.float32)
+    t = np.asarray(times_days, dtype=np.float64)[:, None]
+    a = np.asarray(elements.a_au)[None, :]
+    P = np.asarray(elements.period_days)[None, :]
+    e = np.asarray(elements.eccentricity)[None, :]
+    inc = np.asarray(elements.inclination)[None, :]
+
+    M = 2 * np.pi * t / P
+    E = solve_kepler(M, e)
+    x_orb = a * (np.cos(E) - e)
+    y_orb = a * np.sqrt(1 - e ** 2) * np.sin(E)
+
+    out = np.empty(M.shape + (3,), dtype=np.float32)
+    out[..., 0] = x_orb
+    out[..., 1] = y_orb * np.cos(inc)
+    out[..., 2] = y_orb * np.sin(inc)
+    return out
+
+def time_grid(start: float, end: float, steps: int) -> np.ndarray:
+    return np.linspace(start, end, steps, dtype=np.float64)
+
+class EphemerisCache:
+    """
+    Thread-safe LRU of encoded position buffers keyed by (elements, times), bounded by the total
+    size of the buffers. A buffer larger than `max_entry_bytes`, or one without a key
+    (`times_key=None`), is computed and returned without being stored.
+    """
+
+    def __init__(self, max_bytes: int=DEFAULT_CACHE_BYTES, max_entry_bytes: Optional[int]=None):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_bytes // 8 if max_entry_bytes is None else max_entry_bytes
+        self.nbytes = 0
+        self._data: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, elements: OrbitalElements, times_key: Optional[tuple], times: np.ndarray) -> bytes:
+        if times_key is None:
+            return positions(elements, times).tobytes()
+        key = (elements, times_key)
+        with self._lock:
+            buf = self._data.get(key)
+            if buf is not None:
+                self._data.move_to_end(key)
+                return buf
+        buf = positions(elements, times).tobytes()
+        if len(buf) > self.max_entry_bytes:
+            return buf
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.nbytes -= len(old)
+            self._data[key] = buf
+            self.nbytes += len(buf)
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self.nbytes -= len(evicted)
+        return buf
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
+
+cache = EphemerisCache()
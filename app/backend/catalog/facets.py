@@ -0,0 +1,47 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# códigos de missão de /stars/search?mission= (0 = id sem prefixo conhecido)
+MISSION_FACETS = {1: "koi", 2: "toi", 3: "k2"}
+PROBABILITY_EDGES = [0.25, 0.5, 0.75]
+PROBABILITY_LABELS = ["0-0.25", "0.25-0.5", "0.5-0.75", "0.75-1"]
+# Classes de tamanho (raio em R⊕), também usadas nos payloads de sistema
+SIZE_BUCKETS = [
+    (1.25, "earth"),
+    (2.0, "super_earth"),
+    (4.0, "sub_neptune"),
+    (6.0, "neptune"),
+    (15.0, "jupiter"),
+    (np.inf, "super_jupiter"),
+]
+RADIUS_EDGES = [b for b, _ in SIZE_BUCKETS[:-1]]
+RADIUS_LABELS = [n for _, n in SIZE_BUCKETS]
+UNKNOWN = "unknown"
+
+def bucket_codes(values: np.ndarray, edges: Sequence[float]) -> np.ndarray:
+    """Bucket `i` holds edges[i-1] <= v < edges[i]; NaN goes to the extra `unknown` code len(edges) + 1."""
+    values = np.asarray(values, dtype=np.float64)
+    codes = np.searchsorted(np.asarray(edges, dtype=np.float64), values, side="right")
+    return np.where(np.isnan(values), len(edges) + 1, codes).astype(np.int8)
+
+def _labelled(counts: np.ndarray, labels: List[str]) -> Dict[str, int]:
+    return {label: int(n) for label, n in zip([*labels, UNKNOWN], counts)}
+
+def facet_counts(mission: np.ndarray, probability: np.ndarray, radius: np.ndarray, mission_filter: int=0,
+                 weights: Optional[np.ndarray]=None) -> Dict:
+    """
+    Facets of a search from the codes of its matching planets (or of a grouped count, with
+    `weights`). Mission counts ignore the mission filter, so the other missions stay visible;
+    the remaining facets and `total` apply it.
+    """
+    weights = np.ones(len(mission), dtype=np.int64) if weights is None else np.asarray(weights, dtype=np.int64)
+    selected = weights if not mission_filter else np.where(mission == mission_filter, weights, 0)
+    per_mission = np.bincount(mission, weights=weights, minlength=len(MISSION_FACETS) + 1)
+    return {
+        "total": int(selected.sum()),
+        "missions": {name: int(per_mission[code]) for code, name in MISSION_FACETS.items()},
+        "probability": _labelled(np.bincount(probability, weights=selected, minlength=len(PROBABILITY_LABELS) + 1), PROBABILITY_LABELS),
+        "radius_class": _labelled(np.bincount(radius, weights=selected, minlength=len(RADIUS_LABELS) + 1), RADIUS_LABELS),
+    }
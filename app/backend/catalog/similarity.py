@@ -0,0 +1,160 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+import os
+import threading
+
+import numpy as np
+
+from app.backend.ai.utils import get_logger
+
+logger = get_logger("similarity")
+
+# colunas de planeta que o build_features não renomeia
+PLANET_RENAME = {
+    "koi_prad": "radius_earth",
+    "pl_rade": "radius_earth",
+    "koi_teq": "teq",
+    "pl_eqt": "teq",
+}
+
+# feature -> usar log10 (grandezas positivas com cauda longa)
+SIMILARITY_FEATURES: Dict[str, bool] = {
+    "radius_earth": True,
+    "teq": True,
+    "period": True,
+    "duration_hours": True,
+    "depth_frac": True,
+    "rprstar": True,
+    "a_over_rstar": True,
+    "st_teff": False,
+    "st_logg": False,
+    "st_met": False,
+    "st_rad": True,
+}
+
+def similarity_features(df_raw: pd.DataFrame, dataset: str) -> np.ndarray:
+    """
+    Physical + `build_features` columns shared by all missions, log-scaled where heavy-tailed.
+    Returns float32 (n_rows, n_features); missing or non-positive log inputs are NaN.
+    """
+    # só a ingestão precisa disto: a API apenas consulta o índice salvo
+    import pandas as pd
+    from app.backend.ai.data_utils import basic_clean
+    from app.backend.ai.feature_engineering import build_features
+    X, _ = build_features(basic_clean(df_raw, dataset=dataset), dataset=dataset)
+    for src, dst in PLANET_RENAME.items():
+        if src in X.columns and dst not in X.columns:
+            X = X.rename(columns={src: dst})
+
+    out = np.full((len(X), len(SIMILARITY_FEATURES)), np.nan, dtype=np.float32)
+    for j, (name, use_log) in enumerate(SIMILARITY_FEATURES.items()):
+        if name not in X.columns:
+            continue
+        v = pd.to_numeric(X[name], errors="coerce").to_numpy(dtype=float)
+        if use_log:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                v = np.where(v > 0, np.log10(v), np.nan)
+        out[:, j] = v
+    return out
+
+class SimilarityIndex:
+    """
+    KD-tree over robust z-scores (median / IQR) of `SIMILARITY_FEATURES`, one row per planet.
+
+    The persisted file keeps the unscaled feature rows, so ingesting a mission only computes
+    features for that mission's rows (`upsert`); scaling and the tree are rebuilt on load,
+    which takes a few milliseconds for the full catalog.
+    """
+
+    def __init__(self, ids: np.ndarray, features: np.ndarray):
+        self.ids = np.asarray(ids, dtype=str)
+        self.features = np.asarray(features, dtype=np.float32)
+        self._fit()
+
+    def _fit(self) -> None:
+        self.position = {pid: i for i, pid in enumerate(self.ids)}
+        if len(self.ids) == 0:
+            self.center = np.zeros(self.features.shape[1], dtype=np.float32)
+            self.scale = np.ones(self.features.shape[1], dtype=np.float32)
+            self.tree = None
+            return
+        with np.errstate(all="ignore"):
+            q25, med, q75 = np.nanpercentile(self.features, [25, 50, 75], axis=0)
+        iqr = (q75 - q25) / 1.349
+        self.center = np.nan_to_num(med).astype(np.float32)
+        self.scale = np.where(np.isfinite(iqr) & (iqr > 0), iqr, 1.0).astype(np.float32)
+        # feature ausente = mediana (0 após a normalização)
+        self.vectors = np.nan_to_num((self.features - self.center) / self.scale)
+        from scipy.spatial import cKDTree
+        self.tree = cKDTree(self.vectors)
+
+    @classmethod
+    def empty(cls) -> "SimilarityIndex":
+        return cls(np.array([], dtype=str), np.empty((0, len(SIMILARITY_FEATURES)), dtype=np.float32))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def upsert(self, ids: np.ndarray, features: np.ndarray, replace_prefix: Optional[str]=None) -> "SimilarityIndex":
+        """
+        New index with `ids` added or replaced; untouched rows are reused as they are. With
+        `replace_prefix`, every stored id with that prefix is dropped first, so planets that
+        left a re-ingested mission do not linger.
+        """
+        ids = np.asarray(ids, dtype=str)
+        keep = ~np.isin(self.ids, ids)
+        if replace_prefix:
+            keep &= ~np.char.startswith(self.ids, replace_prefix)
+        return SimilarityIndex(
+            np.concatenate([self.ids[keep], ids]),
+            np.concatenate([self.features[keep], np.asarray(features, dtype=np.float32)]),
+        )
+
+    def query(self, planet_id: str, k: int=10) -> Optional[List[Tuple[str, float]]]:
+        """The `k` nearest planets (excluding itself) with their distances, or None if unknown."""
+        i = self.position.get(planet_id)
+        if i is None or self.tree is None:
+            return None
+        k_eff = min(k + 1, len(self.ids))
+        dist, idx = self.tree.query(self.vectors[i], k=k_eff)
+        dist, idx = np.atleast_1d(dist), np.atleast_1d(idx)
+        return [(str(self.ids[j]), float(d)) for d, j in zip(dist, idx) if j != i][:k]
+
+    def save(self, path: str) -> None:
+        # grava em arquivo temporário e renomeia: leitores nunca veem um índice parcial
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, ids=self.ids, features=self.features, columns=np.array(list(SIMILARITY_FEATURES)))
+        os.replace(tmp, path)
+        logger.info(f"Saved similarity index with {len(self.ids)} planets to {path}")
+
+    @classmethod
+    def load(cls, path: str) -> "SimilarityIndex":
+        if not os.path.exists(path):
+            return cls.empty()
+        with np.load(path) as data:
+            if list(data["columns"]) != list(SIMILARITY_FEATURES):
+                logger.warning(f"Similarity index {path} was built with other features; ignoring it")
+                return cls.empty()
+            return cls(data["ids"], data["features"])
+
+class IndexFile:
+    """Index loaded from disk on first use and reloaded whenever the file is replaced."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._index: Optional[SimilarityIndex] = None
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> SimilarityIndex:
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            mtime = None
+        if self._index is None or mtime != self._mtime:
+            with self._lock:
+                if self._index is None or mtime != self._mtime:
+                    self._index = SimilarityIndex.load(self.path)
+                    self._mtime = mtime
+        return self._index
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from app.backend.ai.utils import get_logger
+
+logger = get_logger("star_summaries")
+
+SUMMARY_COLUMNS = ["planet_count", "max_probability", "hz_candidate_count", "has_koi", "has_toi", "has_k2"]
+MISSION_FLAGS = {"koi": "has_koi", "toi": "has_toi", "k2": "has_k2"}
+
+# Candidato na zona habitável: provável planeta, temperada e de tamanho até super-Terra
+HZ_TEQ_RANGE = (180.0, 310.0)   # K, temperatura de equilíbrio
+HZ_MAX_RADIUS = 2.0             # R⊕ (limite "super_earth" das classes de tamanho)
+CANDIDATE_MIN_PROBABILITY = 0.5
+
+def hz_candidates(planets: pd.DataFrame) -> np.ndarray:
+    teq = pd.to_numeric(planets["equilibrium_tempk"], errors="coerce").to_numpy(dtype=float)
+    radius = pd.to_numeric(planets["radius_earth"], errors="coerce").to_numpy(dtype=float)
+    prob = pd.to_numeric(planets["probability"], errors="coerce").to_numpy(dtype=float)
+    with np.errstate(invalid="ignore"):
+        return (teq >= HZ_TEQ_RANGE[0]) & (teq <= HZ_TEQ_RANGE[1]) & (radius <= HZ_MAX_RADIUS) & (prob >= CANDIDATE_MIN_PROBABILITY)
+
+def star_summaries(stars: pd.DataFrame, planets: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per star (`stars["id"]`) with `SUMMARY_COLUMNS`: planet count, highest candidate
+    probability (None without scored planets), habitable-zone candidate count and one flag
+    per mission from `stars["missions"]`.
+    """
+    p = pd.DataFrame({
+        "star_id": planets["star_id"].astype(str),
+        "probability": pd.to_numeric(planets["probability"], errors="coerce"),
+        "hz": hz_candidates(planets),
+    })
+    g = p.groupby("star_id", sort=False)
+    agg = pd.DataFrame({
+        "planet_count": g.size(),
+        "max_probability": g["probability"].max(),
+        "hz_candidate_count": g["hz"].sum(),
+    })
+
+    out = pd.DataFrame({"id": stars["id"].astype(str)})
+    out = out.join(agg, on="id")
+    out["planet_count"] = out["planet_count"].fillna(0).astype(int)
+    out["hz_candidate_count"] = out["hz_candidate_count"].fillna(0).astype(int)
+    missions = stars["missions"].fillna("").astype(str).str.split(",")
+    for mission, col in MISSION_FLAGS.items():
+        out[col] = missions.apply(lambda m: mission in m).to_numpy()
+    logger.info(f"Summaries for {len(out)} stars ({int((out['hz_candidate_count'] > 0).sum())} with habitable-zone candidates)")
+    return out
@@ -0,0 +1,185 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+
+import pandas as pd
+
+from app.backend.ai.utils import get_logger
+
+logger = get_logger("static_shards")
+
+SHARD_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+DEFAULT_MAX_SHARD_STARS = 1000
+
+# prefixo do id da estrela -> missão (o mais longo primeiro: "EPIC" antes de um eventual "E")
+MISSION_ID_PREFIXES = {"k2": "EPIC", "koi": "K", "toi": "T"}
+OTHER_MISSION = "other"
+
+# campos de StarsPaginedResponse / ExoplanetByStellarResponse (contrato da API); os planetas levam
+# também koi_score, que o schema da API não expõe
+STAR_FIELDS = [
+    "id", "mass_solar", "radius_solar", "effective_tempk", "metallicity_feh", "age_gyr", "missions",
+    "planet_count", "max_probability", "hz_candidate_count",
+]
+PLANET_FIELDS = [
+    "id", "name", "probability", "koi_score", "radius_earth", "equilibrium_tempk", "orbital_period_days",
+    "semi_major_axis", "eccentricity", "inclination_deg",
+]
+
+def _brotli():
+    # opcional: `pip install brotli`; sem ele só as variantes gzip são geradas
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+def encodings() -> List[str]:
+    """Content-Encodings written next to every shard (plus the identity file)."""
+    return ["br", "gzip"] if _brotli() is not None else ["gzip"]
+
+def compress(data: bytes, encoding: str) -> bytes:
+    # nível máximo: a compressão é paga uma vez por ingestão, não por requisição; mtime=0 -> bytes estáveis
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == "br":
+        return _brotli().compress(data, quality=11)
+    raise ValueError(f"Unknown encoding: {encoding}")
+
+def star_mission(star_id: str) -> str:
+    for mission, prefix in MISSION_ID_PREFIXES.items():
+        if star_id.startswith(prefix):
+            return mission
+    return OTHER_MISSION
+
+def prefix_length(ids: pd.Series, start: int, max_stars: int) -> int:
+    """Shortest id prefix (at least `start` characters) that keeps every shard within `max_stars` stars."""
+    longest = int(ids.str.len().max()) if len(ids) else start
+    k = start
+    while k < longest and ids.str[:k].value_counts().max() > max_stars:
+        k += 1
+    return k
+
+def _records(df: pd.DataFrame, fields: List[str]) -> List[Dict]:
+    # NaN/NULL -> None (null no JSON)
+    return df[fields].astype(object).where(df[fields].notna(), None).to_dict("records")
+
+def build_shards(stars: pd.DataFrame, planets: pd.DataFrame,
+                 max_stars: int = DEFAULT_MAX_SHARD_STARS) -> Tuple[Dict[Tuple[str, str], Dict], Dict[str, int]]:
+    """
+    Group the catalog into static shards: systems (star + its planets, as the frontend's
+    PlanetarySystem) split by mission and then by star id prefix, sorted by star id.
+    Returns ({(mission, prefix): payload}, {mission: prefix length}).
+    """
+    stars = stars.assign(id=stars["id"].astype(str)).sort_values("id", kind="stable")
+    planets = planets.assign(star_id=planets["star_id"].astype(str))
+    planets_by_star: Dict[str, List[Dict]] = {}
+    for record, star_id in zip(_records(planets, PLANET_FIELDS), planets["star_id"].tolist()):
+        planets_by_star.setdefault(star_id, []).append(record)
+
+    mission = stars["id"].map(star_mission)
+    shards: Dict[Tuple[str, str], Dict] = {}
+    lengths: Dict[str, int] = {}
+    for name, group in stars.groupby(mission, sort=True):
+        start = len(MISSION_ID_PREFIXES.get(name, "")) + 1
+        k = lengths[name] = prefix_length(group["id"], start, max_stars)
+        for prefix, part in group.groupby(group["id"].str[:k], sort=True):
+            systems = []
+            for star in _records(part, STAR_FIELDS):
+                star_planets = planets_by_star.get(star["id"], [])
+                systems.append({"id": star["id"], "star": star, "planets": star_planets})
+            shards[(name, prefix)] = {"v": SHARD_VERSION, "mission": name, "prefix": prefix, "systems": systems}
+    return shards, lengths
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def shard_files(manifest: Optional[Dict]) -> List[str]:
+    """Paths (relative to the catalog folder) of every file a manifest refers to."""
+    if not manifest:
+        return []
+    files = []
+    for mission in manifest["missions"].values():
+        for shard in mission["shards"].values():
+            files.append(shard["path"])
+            files.extend(shard["encodings"].values())
+    return files
+
+def read_manifest(folder: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(folder, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def write_static_catalog(folder: str, shards: Dict[Tuple[str, str], Dict], lengths: Dict[str, int]) -> Dict:
+    """
+    Write every shard (JSON + compressed variants) under a content-hashed name, then the manifest.
+
+    Unchanged shards keep their file names, so clients keep their cached copies across ingestions.
+    The manifest is replaced atomically after the shards exist; files referenced only by the
+    previous manifest are kept (clients may still hold it) and older ones are removed.
+    """
+    previous = read_manifest(folder)
+    encs = encodings()
+    if "br" not in encs:
+        logger.warning("brotli is not installed (see requirements.txt): writing gzip variants only")
+    missions: Dict[str, Dict] = {}
+    for (mission, prefix), payload in shards.items():
+        data = json.dumps(payload, separators=(",", ":"), ensure_ascii=False, allow_nan=False).encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()[:16]
+        safe = re.sub(r"[^A-Za-z0-9_-]", "_", prefix)
+        rel = f"{mission}/{safe}.{digest}.json"
+        os.makedirs(os.path.join(folder, mission), exist_ok=True)
+        sizes = {"identity": len(data)}
+        variants = {}
+        for enc in encs:
+            variant = f"{rel}.{'br' if enc == 'br' else 'gz'}"
+            path = os.path.join(folder, variant)
+            if not os.path.exists(path):
+                _write_atomic(path, compress(data, enc))
+            variants[enc] = variant
+            sizes[enc] = os.path.getsize(path)
+        if not os.path.exists(os.path.join(folder, rel)):
+            _write_atomic(os.path.join(folder, rel), data)
+
+        entry = missions.setdefault(mission, {"prefix_length": lengths[mission], "stars": 0, "planets": 0, "shards": {}})
+        n_planets = sum(len(s["planets"]) for s in payload["systems"])
+        entry["stars"] += len(payload["systems"])
+        entry["planets"] += n_planets
+        entry["shards"][prefix] = {
+            "path": rel, "etag": digest, "encodings": variants, "bytes": sizes,
+            "stars": len(payload["systems"]), "planets": n_planets,
+            "first": payload["systems"][0]["id"], "last": payload["systems"][-1]["id"],
+        }
+
+    manifest = {
+        "v": SHARD_VERSION,
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "mission_id_prefixes": MISSION_ID_PREFIXES,
+        "missions": missions,
+    }
+    _write_atomic(os.path.join(folder, MANIFEST_NAME), json.dumps(manifest, indent=1).encode("utf-8"))
+
+    keep = set(shard_files(manifest)) | set(shard_files(previous))
+    removed = 0
+    for mission in os.listdir(folder):
+        sub = os.path.join(folder, mission)
+        if not os.path.isdir(sub):
+            continue
+        for name in os.listdir(sub):
+            if f"{mission}/{name}" not in keep:
+                os.remove(os.path.join(sub, name))
+                removed += 1
+    total = {enc: sum(s["bytes"][enc] for m in missions.values() for s in m["shards"].values()) for enc in ["identity", *encs]}
+    logger.info(f"Static catalog: {len(shards)} shards, bytes {total}, {removed} stale files removed")
+    return manifest
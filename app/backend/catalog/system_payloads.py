@@ -0,0 +1,132 @@
+from __future__ import annotations
+from typing import Dict, List
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+from app.backend.ai.utils import get_logger
+from app.backend.catalog.facets import SIZE_BUCKETS
+
+logger = get_logger("system_payloads")
+
+PAYLOAD_VERSION = 1
+
+# Mesmas faixas de escala usadas pelo PlanetCanvas no frontend
+ORBIT_RANGE = (1.2, 6.5)
+PLANET_RADIUS_RANGE = (0.08, 0.35)
+
+def _scale_per_group(values: pd.Series, groups: pd.Series, lo: float, hi: float) -> np.ndarray:
+    """Min-max scaling inside each system; nulls and single-valued systems go to the midpoint."""
+    g = values.groupby(groups)
+    vmin = g.transform("min").to_numpy(dtype=float)
+    vmax = g.transform("max").to_numpy(dtype=float)
+    v = values.to_numpy(dtype=float)
+    span = vmax - vmin
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = (v - vmin) / span
+    out = lo + t * (hi - lo)
+    return np.where(np.isfinite(out) & (span > 0), out, (lo + hi) / 2)
+
+def semi_major_axis_au(a_au: np.ndarray, period_days: np.ndarray, mass_solar: np.ndarray) -> np.ndarray:
+    """Fill missing semi-major axes from Kepler's third law (a³ = M·P², AU / years / M☉)."""
+    mass = np.where(np.isfinite(mass_solar) & (mass_solar > 0), mass_solar, 1.0)
+    derived = np.cbrt(mass * (period_days / 365.25) ** 2)
+    return np.where(np.isfinite(a_au), a_au, derived)
+
+def angular_speed(period_days: np.ndarray, a_au: np.ndarray) -> np.ndarray:
+    # rad/dia; fallback igual ao do frontend quando não há período
+    fallback = 2 * np.pi / (10 + np.where(np.isfinite(a_au), a_au, 1.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        omega = 2 * np.pi / period_days
+    return np.where(np.isfinite(period_days) & (period_days > 0), omega, fallback)
+
+def size_class(radius_earth: np.ndarray) -> np.ndarray:
+    bounds = np.array([b for b, _ in SIZE_BUCKETS])
+    names = np.array([n for _, n in SIZE_BUCKETS] + ["unknown"], dtype=object)
+    idx = np.searchsorted(bounds, radius_earth, side="right")
+    idx = np.where(np.isfinite(radius_earth), idx, len(SIZE_BUCKETS))
+    return names[idx]
+
+def _to_hex(rgb: np.ndarray) -> np.ndarray:
+    rgb = np.clip(np.rint(rgb), 0, 255).astype(np.int64)
+    packed = (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+    return np.array([f"#{v:06x}" for v in packed], dtype=object)
+
+def star_color(teff_k: np.ndarray, default: str = "#ffeb3b") -> np.ndarray:
+    """Approximate blackbody colour (Tanner Helland fit) for effective temperatures in K."""
+    t = np.clip(np.where(np.isfinite(teff_k), teff_k, 5778.0), 1000, 40000) / 100
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = np.where(t <= 66, 255, 329.698727446 * (t - 60) ** -0.1332047592)
+        g = np.where(t <= 66, 99.4708025861 * np.log(t) - 161.1195681661, 288.1221695283 * (t - 60) ** -0.0755148492)
+        b = np.where(t >= 66, 255, np.where(t <= 19, 0, 138.5177312231 * np.log(np.maximum(t - 10, 1e-9)) - 305.0447927307))
+    colors = _to_hex(np.stack([r, g, b], axis=1))
+    return np.where(np.isfinite(teff_k), colors, default)
+
+def planet_color(teq_k: np.ndarray, default: str = "#9aa4ad") -> np.ndarray:
+    # frio→azul, quente→vermelho (mesma rampa do frontend)
+    cold = np.array([0x6e, 0xa8, 0xff], dtype=float)
+    hot = np.array([0xff, 0x6b, 0x6b], dtype=float)
+    t = np.clip((np.where(np.isfinite(teq_k), teq_k, 0.0) - 200) / 1800, 0, 1)[:, None]
+    colors = _to_hex(cold + (hot - cold) * t)
+    return np.where(np.isfinite(teq_k), colors, default)
+
+def _num(df: pd.DataFrame, col: str) -> np.ndarray:
+    return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+
+def _clean(v):
+    if v is None:
+        return None
+    if isinstance(v, (float, np.floating)):
+        return None if not np.isfinite(v) else round(float(v), 4)
+    if isinstance(v, np.integer):
+        return int(v)
+    return v
+
+def build_system_payloads(stars: pd.DataFrame, planets: pd.DataFrame) -> Dict[str, str]:
+    """
+    Render payload (compact JSON string) per star: scaled orbit radii, angular speeds,
+    star colour from `effective_tempk` and planet size buckets, all computed column-wise.
+    """
+    stars = stars.set_index("id", drop=False)
+    planets = planets[planets["star_id"].astype(str).isin(stars.index)].copy()
+    planets["star_id"] = planets["star_id"].astype(str)
+    planets.sort_values(["star_id", "orbital_period_days"], inplace=True, na_position="last")
+
+    host_mass = stars["mass_solar"].reindex(planets["star_id"]).to_numpy(dtype=float)
+    period = _num(planets, "orbital_period_days")
+    a_au = semi_major_axis_au(_num(planets, "semi_major_axis"), period, host_mass)
+    radius = _num(planets, "radius_earth")
+
+    planets["a_au"] = a_au
+    planets["orbit_radius"] = _scale_per_group(pd.Series(a_au, index=planets.index), planets["star_id"], *ORBIT_RANGE)
+    planets["planet_radius"] = _scale_per_group(pd.Series(radius, index=planets.index), planets["star_id"], *PLANET_RADIUS_RANGE)
+    planets["omega"] = angular_speed(period, a_au)
+    planets["size_class"] = size_class(radius)
+    planets["color"] = planet_color(_num(planets, "equilibrium_tempk"))
+
+    star_colors = dict(zip(stars.index, star_color(_num(stars, "effective_tempk"))))
+
+    planet_cols = [
+        "id", "name", "probability", "radius_earth", "equilibrium_tempk", "orbital_period_days",
+        "eccentricity", "inclination_deg", "a_au", "orbit_radius", "planet_radius", "omega", "size_class", "color",
+    ]
+    star_cols = ["id", "mass_solar", "radius_solar", "effective_tempk", "metallicity_feh", "age_gyr"]
+
+    by_star: Dict[str, List[dict]] = {}
+    star_ids = planets["star_id"].to_numpy()
+    for sid, rec in zip(star_ids, planets[planet_cols].itertuples(index=False, name=None)):
+        by_star.setdefault(sid, []).append({k: _clean(v) for k, v in zip(planet_cols, rec)})
+
+    payloads: Dict[str, str] = {}
+    for rec in stars[star_cols].itertuples(index=False, name=None):
+        star = {k: _clean(v) for k, v in zip(star_cols, rec)}
+        star["color"] = star_colors[star["id"]]
+        body = {"v": PAYLOAD_VERSION, "star": star, "planets": by_star.get(star["id"], [])}
+        payloads[star["id"]] = json.dumps(body, separators=(",", ":"), ensure_ascii=False)
+    logger.info(f"Built render payloads for {len(payloads)} systems ({len(planets)} planets)")
+    return payloads
+
+def payload_etag(payload: str) -> str:
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
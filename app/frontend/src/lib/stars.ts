@@ -150,3 +150,107 @@ export function fetchStars({
     ? searchStars(search, page, { signal, timeoutMs })
     : getStars(page, { signal, timeoutMs });
 }
+
+// ===== Payload de renderização (pré-calculado na ingestão) =====
+export type SystemRenderPlanet = {
+  id: string;
+  name: string | null;
+  probability: number | null;
+  radius_earth: number | null;
+  equilibrium_tempk: number | null;
+  orbital_period_days: number | null;
+  eccentricity: number | null;
+  inclination_deg: number | null;
+  a_au: number | null;
+  orbit_radius: number; // já escalado para o canvas (1.2..6.5)
+  planet_radius: number; // já escalado para o canvas (0.08..0.35)
+  omega: number; // rad/dia virtual
+  size_class: string;
+  color: string;
+};
+
+export type SystemRenderPayload = {
+  v: number;
+  star: Omit<Star, "planets"> & { color: string };
+  planets: SystemRenderPlanet[];
+};
+
+/**
+ * Sistema pronto para o PlanetCanvas (uma única requisição, cacheável via ETag).
+ * @param starId id da estrela
+ */
+export function getSystem(starId: string | number, opts?: FetchOpts): Promise<SystemRenderPayload> {
+  return fetchJSON<SystemRenderPayload>(`/stars/${encodeURIComponent(String(starId))}/system`, opts);
+}
+
+// ===== Efemérides (posições orbitais calculadas no backend) =====
+export type Ephemeris = {
+  planetIds: string[];
+  steps: number;
+  /** Float32Array com shape [steps, planetIds.length, 3] (AU) */
+  positions: Float32Array;
+};
+
+/**
+ * Posições de todos os planetas do sistema entre `start` e `end` (dias, época de referência t=0).
+ */
+export async function getEphemeris(
+  starId: string | number,
+  { start = 0, end = 365.25, steps = 365, signal }: { start?: number; end?: number; steps?: number; signal?: AbortSignal } = {}
+): Promise<Ephemeris> {
+  const url = joinUrl(API_BASE, `/stars/${encodeURIComponent(String(starId))}/ephemeris?start=${start}&end=${end}&steps=${steps}`);
+  const res = await fetch(url, { signal });
+  if (!res.ok) throw new ApiError(`Falha na API (${res.status}) em ${url}`, res.status);
+  const [nSteps] = (res.headers.get("X-Ephemeris-Shape") ?? "0,0,3").split(",").map(Number);
+  const ids = res.headers.get("X-Planet-Ids");
+  return {
+    planetIds: ids ? ids.split(",") : [],
+    steps: nSteps,
+    positions: new Float32Array(await res.arrayBuffer()),
+  };
+}
+
+// ===== Catálogo estático (shards pré-agrupados e pré-comprimidos gerados na ingestão) =====
+export type CatalogShardInfo = {
+  path: string; // relativo a /catalog, ex.: "koi/K0007.<hash>.json"
+  etag: string;
+  stars: number;
+  planets: number;
+  first: string;
+  last: string;
+};
+
+export type CatalogManifest = {
+  v: number;
+  generated_at: string;
+  mission_id_prefixes: Record<string, string>;
+  missions: Record<string, { prefix_length: number; stars: number; planets: number; shards: Record<string, CatalogShardInfo> }>;
+};
+
+export type CatalogShard = {
+  v: number;
+  mission: string;
+  prefix: string;
+  systems: { id: string; star: Omit<Star, "planets">; planets: Planet[] }[];
+};
+
+/** Manifesto dos shards (revalidado a cada carga via ETag). */
+export function getCatalogManifest(opts?: FetchOpts): Promise<CatalogManifest> {
+  return fetchJSON<CatalogManifest>("/catalog/manifest.json", opts);
+}
+
+/** Um shard do catálogo; o navegador descomprime (gzip/br) e o guarda em cache (nome muda com o conteúdo). */
+export async function getCatalogShard(shard: CatalogShardInfo, { signal }: { signal?: AbortSignal } = {}): Promise<CatalogShard> {
+  const url = joinUrl(API_BASE, `/catalog/${shard.path}`);
+  const res = await fetch(url, { signal });
+  if (!res.ok) throw new ApiError(`Falha na API (${res.status}) em ${url}`, res.status);
+  return (await res.json()) as CatalogShard;
+}
+
+/** Shard que contém a estrela `starId` (missão pelo prefixo do id, shard pelos primeiros `prefix_length` caracteres). */
+export function findCatalogShard(manifest: CatalogManifest, starId: string): CatalogShardInfo | undefined {
+  const mission =
+    Object.entries(manifest.mission_id_prefixes).find(([, prefix]) => starId.startsWith(prefix))?.[0] ?? "other";
+  const entry = manifest.missions[mission];
+  return entry?.shards[starId.slice(0, entry.prefix_length)];
+}
@@ -1,25 +1,142 @@
-from sqlalchemy import create_engine
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from settings import settings
 
-SQLITE_URL = settings.database.path
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+Base = declarative_base()
 
-engine = create_engine(
-  SQLITE_URL,
-  connect_args={ "check_same_thread": False }
-)
+# ============================================================
+# ARQUIVO ATUAL (ponteiro publicado por database/snapshots.py)
+# ============================================================
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
+# chamados com cada engine de leitura novo (ex.: instrumentação da API)
+engine_hooks: List[Callable[[Engine], None]] = []
+
+_engines: Dict[str, Engine] = {}
+_current: Optional[Tuple] = None  # (versão do ponteiro, arquivo)
+_lock = threading.Lock()
+
+def read_pointer() -> Optional[str]:
+  """Snapshot file named by the pointer file, or None before the first snapshot is published."""
+  try:
+    with open(settings.database.pointer_path, "r", encoding="utf-8") as f:
+      name = f.read().strip()
+  except FileNotFoundError:
+    return None
+  return os.path.join(settings.database.folder, name) if name else None
+
+def database_file() -> str:
+  """Database the readers use: the published snapshot, or `database.filename` when there is none."""
+  global _current
+  # o ponteiro só é trocado por os.replace: (inode, mtime) identifica a versão sem reler o arquivo
+  try:
+    st = os.stat(settings.database.pointer_path)
+    stamp = (st.st_ino, st.st_mtime_ns)
+  except FileNotFoundError:
+    stamp = None
+  current = _current
+  if current is None or current[0] != stamp:
+    current = _current = (stamp, read_pointer() or settings.database.file_path)
+  return current[1]
+
+def create_sqlite_engine(db_file: str) -> Engine:
+  return create_engine(f"sqlite:///{db_file}", connect_args={ "check_same_thread": False })
+
+def current_engine() -> Engine:
+  """Engine of the current database file; switches (and retires the old one) when a snapshot is published."""
+  db_file = database_file()
+  engine = _engines.get(db_file)
+  if engine is None:
+    with _lock:
+      engine = _engines.get(db_file)
+      if engine is None:
+        engine = create_sqlite_engine(db_file)
+        for hook in engine_hooks:
+          hook(engine)
+        # conexões ociosas do snapshot anterior são fechadas agora; as em uso, quando devolvidas ao pool
+        for old in _engines.values():
+          old.dispose()
+        _engines.clear()
+        _engines[db_file] = engine
+  return engine
+
+def dispose_engines(close: bool = True) -> None:
+  for engine in list(_engines.values()):
+    engine.dispose(close=close)
+
+def __getattr__(name: str):
+  # `from database.database import engine` continua funcionando (engine do arquivo atual)
+  if name == "engine":
+    return current_engine()
+  raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# ============================================================
+# SESSÕES E ESQUEMA
+# ============================================================
 
 def get_db():
-  db = SessionLocal()
+  # o engine é escolhido no início do request: um snapshot publicado durante ele vale a partir do próximo
+  db = SessionLocal(bind=current_engine())
   try:
     yield db
   finally:
     db.close()
-    
-def init_db():
+
+def _import_models():
   import database.models.star
   import database.models.exoplanet
-  Base.metadata.create_all(bind=engine)
\ No newline at end of file
+  import database.models.system_payload
+  import database.models.star_alias
+  import database.models.explanation
+
+def init_db(engine: Optional[Engine] = None):
+  # só em database/snapshots.new_snapshot: a API nunca altera o esquema do arquivo que está lendo
+  _import_models()
+  engine = engine or current_engine()
+  Base.metadata.create_all(bind=engine)
+  add_missing_columns(engine)
+
+def missing_schema(engine: Optional[Engine] = None) -> List[str]:
+  """Tables and columns of the models that the database lacks (only reads the catalog)."""
+  _import_models()
+  insp = inspect(engine or current_engine())
+  missing = []
+  for table in Base.metadata.sorted_tables:
+    if not insp.has_table(table.name):
+      missing.append(table.name)
+      continue
+    existing = {c["name"] for c in insp.get_columns(table.name)}
+    missing.extend(f"{table.name}.{col.name}" for col in table.columns if col.name not in existing)
+  return missing
+
+def check_schema():
+  """Fail fast when the database the API would read is absent or older than the models."""
+  db_file = database_file()
+  if not os.path.exists(db_file):
+    raise RuntimeError(f"Database {db_file} not found: run `python -m scripts.load_data` first")
+  missing = missing_schema()
+  if missing:
+    raise RuntimeError(
+      f"Database {db_file} is missing {', '.join(missing)}: "
+      "run `python -m scripts.migrate_db` (or any ingestion) to publish a migrated snapshot"
+    )
+
+def add_missing_columns(engine: Optional[Engine] = None):
+  # create_all não altera tabelas existentes: adiciona colunas (anuláveis) e índices novos
+  engine = engine or current_engine()
+  insp = inspect(engine)
+  with engine.begin() as conn:
+    for table in Base.metadata.sorted_tables:
+      if not insp.has_table(table.name):
+        continue
+      existing = {c["name"] for c in insp.get_columns(table.name)}
+      for col in table.columns:
+        if col.name not in existing and col.nullable:
+          col_type = col.type.compile(dialect=engine.dialect)
+          conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{col.name}" {col_type}'))
+      for index in table.indexes:
+        index.create(bind=conn, checkfirst=True)
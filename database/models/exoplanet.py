@@ -1,11 +1,13 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, func, Float
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, func, Float
 from database.database import Base
 
 class Exoplanet(Base):
   __tablename__ = "exoplanets"
 
   id = Column(String, primary_key=True, unique=True)
-  star_id = Column(Integer, ForeignKey("stars.id"), nullable=False)
+  star_id = Column(Integer, ForeignKey("stars.id"), nullable=False, index=True)
+  # estrela como publicada pela missão (star_aliases.source_id); star_id aponta para a canônica
+  source_star_id = Column(String, nullable=True, index=True)
   koi_score = Column(Float, nullable=True)
   name = Column(String, nullable=True)
   probability = Column(Float, nullable=True)
@@ -14,4 +16,11 @@ class Exoplanet(Base):
   orbital_period_days = Column(Float, nullable=True)
   semi_major_axis = Column(Float, nullable=True)
   eccentricity = Column(Float, nullable=True)
-  inclination_deg = Column(Float, nullable=True)
\ No newline at end of file
+  inclination_deg = Column(Float, nullable=True)
+  model_version = Column(String, nullable=True, index=True)
+  # códigos das facetas da busca (app/backend/catalog/facets.py), recalculados na ingestão
+  mission_code = Column(Integer, nullable=True)
+  probability_bucket = Column(Integer, nullable=True)
+  radius_class = Column(Integer, nullable=True)
+
+  __table_args__ = (Index("ix_exoplanets_facets", "mission_code", "probability_bucket", "radius_class"),)
\ No newline at end of file
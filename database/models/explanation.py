@@ -0,0 +1,10 @@
+from sqlalchemy import Column, ForeignKey, String, Text
+from database.database import Base
+
+class ExoplanetExplanation(Base):
+  __tablename__ = "exoplanet_explanations"
+
+  exoplanet_id = Column(String, ForeignKey("exoplanets.id"), primary_key=True)
+  model_version = Column(String, nullable=True, index=True)
+  etag = Column(String, nullable=False)
+  payload = Column(Text, nullable=False)
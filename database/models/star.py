@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Boolean, Column, Integer, String, Float
 from database.database import Base
 
 
@@ -11,3 +11,14 @@ class Stars(Base):
     radius_solar = Column(Float)
     metallicity_feh = Column(Float)
     age_gyr = Column(Float)
+    ra = Column(Float)
+    dec = Column(Float)
+    missions = Column(String)
+
+    # resumo do sistema, recalculado na ingestão (scripts/build_star_summaries.py)
+    planet_count = Column(Integer, nullable=True, index=True)
+    max_probability = Column(Float, nullable=True, index=True)
+    hz_candidate_count = Column(Integer, nullable=True, index=True)
+    has_koi = Column(Boolean, nullable=True)
+    has_toi = Column(Boolean, nullable=True)
+    has_k2 = Column(Boolean, nullable=True)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Float, String
+from database.database import Base
+
+class StarAlias(Base):
+  """Star record as published by one mission (with its stellar fields), linked to the canonical `stars.id`."""
+  __tablename__ = "star_aliases"
+
+  source_id = Column(String, primary_key=True)
+  mission = Column(String, nullable=False)
+  ra = Column(Float, nullable=True)
+  dec = Column(Float, nullable=True)
+  tic_id = Column(String, nullable=True)
+  effective_tempk = Column(Float, nullable=True)
+  mass_solar = Column(Float, nullable=True)
+  radius_solar = Column(Float, nullable=True)
+  metallicity_feh = Column(Float, nullable=True)
+  age_gyr = Column(Float, nullable=True)
+  canonical_id = Column(String, nullable=True, index=True)
+  method = Column(String, nullable=True)
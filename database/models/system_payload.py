@@ -0,0 +1,9 @@
+from sqlalchemy import Column, ForeignKey, String, Text
+from database.database import Base
+
+class SystemPayload(Base):
+  __tablename__ = "system_payloads"
+
+  star_id = Column(String, ForeignKey("stars.id"), primary_key=True)
+  etag = Column(String, nullable=False)
+  payload = Column(Text, nullable=False)
@@ -0,0 +1,205 @@
+from typing import Dict, List, Optional, Protocol, Sequence, Tuple
+import numpy as np
+from sqlalchemy import case, func, or_
+from sqlalchemy.orm import Session
+from database.database import current_engine
+from database.models.star import Stars
+from database.models.exoplanet import Exoplanet
+from database.schemas import StarsPaginedResponse, ExoplanetByStellarResponse
+from app.backend.catalog.facets import PROBABILITY_EDGES, RADIUS_EDGES, facet_counts
+from settings import settings
+
+# ============================================================
+# INTERFACE
+# ============================================================
+
+# colunas de resumo indexadas aceitas em /stars?sort=
+SORTABLE_STAR_COLUMNS = ("planet_count", "max_probability", "hz_candidate_count")
+
+class CatalogBackend(Protocol):
+  """Read queries behind StarRepository / ExoplanetRepository (settings.database.catalog_backend)."""
+
+  def starsPage(self, offset: int, limit: int, sort: Optional[str]=None, descending: bool=False) -> List[StarsPaginedResponse]: ...
+  def starById(self, id: str) -> Optional[StarsPaginedResponse]: ...
+  def starsByIds(self, ids: Sequence[str]) -> List[StarsPaginedResponse]: ...
+  def countStars(self) -> int: ...
+  def planetsByStar(self, star_id: str) -> List[ExoplanetByStellarResponse]: ...
+  def searchStarIds(self, mission: int, search: str, offset: int, limit: int) -> Sequence[str]: ...
+  def searchWithFacets(self, mission: int, search: str, offset: int, limit: int) -> Tuple[Sequence[str], Dict]: ...
+  def countPlanets(self) -> int: ...
+
+# ============================================================
+# SQL (SQLAlchemy ORM)
+# ============================================================
+
+def _star_response(s: Stars) -> StarsPaginedResponse:
+  return StarsPaginedResponse(
+    id=s.id,
+    mass_solar=s.mass_solar,
+    radius_solar=s.radius_solar,
+    effective_tempk=s.effective_tempk,
+    metallicity_feh=s.metallicity_feh,
+    age_gyr=s.age_gyr,
+    missions=s.missions,
+    planet_count=s.planet_count,
+    max_probability=s.max_probability,
+    hz_candidate_count=s.hz_candidate_count,
+    has_koi=s.has_koi,
+    has_toi=s.has_toi,
+    has_k2=s.has_k2)
+
+# prefixo do id de cada missão (LIKE do SQLite ignora caixa, como a busca em memória)
+MISSION_ID_LIKE = {1: "K%", 2: "T%", 3: "EPIC%"}
+
+def _bucket_case(column, edges):
+  # mesmos códigos de facets.bucket_codes: i para edges[i-1] <= v < edges[i], NULL -> len(edges) + 1
+  whens = [(column.is_(None), len(edges) + 1)] + [(column < edge, i) for i, edge in enumerate(edges)]
+  return case(*whens, else_=len(edges))
+
+def facet_code_expressions() -> Dict:
+  """SQL for the stored facet columns of `exoplanets` (scripts/build_star_summaries.py fills them)."""
+  return {
+    "mission_code": case(*[(Exoplanet.id.like(p), code) for code, p in MISSION_ID_LIKE.items()], else_=0),
+    "probability_bucket": _bucket_case(Exoplanet.probability, PROBABILITY_EDGES),
+    "radius_class": _bucket_case(Exoplanet.radius_earth, RADIUS_EDGES),
+  }
+
+class SqlCatalogBackend:
+  def __init__(self, db: Session):
+    self.db = db
+
+  def starsPage(self, offset: int, limit: int, sort: Optional[str]=None, descending: bool=False) -> List[StarsPaginedResponse]:
+    query = self.db.query(Stars)
+    if sort is not None:
+      # ordem de varredura do índice (NULLs primeiro no ASC, por último no DESC)
+      column = getattr(Stars, sort)
+      query = query.order_by(column.desc() if descending else column.asc())
+    data = query.offset(offset).limit(limit).all()
+    return [_star_response(s) for s in data]
+
+  def starById(self, id: str) -> Optional[StarsPaginedResponse]:
+    s = self.db.get(Stars, id)
+    return None if s is None else _star_response(s)
+
+  def starsByIds(self, ids) -> List[StarsPaginedResponse]:
+    data = self.db.query(Stars).filter(Stars.id.in_(ids)).all()
+    return [_star_response(s) for s in data]
+
+  def countStars(self) -> int:
+    return self.db.query(Stars).count()
+
+  def planetsByStar(self, star_id: str) -> List[ExoplanetByStellarResponse]:
+    data = self.db.query(Exoplanet).filter(Exoplanet.star_id == star_id).all()
+    return [ExoplanetByStellarResponse(
+      id=e.id,
+      name=e.name,
+      probability=e.probability,
+      koi_score=e.koi_score,
+      radius_earth=e.radius_earth,
+      equilibrium_tempk=e.equilibrium_tempk,
+      orbital_period_days=e.orbital_period_days,
+      semi_major_axis=e.semi_major_axis,
+      eccentricity=e.eccentricity,
+      inclination_deg=e.inclination_deg) for e in data]
+
+  @staticmethod
+  def _text_filter(search: str):
+    # substring literal, como no backend em memória: % e _ do usuário não são curingas
+    pattern = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return or_(
+      Exoplanet.name.like(pattern, escape="\\"),
+      Exoplanet.id.like(pattern, escape="\\"),
+      Exoplanet.star_id.like(pattern, escape="\\"),
+    )
+
+  def searchStarIds(self, mission: int, search: str, offset: int, limit: int):
+    mission_value = Exoplanet.id.like(MISSION_ID_LIKE[mission]) if mission in MISSION_ID_LIKE else True
+
+    # subquery: usada direto no IN de starsByIds
+    return self.db.query(Exoplanet.star_id).filter(self._text_filter(search)).filter(mission_value).offset(offset).limit(limit)
+
+  def _facet_cube(self, search: str, stored: bool=True):
+    # um único GROUP BY sobre o conjunto completo de resultados (sem o filtro de missão); sem texto,
+    # as colunas de código armazenadas são lidas direto do índice ix_exoplanets_facets
+    if stored:
+      cols = [Exoplanet.mission_code, Exoplanet.probability_bucket, Exoplanet.radius_class]
+    else:
+      cols = [expr.label(name) for name, expr in facet_code_expressions().items()]
+    query = self.db.query(*cols, func.count())
+    if search:
+      query = query.filter(self._text_filter(search))
+    return query.group_by(*cols).all()
+
+  def searchWithFacets(self, mission: int, search: str, offset: int, limit: int):
+    cube = self._facet_cube(search)
+    if any(None in r[:3] for r in cube):
+      # linhas de antes das colunas de facetas (recalculadas na próxima ingestão)
+      cube = self._facet_cube(search, stored=False)
+    codes = np.array([r[:3] for r in cube], dtype=np.int64).reshape(-1, 3)
+    facets = facet_counts(codes[:, 0], codes[:, 1], codes[:, 2], mission, weights=[r[3] for r in cube])
+    return self.searchStarIds(mission, search, offset, limit), facets
+
+  def countPlanets(self) -> int:
+    return self.db.query(Exoplanet).count()
+
+# ============================================================
+# MEMÓRIA (app/backend/catalog/columnar.py)
+# ============================================================
+
+class MemoryCatalogBackend:
+  """Same answers as the SQL backend from a columnar snapshot; floats come back as float32."""
+
+  def __init__(self, catalog):
+    self.catalog = catalog
+
+  def _stars(self, rows: np.ndarray) -> List[StarsPaginedResponse]:
+    return [StarsPaginedResponse(**r) for r in self.catalog.star_records(rows)]
+
+  def starsPage(self, offset: int, limit: int, sort: Optional[str]=None, descending: bool=False) -> List[StarsPaginedResponse]:
+    return self._stars(self.catalog.star_page(offset, limit, sort=sort, descending=descending))
+
+  def starById(self, id: str) -> Optional[StarsPaginedResponse]:
+    row = self.catalog.star_index.get(id)
+    return None if row is None else self._stars(np.array([row]))[0]
+
+  def starsByIds(self, ids) -> List[StarsPaginedResponse]:
+    index = self.catalog.star_index
+    rows = sorted({index[i] for i in ids if i in index})
+    return self._stars(np.array(rows, dtype=np.int64))
+
+  def countStars(self) -> int:
+    return self.catalog.n_stars
+
+  def planetsByStar(self, star_id: str) -> List[ExoplanetByStellarResponse]:
+    row = self.catalog.star_index.get(str(star_id))
+    if row is None:
+      return []
+    return [ExoplanetByStellarResponse(**r) for r in self.catalog.planet_records(self.catalog.planet_rows(row))]
+
+  def searchStarIds(self, mission: int, search: str, offset: int, limit: int) -> List[str]:
+    return self.catalog.star_ids[self.catalog.search_star_rows(search, mission, offset, limit)].tolist()
+
+  def searchWithFacets(self, mission: int, search: str, offset: int, limit: int) -> Tuple[List[str], Dict]:
+    # a mesma máscara de texto serve à página e às facetas
+    matches = self.catalog.text_matches(search)
+    rows = self.catalog.search_star_rows(search, mission, offset, limit, matches=matches)
+    return self.catalog.star_ids[rows].tolist(), self.catalog.search_facets(matches, mission)
+
+  def countPlanets(self) -> int:
+    return self.catalog.n_planets
+
+_memory_catalog = None
+
+def memory_catalog():
+  """Process-wide columnar snapshot (reloaded when the database file or snapshot changes); None for "sql"."""
+  global _memory_catalog
+  if settings.database.catalog_backend != "memory":
+    return None
+  if _memory_catalog is None:
+    from app.backend.catalog.columnar import CatalogHandle
+    _memory_catalog = CatalogHandle(current_engine)
+  return _memory_catalog.get()
+
+def catalog_backend(db: Session) -> CatalogBackend:
+  catalog = memory_catalog()
+  return SqlCatalogBackend(db) if catalog is None else MemoryCatalogBackend(catalog)
@@ -1,44 +1,28 @@
-from typing import List, Optional
+from typing import Dict, List, Tuple
 from database.schemas import ExoplanetByStellarResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
 from database.models.exoplanet import Exoplanet
+from database.repositorys.catalog_backend import catalog_backend
 
 class ExoplanetRepository:      
 
   @staticmethod
   def getByStarId(db: Session, star_id: int) -> List[ExoplanetByStellarResponse]:
-    data = (db.query(Exoplanet).filter(Exoplanet.star_id == star_id).all())
-    return [ExoplanetByStellarResponse(
-      id=e.id, 
-      name=e.name, 
-      probability=e.probability, 
-      koi_score=e.koi_score,
-      radius_earth=e.radius_earth, 
-      equilibrium_tempk=e.equilibrium_tempk,
-      orbital_period_days=e.orbital_period_days,
-      semi_major_axis=e.semi_major_axis, 
-      eccentricity=e.eccentricity, 
-      inclination_deg=e.inclination_deg) for e in data]
+    return catalog_backend(db).planetsByStar(star_id)
+
+  @staticmethod
+  def getByIds(db: Session, ids: List[str]) -> Dict[str, Exoplanet]:
+    data = db.query(Exoplanet).filter(Exoplanet.id.in_(ids)).all()
+    return {e.id: e for e in data}
 
   @staticmethod
   def getStarIdByLike(db: Session, mission: int, search: str, page: int, pageSize: int = 10) -> List[str]:
-    if mission == 0:
-      mission_value = True
-    elif mission == 1:
-      mission_value = Exoplanet.id.like("K%")
-    elif mission == 2:
-      mission_value = Exoplanet.id.like("T%")
-          
-    data = db.query(Exoplanet.star_id).filter(or_(
-      Exoplanet.name.like(f"%{search}%"),
-      Exoplanet.id.like(f"%{search}%"),
-      Exoplanet.star_id.like(f"%{search}%"),
-      )
-    ).filter(mission_value).offset((page - 1) * pageSize).limit(pageSize)
-    
-    return data
+    return catalog_backend(db).searchStarIds(mission, search, (page - 1) * pageSize, pageSize)
+
+  @staticmethod
+  def getStarIdByLikeWithFacets(db: Session, mission: int, search: str, page: int, pageSize: int = 10) -> Tuple[List[str], Dict]:
+    return catalog_backend(db).searchWithFacets(mission, search, (page - 1) * pageSize, pageSize)
   
   @staticmethod
-  def getAllExoplanets(db: Session) -> Exoplanet:
-    return db.query(Exoplanet).count()
\ No newline at end of file
+  def getAllExoplanets(db: Session) -> int:
+    return catalog_backend(db).countPlanets()
\ No newline at end of file
@@ -0,0 +1,21 @@
+from typing import Dict, Optional
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from database.models.explanation import ExoplanetExplanation
+
+class ExplanationRepository:
+
+  @staticmethod
+  def getByExoplanetId(db: Session, exoplanet_id: str) -> Optional[ExoplanetExplanation]:
+    return db.get(ExoplanetExplanation, exoplanet_id)
+
+  @staticmethod
+  def upsertMany(db: Session, payloads: Dict[str, str], etags: Dict[str, str], model_version: str) -> int:
+    rows = [{"exoplanet_id": pid, "model_version": model_version, "etag": etags[pid], "payload": p} for pid, p in payloads.items()]
+    if rows:
+      stmt = insert(ExoplanetExplanation)
+      db.execute(stmt.on_conflict_do_update(
+        index_elements=[ExoplanetExplanation.exoplanet_id],
+        set_={"model_version": stmt.excluded.model_version, "etag": stmt.excluded.etag, "payload": stmt.excluded.payload},
+      ), rows)
+    return len(rows)
@@ -1,32 +1,22 @@
 from typing import List, Optional
 from database.schemas import StarsPaginedResponse
 from sqlalchemy.orm import Session
-from database.models.star import Stars
+from database.repositorys.catalog_backend import catalog_backend
 
 class StarRepository:      
 
   @staticmethod
-  def getPerPage(db: Session, page: int, pageSize: int = 10) -> List[StarsPaginedResponse]:
-    data = db.query(Stars).offset((page - 1) * pageSize).limit(pageSize).all()
-    return [StarsPaginedResponse(
-      id=s.id, 
-      mass_solar=s.mass_solar, 
-      radius_solar=s.radius_solar, 
-      effective_tempk=s.effective_tempk, 
-      metallicity_feh=s.metallicity_feh, 
-      age_gyr=s.age_gyr) for s in data]  
+  def getPerPage(db: Session, page: int, pageSize: int = 10, sort: Optional[str] = None, descending: bool = False) -> List[StarsPaginedResponse]:
+    return catalog_backend(db).starsPage((page - 1) * pageSize, pageSize, sort, descending)
     
+  @staticmethod
+  def getById(db: Session, id: str) -> Optional[StarsPaginedResponse]:
+    return catalog_backend(db).starById(id)
+
   @staticmethod
   def getByIds(db: Session, ids: List[str]) -> List[StarsPaginedResponse]:
-    data = db.query(Stars).filter(Stars.id.in_(ids)).all()
-    return [StarsPaginedResponse(
-      id=s.id, 
-      mass_solar=s.mass_solar, 
-      radius_solar=s.radius_solar, 
-      effective_tempk=s.effective_tempk, 
-      metallicity_feh=s.metallicity_feh, 
-      age_gyr=s.age_gyr) for s in data]  
+    return catalog_backend(db).starsByIds(ids)
     
   @staticmethod
-  def getAllStars(db: Session) -> Stars:
-    return db.query(Stars).count()
\ No newline at end of file
+  def getAllStars(db: Session) -> int:
+    return catalog_backend(db).countStars()
@@ -0,0 +1,18 @@
+from typing import Dict, Optional
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from database.models.system_payload import SystemPayload
+
+class SystemPayloadRepository:
+
+  @staticmethod
+  def getByStarId(db: Session, star_id: str) -> Optional[SystemPayload]:
+    return db.get(SystemPayload, star_id)
+
+  @staticmethod
+  def replaceAll(db: Session, payloads: Dict[str, str], etags: Dict[str, str]) -> int:
+    db.query(SystemPayload).delete()
+    rows = [{"star_id": sid, "etag": etags[sid], "payload": p} for sid, p in payloads.items()]
+    if rows:
+      db.execute(insert(SystemPayload), rows)
+    return len(rows)
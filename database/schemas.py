@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 # Exoplanets Models
 class ExoplanetByStellarResponse(BaseModel):
@@ -16,6 +16,14 @@ class ExoplanetByStellarResponse(BaseModel):
   class Config:
     orm_mode = True
 
+class SimilarExoplanetResponse(ExoplanetByStellarResponse):
+  star_id: str
+  distance: float
+
+class SimilarResponse(BaseModel):
+  id: str
+  similar: List[SimilarExoplanetResponse]
+
 # Stars Models
 class StarsPaginedResponse(BaseModel):
   id: str
@@ -24,6 +32,13 @@ class StarsPaginedResponse(BaseModel):
   effective_tempk: Optional[float] = None
   metallicity_feh: Optional[float] = None
   age_gyr: Optional[float] = None
+  missions: Optional[str] = None
+  planet_count: Optional[int] = None
+  max_probability: Optional[float] = None
+  hz_candidate_count: Optional[int] = None
+  has_koi: Optional[bool] = None
+  has_toi: Optional[bool] = None
+  has_k2: Optional[bool] = None
   planets: Optional[List[ExoplanetByStellarResponse]] = None
   
   class Config:
@@ -33,6 +48,15 @@ class PageRespose(BaseModel):
   page: int
   stars: List[StarsPaginedResponse]
 
+class SearchFacets(BaseModel):
+  total: int
+  missions: Dict[str, int]
+  probability: Dict[str, int]
+  radius_class: Dict[str, int]
+
+class SearchPageResponse(PageRespose):
+  facets: SearchFacets
+
 
 class GetInfosResponse(BaseModel):
   amountStars: int
@@ -0,0 +1,124 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List
+from sqlalchemy.engine import Engine
+from app.backend.ai.utils import file_lock, get_logger
+from database.database import create_sqlite_engine, current_engine, database_file, init_db
+from settings import settings
+
+logger = get_logger("snapshots")
+
+# ============================================================
+# SNAPSHOTS DO BANCO (blue/green)
+# ============================================================
+#
+# Cada ingestão escreve numa cópia nova do banco (snapshots/<nome>-<data>-<pid>.db), otimiza a cópia
+# (ANALYZE + VACUUM) e só então troca o ponteiro `database.pointer` com os.replace. A API lê sempre o
+# arquivo do ponteiro (database.current_engine): um snapshot publicado nunca mais é escrito, então os
+# leitores não disputam lock com a ingestão, e uma ingestão que falha no meio não publica nada.
+
+def _fsync_dir(path: str) -> None:
+  try:
+    fd = os.open(path, os.O_RDONLY)
+  except OSError:  # pragma: no cover - Windows
+    return
+  try:
+    os.fsync(fd)
+  finally:
+    os.close(fd)
+
+def snapshot_files() -> List[str]:
+  """Snapshot files, oldest first (names start with the creation time)."""
+  folder = settings.database.snapshots_path
+  if not os.path.isdir(folder):
+    return []
+  return sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.endswith(".db"))
+
+def new_snapshot_path() -> str:
+  stem = os.path.splitext(settings.database.filename)[0]
+  name = f"{stem}-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}.db"
+  return os.path.join(settings.database.snapshots_path, name)
+
+def copy_database(src: str, dst: str) -> None:
+  # API de backup do SQLite: cópia consistente mesmo com leitores abertos no arquivo de origem
+  source, target = sqlite3.connect(src), sqlite3.connect(dst)
+  try:
+    source.backup(target)
+  finally:
+    source.close()
+    target.close()
+
+def optimize_database(db_file: str) -> None:
+  """Planner statistics, compact layout and a consistency check before the file is published."""
+  conn = sqlite3.connect(db_file, isolation_level=None)
+  try:
+    conn.execute("ANALYZE")
+    conn.execute("VACUUM")
+    result = conn.execute("PRAGMA quick_check").fetchone()[0]
+    if result != "ok":
+      raise RuntimeError(f"Snapshot {db_file} failed quick_check: {result}")
+  finally:
+    conn.close()
+  with open(db_file, "rb+") as f:
+    os.fsync(f.fileno())
+
+def publish(db_file: str) -> None:
+  """Point the readers at `db_file` (atomic rename of the pointer file)."""
+  pointer = settings.database.pointer_path
+  tmp = f"{pointer}.tmp"
+  with open(tmp, "w", encoding="utf-8") as f:
+    f.write(os.path.relpath(db_file, settings.database.folder) + "\n")
+    f.flush()
+    os.fsync(f.fileno())
+  os.replace(tmp, pointer)
+  _fsync_dir(settings.database.folder)
+
+def prune_snapshots(keep: int) -> None:
+  """Delete all but the current snapshot and the `keep` newest other ones (also leftovers of failed runs)."""
+  current = os.path.abspath(database_file())
+  others = [f for f in snapshot_files() if os.path.abspath(f) != current]
+  for path in others[:max(len(others) - keep, 0)]:
+    try:
+      os.remove(path)
+    except OSError as e:
+      # Windows não remove arquivos ainda abertos por um leitor: fica para a próxima ingestão
+      logger.warning(f"Could not remove old snapshot {path}: {e}")
+
+@contextmanager
+def new_snapshot() -> Iterator[Engine]:
+  """
+  Engine over a private copy of the current database; when the block finishes without errors the
+  copy is analyzed, vacuumed and published. With `database.snapshots` off it writes in place.
+  """
+  if not settings.database.snapshots:
+    engine = current_engine()
+    init_db(engine)
+    yield engine
+    return
+
+  Path(settings.database.snapshots_path).mkdir(parents=True, exist_ok=True)
+  # uma ingestão por vez: a próxima parte do snapshot que esta publicar
+  with file_lock(settings.database.pointer_path):
+    source, target = database_file(), new_snapshot_path()
+    t0 = time.perf_counter()
+    if os.path.exists(source):
+      copy_database(source, target)
+    engine = create_sqlite_engine(target)
+    try:
+      init_db(engine)
+      yield engine
+      engine.dispose()
+      optimize_database(target)
+    except BaseException:
+      engine.dispose()
+      for path in (target, f"{target}-journal"):
+        if os.path.exists(path):
+          os.remove(path)
+      logger.error(f"Snapshot {target} discarded; readers stay on {source}")
+      raise
+    publish(target)
+    logger.info(f"Published snapshot {target} ({os.path.getsize(target) / 2**20:.1f}MB, {time.perf_counter() - t0:.1f}s)")
+    prune_snapshots(settings.database.keep_snapshots)
@@ -1,21 +1,45 @@
+import asyncio
+import os
 from fastapi import FastAPI
+from sqlalchemy import text
 from app.backend.api.controllers import generic_controller
 from app.backend.api.controllers import star_controller
-from database.database import engine, Base
+from app.backend.api.controllers import exoplanet_controller
+from app.backend.api.controllers import metrics_controller
+from app.backend.api.controllers import model_controller
+from app.backend.api.controllers import catalog_controller
+from app.backend.api.middlewares.instrumentation import InstrumentationMiddleware, instrument_engine
+from app.backend.api.middlewares.admission import AdmissionMiddleware
+from app.backend.api.model_provider import provider
+from database.database import check_schema, current_engine, dispose_engines, engine_hooks
+from database.repositorys.catalog_backend import memory_catalog
 from fastapi.middleware.cors import CORSMiddleware
 from settings import settings
 
 BASE_URL_FRONTEND = settings.frontend.base_url
 
 async def lifespan(app: FastAPI):
-  Base.metadata.create_all(bind=engine)
+  # somente leitura: o esquema é migrado pelas ingestões (database/snapshots.new_snapshot), nunca pela API
+  check_schema()
+  poller = asyncio.create_task(poll_models())
   yield
+  poller.cancel()
+
+async def poll_models():
+  # hot reload: get() só percebe um novo ACTIVE quando é chamado, então cada processo o chama periodicamente
+  while True:
+    await asyncio.to_thread(provider.refresh)
+    await asyncio.sleep(provider.poll_interval)
 
 app = FastAPI(
   title="Exoplanets API",
   lifespan=lifespan,
 )
 
+# Admissão: limite de concorrência e fila com timeout por rota (503 + Retry-After) e coalescência de GETs idênticos.
+# Adicionado antes do CORS para que os 503 também levem os headers de CORS
+app.add_middleware(AdmissionMiddleware, router=app.router, config=settings.api.admission)
+
 # CORS
 app.add_middleware(
   CORSMiddleware,
@@ -23,11 +47,44 @@ app.add_middleware(
   allow_methods=["*"],
   allow_headers=["*"],
   allow_credentials=False,
+  expose_headers=["X-Ephemeris-Shape", "X-Ephemeris-Dtype", "X-Ephemeris-Units", "X-Planet-Ids", "Server-Timing"],
 )
 
+# Instrumentação (latência por rota, queries por request, /metrics e Server-Timing)
+if settings.api.instrumentation:
+  # cada engine novo (um por snapshot publicado) é instrumentado ao ser criado
+  engine_hooks.append(instrument_engine)
+  app.add_middleware(InstrumentationMiddleware)
+  app.include_router(metrics_controller.router)
+
 app.include_router(generic_controller.router)
 app.include_router(star_controller.router)
+app.include_router(exoplanet_controller.router)
+app.include_router(model_controller.router)
+app.include_router(catalog_controller.router)
 
 @app.get("/")
 def root():
-  return {"status": "ok"}
\ No newline at end of file
+  return {"status": "ok"}
+
+@app.get("/health")
+def health():
+  # usado pelo balanceador / orquestrador: processo vivo e banco acessível
+  with current_engine().connect() as conn:
+    conn.execute(text("SELECT 1"))
+  return {"status": "ok", "pid": os.getpid()}
+
+# ============================================================
+# HOOKS DO SERVIDOR PRE-FORK (app/backend/api/server.py)
+# ============================================================
+
+def warm_caches():
+  # roda no processo mestre antes do fork: os workers herdam tudo via copy-on-write
+  check_schema()
+  provider.refresh()
+  exoplanet_controller.similarity_index.get()
+  memory_catalog()
+
+def after_fork():
+  # conexões SQLite abertas no mestre não podem ser compartilhadas entre processos
+  dispose_engines(close=False)
@@ -1,4 +1,7 @@
+import argparse
+import shutil
 import subprocess
+import sys
 import time
 import os
 from settings import settings
@@ -13,25 +16,44 @@ BASE_URL_FRONTEND = settings.frontend.base_url
 def run_api():
   print("🚀 Starting API (FastAPI + Uvicorn)...")
   subprocess.Popen(
-    ["uvicorn", "main:app", "--reload", "--host", BASE_URL_API, "--port", str(API_PORT)],
+    [sys.executable, "-m", "uvicorn", "main:app", "--reload", "--host", BASE_URL_API, "--port", str(API_PORT)],
     cwd="./"
   )
 
 def run_frontend():
   print("🌐 Starting Frontend (Next.js)...")
+  # npm.cmd no Windows, npm nos demais sistemas
+  npm = shutil.which("npm.cmd") or shutil.which("npm") or "npm"
   subprocess.Popen(
-    ["npm.cmd", "run", "dev"],
+    [npm, "run", "dev"],
     cwd="./app/frontend"
   )
 
+def run_production(workers=None):
+  # API apenas: o frontend de produção é servido como build estático
+  from app.backend.api.server import serve
+  serve("main:app", settings.api.server, BASE_URL_API, API_PORT, workers)
+
 if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--mode", choices=["dev", "production"], default=settings.api.server.mode, help="Overrides api.server.mode")
+  parser.add_argument("--workers", type=int, default=None, help="Overrides api.server.workers (production)")
+  parser.add_argument("--no_frontend", action="store_true", help="Start only the API (dev)")
+  args = parser.parse_args()
+
+  if args.mode == "production":
+    run_production(args.workers)
+    sys.exit(0)
+
   print("🔥 Starting SpaceApps (API + Front)...\n")
   run_api()
-  time.sleep(3)
-  run_frontend()
+  if not args.no_frontend:
+    time.sleep(3)
+    run_frontend()
 
   print(f"\n✅ API running in: {BASE_URL_API}")
-  print(f"✅ Frontend running in: {BASE_URL_FRONTEND}")
+  if not args.no_frontend:
+    print(f"✅ Frontend running in: {BASE_URL_FRONTEND}")
 
   try:
     while True:
@@ -0,0 +1,319 @@
+"""
+Benchmark suite for the ingestion pipeline and the API endpoints.
+
+For every catalog size a synthetic KOI/TOI-shaped catalog is generated into a temporary
+folder, ingested through `scripts.load_data` into a temporary SQLite file, and then
+`/stars`, `/stars/search` and `/getInfos` are driven through the FastAPI test client
+(sequential latency) and a local load generator against uvicorn (concurrent throughput).
+
+Usage:
+    python -m scripts.benchmark --sizes 10000 100000 1000000
+"""
+from __future__ import annotations
+import argparse, os, sys, time, json, socket, subprocess, tempfile, threading, platform
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime, timezone
+import multiprocessing as mp
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+ENDPOINTS = ["/stars", "/stars/search", "/getInfos"]
+
+# ============================================================
+# CATÁLOGO SINTÉTICO
+# ============================================================
+
+def _star_layout(n_planets: int, rng: np.random.Generator) -> np.ndarray:
+    # índice da estrela de cada planeta (1 a ~4 planetas por estrela, como no Kepler)
+    sizes = rng.choice([1, 2, 3, 4], p=[0.7, 0.18, 0.08, 0.04], size=n_planets)
+    star_idx = np.repeat(np.arange(n_planets), sizes)[:n_planets]
+    return star_idx
+
+def _disposition(rng: np.random.Generator, n: int, labels: List[str]) -> np.ndarray:
+    return rng.choice(labels, size=n)
+
+def make_koi_catalog(n_planets: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    star_idx = _star_layout(n_planets, rng)
+    # número do planeta dentro da estrela (.01, .02, ...)
+    first = np.r_[0, np.flatnonzero(np.diff(star_idx)) + 1]
+    planet_no = np.arange(n_planets) - np.repeat(first, np.diff(np.r_[first, n_planets])) + 1
+    kepid = 10_000_000 + star_idx
+    n_stars = star_idx.max() + 1
+    steff = rng.normal(5700, 800, n_stars)
+    srad = rng.lognormal(0, 0.3, n_stars)
+    period = rng.lognormal(2.5, 1.2, n_planets)
+    depth = rng.lognormal(6, 1.5, n_planets)
+    duration = rng.lognormal(1.2, 0.5, n_planets)
+    return pd.DataFrame({
+        "kepid": kepid,
+        "kepoi_name": [f"K{s:08d}.{p:02d}" for s, p in zip(star_idx, planet_no)],
+        "kepler_name": np.where(rng.random(n_planets) < 0.3, [f"Kepler-{s} b" for s in star_idx], None),
+        "koi_disposition": _disposition(rng, n_planets, ["CONFIRMED", "CANDIDATE", "FALSE POSITIVE"]),
+        "koi_score": rng.random(n_planets),
+        "koi_period": period,
+        "koi_depth": depth,
+        "koi_duration": duration,
+        "koi_ror": np.sqrt(depth / 1e6),
+        "koi_dor": rng.lognormal(3, 0.8, n_planets),
+        "koi_model_snr": rng.lognormal(3, 1, n_planets),
+        "koi_max_mult_ev": rng.lognormal(2.5, 1, n_planets),
+        "koi_prad": rng.lognormal(0.8, 0.8, n_planets),
+        "koi_teq": rng.normal(900, 400, n_planets),
+        "koi_sma": (period / 365.25) ** (2 / 3),
+        "koi_eccen": np.zeros(n_planets),
+        "koi_incl": rng.normal(89, 1, n_planets),
+        "koi_steff": steff[star_idx],
+        "koi_slogg": rng.normal(4.4, 0.2, n_planets),
+        "koi_smet": rng.normal(0, 0.2, n_stars)[star_idx],
+        "koi_srad": srad[star_idx],
+        "koi_smass": (srad ** 0.8)[star_idx],
+        "koi_sage": rng.uniform(0.5, 10, n_stars)[star_idx],
+        "koi_kepmag": rng.normal(14, 1.5, n_stars)[star_idx],
+        "ra": rng.uniform(280, 300, n_stars)[star_idx],
+        "dec": rng.uniform(36, 52, n_stars)[star_idx],
+        "koi_comment": "synthetic",
+    })
+
+def make_toi_catalog(n_planets: int, seed: int = 43) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    star_idx = _star_layout(n_planets, rng)
+    first = np.r_[0, np.flatnonzero(np.diff(star_idx)) + 1]
+    planet_no = np.arange(n_planets) - np.repeat(first, np.diff(np.r_[first, n_planets])) + 1
+    toipfx = 1000 + star_idx
+    n_stars = star_idx.max() + 1
+    return pd.DataFrame({
+        "toi": toipfx + planet_no / 100,
+        "toipfx": toipfx,
+        "tid": 200_000_000 + star_idx,
+        "tfopwg_disp": _disposition(rng, n_planets, ["PC", "CP", "KP", "FP"]),
+        "pl_orbper": rng.lognormal(2, 1.2, n_planets),
+        "pl_trandep": rng.lognormal(7, 1.5, n_planets),
+        "pl_trandurh": rng.lognormal(1, 0.5, n_planets),
+        "pl_rade": rng.lognormal(1, 0.8, n_planets),
+        "pl_eqt": rng.normal(1100, 500, n_planets),
+        "st_teff": rng.normal(5600, 900, n_stars)[star_idx],
+        "st_rad": rng.lognormal(0, 0.3, n_stars)[star_idx],
+        "st_logg": rng.normal(4.4, 0.2, n_stars)[star_idx],
+        "st_tmag": rng.normal(10, 1.5, n_stars)[star_idx],
+        "ra": rng.uniform(0, 360, n_stars)[star_idx],
+        "dec": np.rad2deg(np.arcsin(rng.uniform(-1, 1, n_stars)))[star_idx],
+    })
+
+def make_model_bundle(df: pd.DataFrame, mission: str, path: str) -> None:
+    # modelo pequeno com o mesmo formato de bundle que scripts/train_model.py salva
+    import joblib
+    from sklearn.impute import SimpleImputer
+    from lightgbm import LGBMClassifier
+    from app.backend.ai.data_utils import basic_clean, infer_label
+    from app.backend.ai.feature_engineering import build_features, select_feature_columns
+
+    sample = df.sample(n=min(len(df), 5000), random_state=0)
+    clean = basic_clean(sample, mission)
+    y, _ = infer_label(clean, mission)
+    Xfe, _ = build_features(clean, mission)
+    features = select_feature_columns(Xfe)
+    imputer = SimpleImputer(strategy="median")
+    X = imputer.fit_transform(Xfe[features])
+    model = LGBMClassifier(n_estimators=20, num_leaves=15, verbose=-1).fit(X, y.values)
+    joblib.dump({"model": model, "imputer": imputer, "features": features}, path)
+
+def write_config(workdir: str, db_name: str, catalog_backend: str = "sql") -> str:
+    with open("config.json", "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+    cfg["database"].update({"folder": workdir, "filename": db_name, "catalog_backend": catalog_backend})
+    cfg["data"].update({
+        "models_folder": workdir, "models_koi_name": "model_koi.joblib", "models_toi_name": "model_toi.joblib",
+        "raw_folder": workdir, "raw_koi": "koi.csv", "raw_toi": "toi.csv",
+    })
+    path = os.path.join(workdir, f"config_{db_name}_{catalog_backend}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cfg, f, indent=2)
+    return path
+
+# ============================================================
+# INGESTÃO
+# ============================================================
+
+def bench_ingestion(config_path: str, missions: Dict[str, int]) -> Dict[str, Any]:
+    env = dict(os.environ, EXO_CONFIG=config_path)
+    out: Dict[str, Any] = {}
+    for mission, n_rows in missions.items():
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "scripts.load_data", "--mission", mission], env=env, check=True)
+        wall = time.perf_counter() - t0
+        out[mission] = {"rows": n_rows, "wall_s": wall, "rows_per_s": n_rows / wall}
+    total_rows = sum(m["rows"] for m in out.values())
+    total_wall = sum(m["wall_s"] for m in out.values())
+    out["total"] = {"rows": total_rows, "wall_s": total_wall, "rows_per_s": total_rows / total_wall}
+    return out
+
+# ============================================================
+# API
+# ============================================================
+
+def _summary(latencies: List[float], wall: float, errors: int) -> Dict[str, float]:
+    lat_ms = np.asarray(latencies) * 1000
+    return {
+        "requests": int(len(lat_ms)), "errors": int(errors),
+        "p50_ms": float(np.percentile(lat_ms, 50)), "p95_ms": float(np.percentile(lat_ms, 95)),
+        "p99_ms": float(np.percentile(lat_ms, 99)), "mean_ms": float(lat_ms.mean()),
+        "throughput_rps": float(len(lat_ms) / wall),
+    }
+
+def _request_factory(endpoint: str, n_pages: int, seed: int) -> Callable[[], str]:
+    rng = np.random.default_rng(seed)
+    terms = ["K0000", "T10", "Kepler", "01", "2", ""]
+    def make() -> str:
+        if endpoint == "/stars":
+            return f"/stars?page={int(rng.integers(1, n_pages + 1))}"
+        if endpoint == "/stars/search":
+            return f"/stars/search?page=1&mission={int(rng.integers(0, 3))}&search={rng.choice(terms)}"
+        return endpoint
+    return make
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def bench_api(config_path: str, n_stars: int, n_requests: int, concurrency: int, duration: float) -> Dict[str, Any]:
+    # roda em um processo separado: o engine do banco é criado na importação de `main`
+    os.environ["EXO_CONFIG"] = config_path
+    import uvicorn
+    from fastapi.testclient import TestClient
+    from main import app
+
+    n_pages = max(1, n_stars // 10)
+    out: Dict[str, Any] = {"test_client": {}, "load": {}}
+
+    with TestClient(app) as client:
+        for endpoint in ENDPOINTS:
+            make = _request_factory(endpoint, n_pages, seed=0)
+            client.get(make())  # aquecimento
+            latencies, errors = [], 0
+            t0 = time.perf_counter()
+            for _ in range(n_requests):
+                t = time.perf_counter()
+                r = client.get(make())
+                latencies.append(time.perf_counter() - t)
+                errors += r.status_code != 200
+            out["test_client"][endpoint] = _summary(latencies, time.perf_counter() - t0, errors)
+
+    if duration <= 0:
+        return out
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    try:
+        for endpoint in ENDPOINTS:
+            def worker(seed: int):
+                make = _request_factory(endpoint, n_pages, seed)
+                lat, err = [], 0
+                deadline = time.perf_counter() + duration
+                while time.perf_counter() < deadline:
+                    t = time.perf_counter()
+                    try:
+                        with urllib.request.urlopen(f"http://127.0.0.1:{port}{make()}", timeout=30) as r:
+                            r.read()
+                    except Exception:
+                        err += 1
+                    lat.append(time.perf_counter() - t)
+                return lat, err
+
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                results = list(pool.map(worker, range(concurrency)))
+            wall = time.perf_counter() - t0
+            latencies = [x for lat, _ in results for x in lat]
+            out["load"][endpoint] = _summary(latencies, wall, sum(e for _, e in results))
+            out["load"][endpoint]["concurrency"] = concurrency
+    finally:
+        server.should_exit = True
+        thread.join()
+    return out
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000], help="Total planets per catalog (e.g. 10000 100000 1000000)")
+    ap.add_argument("--koi_fraction", type=float, default=0.5, help="Fraction of planets generated as KOI (rest is TOI)")
+    ap.add_argument("--n_requests", type=int, default=200, help="Sequential requests per endpoint (test client)")
+    ap.add_argument("--concurrency", type=int, default=8, help="Concurrent clients for the load generator")
+    ap.add_argument("--duration", type=float, default=10.0, help="Seconds of load per endpoint")
+    ap.add_argument("--skip_load", action="store_true", help="Skip the uvicorn load generator phase")
+    ap.add_argument("--out", type=str, default=None, help="Output JSON (default results/benchmarks/benchmark_<commit>.json)")
+    ap.add_argument("--keep", action="store_true", help="Keep the temporary catalog/DB folder")
+    ap.add_argument("--catalog_backends", type=str, nargs="+", default=["sql"], choices=["sql", "memory"],
+                    help="API read backends to measure (results for \"memory\" go to api_memory)")
+    args = ap.parse_args()
+
+    commit = _git_commit()
+    report: Dict[str, Any] = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "sizes": {},
+    }
+
+    workdir = tempfile.mkdtemp(prefix="exo_bench_")
+    try:
+        for size in args.sizes:
+            print(f"📦 Catalog with {size} planets ...")
+            n_koi = int(size * args.koi_fraction)
+            koi = make_koi_catalog(n_koi)
+            toi = make_toi_catalog(size - n_koi)
+            koi.to_csv(os.path.join(workdir, "koi.csv"), index=False)
+            toi.to_csv(os.path.join(workdir, "toi.csv"), index=False)
+            make_model_bundle(koi, "koi", os.path.join(workdir, "model_koi.joblib"))
+            make_model_bundle(toi, "toi", os.path.join(workdir, "model_toi.joblib"))
+            config_path = write_config(workdir, f"bench_{size}.db")
+
+            print("🔹 Ingestion ...")
+            ingestion = bench_ingestion(config_path, {"koi": len(koi), "toi": len(toi)})
+            n_stars = koi["kepid"].nunique() + toi["toipfx"].nunique()
+
+            report["sizes"][str(size)] = {"planets": size, "stars": int(n_stars), "ingestion": ingestion}
+            duration = 0.0 if args.skip_load else args.duration
+            for backend in args.catalog_backends:
+                print(f"🔹 API ({backend} backend) ...")
+                backend_config = write_config(workdir, f"bench_{size}.db", catalog_backend=backend)
+                with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as pool:
+                    api = pool.submit(bench_api, backend_config, n_stars, args.n_requests, args.concurrency, duration).result()
+                if args.skip_load:
+                    api.pop("load")
+                report["sizes"][str(size)]["api" if backend == "sql" else f"api_{backend}"] = api
+    finally:
+        if args.keep:
+            print(f"🗂️  Temporary files kept in {workdir}")
+        else:
+            import shutil
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    out_path = args.out or os.path.join("results", "benchmarks", f"benchmark_{commit}.json")
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Benchmark saved to {out_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Startup benchmark for the API and the CLI entry points.
+
+Each module is imported in a fresh interpreter under `python -X importtime` (total import time,
+number of modules and which heavy libraries got loaded), and the API is started with uvicorn
+and polled until `/` answers (time to first response). `--baseline <rev>` runs the same
+measurements on a git worktree of another revision, so the two can be compared side by side.
+
+Usage:
+    python -m scripts.benchmark_startup --baseline HEAD~1
+"""
+from __future__ import annotations
+import argparse, os, sys, time, json, socket, subprocess, tempfile, statistics
+import urllib.request
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ["main", "scripts.load_data", "scripts.train_model"]
+# bibliotecas que não deveriam ser carregadas só para subir a API
+HEAVY = ["pandas", "scipy", "sklearn", "joblib", "lightgbm", "optuna", "shap", "matplotlib"]
+
+# ============================================================
+# IMPORT TIME
+# ============================================================
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """`-X importtime` lines -> {module: cumulative microseconds}."""
+    out: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        out[name.strip()] = int(cumulative)
+    return out
+
+def import_profile(module: str, cwd: str, runs: int) -> Dict[str, Any]:
+    totals, modules = [], {}
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=cwd, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {module} failed in {cwd}:\n{proc.stderr[-2000:]}")
+        modules = parse_importtime(proc.stderr)
+        totals.append(modules.get(module, 0) / 1e6)
+    return {
+        "import_s": statistics.median(totals),
+        "n_modules": len(modules),
+        "heavy_loaded": [lib for lib in HEAVY if lib in modules],
+    }
+
+# ============================================================
+# TIME TO FIRST RESPONSE
+# ============================================================
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def first_response(cwd: str, timeout: float=60.0) -> float:
+    """Seconds from spawning uvicorn until `GET /` returns 200."""
+    port = _free_port()
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - t0 < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {proc.returncode} in {cwd}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as r:
+                    if r.status == 200:
+                        return time.perf_counter() - t0
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"API did not answer within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+def measure(cwd: str, modules: List[str], runs: int) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"imports": {}}
+    for module in modules:
+        out["imports"][module] = import_profile(module, cwd, runs)
+        print(f"  {module}: {out['imports'][module]['import_s']:.3f}s")
+    out["first_response_s"] = statistics.median(first_response(cwd) for _ in range(runs))
+    print(f"  first response: {out['first_response_s']:.3f}s")
+    return out
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def _git(*args: str, cwd: str=ROOT) -> str:
+    return subprocess.check_output(["git", *args], cwd=cwd, text=True).strip()
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--modules", type=str, nargs="+", default=MODULES)
+    ap.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement (median is reported)")
+    ap.add_argument("--baseline", type=str, default=None, help="Git revision to compare against (e.g. HEAD~1)")
+    ap.add_argument("--out", type=str, default=None, help="Output JSON (default results/benchmarks/startup_<commit>.json)")
+    args = ap.parse_args()
+
+    commit = _git("rev-parse", "--short", "HEAD")
+    report: Dict[str, Any] = {"commit": commit, "timestamp": datetime.now(timezone.utc).isoformat(), "python": sys.version.split()[0]}
+    print(f"🔹 Working tree ({commit}) ...")
+    report["current"] = measure(ROOT, args.modules, args.runs)
+
+    if args.baseline:
+        worktree = tempfile.mkdtemp(prefix="exo_startup_")
+        _git("worktree", "add", "--detach", worktree, args.baseline)
+        try:
+            print(f"🔹 Baseline ({args.baseline}) ...")
+            report["baseline"] = dict(measure(worktree, args.modules, args.runs), revision=_git("rev-parse", "--short", args.baseline))
+        finally:
+            _git("worktree", "remove", "--force", worktree)
+        base, cur = report["baseline"], report["current"]
+        report["speedup"] = {
+            "first_response": base["first_response_s"] / cur["first_response_s"],
+            **{m: base["imports"][m]["import_s"] / cur["imports"][m]["import_s"] for m in args.modules},
+        }
+        print(f"🔹 First response {cur['first_response_s']:.3f}s vs {base['first_response_s']:.3f}s "
+              f"({report['speedup']['first_response']:.1f}x faster)")
+
+    out_path = args.out or os.path.join("results", "benchmarks", f"startup_{commit}.json")
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Startup benchmark saved to {out_path}")
+
+if __name__ == "__main__":
+    main()
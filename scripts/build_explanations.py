@@ -0,0 +1,50 @@
+import argparse
+import numpy as np
+from typing import Dict, List
+from sqlalchemy.orm import Session
+from database.snapshots import new_snapshot
+from database.repositorys.explanation_repository import ExplanationRepository
+from app.backend.ai.explanations import DEFAULT_TOP_K, shap_values, explanation_payloads, payload_etag
+from app.backend.ai.utils import get_logger
+
+logger = get_logger("explanations")
+
+def store_explanations(session: Session, ids: List[str], X_raw: np.ndarray, X_np: np.ndarray, bundle: Dict,
+                       model_version: str, top_k: int = DEFAULT_TOP_K, n_jobs: int = -1) -> int:
+  """SHAP the scored rows (parallel chunks) and upsert the top-k contributions of each planet."""
+  if not ids:
+    return 0
+  values, base_value = shap_values(bundle["model"], X_np, n_jobs=n_jobs)
+  payloads = explanation_payloads(ids, X_raw, values, base_value, bundle["features"], model_version, top_k)
+  etags = {pid: payload_etag(p) for pid, p in payloads.items()}
+  n = ExplanationRepository.upsertMany(session, payloads, etags, model_version)
+  logger.info(f"Stored explanations for {n} planets (model {model_version}, top {top_k})")
+  return n
+
+def main():
+  # imports locais: load_data também importa este módulo
+  from scripts.load_data import load_bundle, read_raw, model_inputs, planet_ids
+
+  ap = argparse.ArgumentParser()
+  ap.add_argument("--missions", nargs="+", default=["koi", "toi", "k2"], choices=["koi", "toi", "k2"])
+  ap.add_argument("--top_k", type=int, default=DEFAULT_TOP_K, help="Contributions stored per planet")
+  ap.add_argument("--n_jobs", type=int, default=-1, help="Parallel SHAP workers (-1 = all cores)")
+  args = ap.parse_args()
+
+  # todas as missões num único snapshot novo
+  with new_snapshot() as engine:
+    for mission in args.missions:
+      bundle, model_version = load_bundle(mission)
+      try:
+        df_raw = read_raw(mission, bundle["features"])
+      except FileNotFoundError:
+        print(f"⚠️ No raw file for {mission}, skipping")
+        continue
+      X_raw, X_np = model_inputs(df_raw, mission, bundle)
+      with Session(engine) as session:
+        n = store_explanations(session, planet_ids(df_raw, mission).tolist(), X_raw, X_np, bundle, model_version, args.top_k, args.n_jobs)
+        session.commit()
+      print(f"✅ {n} {mission} explanations rebuilt")
+
+if __name__ == "__main__":
+  main()
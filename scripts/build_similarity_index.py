@@ -0,0 +1,44 @@
+import argparse
+import pandas as pd
+from app.backend.catalog.similarity import SimilarityIndex, similarity_features
+from settings import settings
+
+def upsert_mission(index: SimilarityIndex, df_raw: pd.DataFrame, mission: str, ids: pd.Series) -> SimilarityIndex:
+  """Index with the rows of one mission replaced by `df_raw` (its planets missing from `ids` are dropped)."""
+  # import local: load_data também importa este módulo
+  from scripts.load_data import MISSION_ID_PREFIX
+  return index.upsert(ids.to_numpy(), similarity_features(df_raw, mission), replace_prefix=MISSION_ID_PREFIX[mission])
+
+def update_similarity_index(df_raw: pd.DataFrame, mission: str, ids: pd.Series, path: str = None) -> int:
+  """Add or replace the rows of one ingested mission; the other missions are reused as stored."""
+  path = path or settings.database.similarity_index_path
+  index = upsert_mission(SimilarityIndex.load(path), df_raw, mission, ids)
+  index.save(path)
+  return len(index)
+
+def main():
+  # imports locais: load_data também importa este módulo
+  from scripts.load_data import read_raw, planet_ids
+
+  ap = argparse.ArgumentParser()
+  ap.add_argument("--missions", nargs="+", default=["koi", "toi", "k2"], choices=["koi", "toi", "k2"])
+  args = ap.parse_args()
+
+  # montado em memória e gravado uma vez no fim (save é atômico): a API nunca vê um índice vazio ou parcial
+  index, loaded = SimilarityIndex.empty(), []
+  for mission in args.missions:
+    try:
+      df_raw = read_raw(mission)
+    except FileNotFoundError:
+      print(f"⚠️ No raw file for {mission}, skipping")
+      continue
+    index = upsert_mission(index, df_raw, mission, planet_ids(df_raw, mission))
+    loaded.append(mission)
+  if not loaded:
+    print("❌ No raw file found; similarity index left unchanged")
+    return
+  index.save(settings.database.similarity_index_path)
+  print(f"✅ Similarity index rebuilt with {len(index)} planets ({', '.join(loaded)})")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,35 @@
+import pandas as pd
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from database.snapshots import new_snapshot
+from database.models.exoplanet import Exoplanet
+from database.models.star import Stars
+from database.repositorys.catalog_backend import facet_code_expressions
+from app.backend.catalog.star_summaries import star_summaries
+
+def rebuild_star_summaries(session: Session) -> int:
+  """Recompute the per-star summary columns (planet count, max probability, HZ candidates, missions)."""
+  conn = session.connection()
+  stars = pd.read_sql(select(Stars.id, Stars.missions), conn)
+  planets = pd.read_sql(select(Exoplanet.star_id, Exoplanet.probability, Exoplanet.equilibrium_tempk, Exoplanet.radius_earth), conn)
+  summaries = star_summaries(stars, planets)
+  rows = summaries.astype(object).where(summaries.notna(), None).to_dict("records")
+  if rows:
+    session.execute(update(Stars), rows)
+  return len(rows)
+
+def rebuild_planet_facets(session: Session) -> int:
+  """Recompute the search facet codes (mission, probability bucket, radius class) of every planet."""
+  return session.execute(
+    update(Exoplanet).values(**facet_code_expressions()).execution_options(synchronize_session=False)
+  ).rowcount
+
+def main():
+  with new_snapshot() as engine, Session(engine) as session:
+    n = rebuild_star_summaries(session)
+    m = rebuild_planet_facets(session)
+    session.commit()
+  print(f"✅ Summaries of {n} stars and facet codes of {m} planets rebuilt")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,34 @@
+import argparse
+from typing import Dict
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from database.database import current_engine
+from database.models.exoplanet import Exoplanet
+from database.models.star import Stars
+from app.backend.ai.utils import file_lock
+from app.backend.catalog.static_shards import DEFAULT_MAX_SHARD_STARS, STAR_FIELDS, PLANET_FIELDS, build_shards, write_static_catalog
+from settings import settings
+
+def rebuild_static_catalog(session: Session, max_stars: int = DEFAULT_MAX_SHARD_STARS) -> Dict:
+  """Write the precompressed catalog shards and manifest served under /catalog."""
+  conn = session.connection()
+  stars = pd.read_sql(select(*[getattr(Stars, c) for c in STAR_FIELDS]), conn)
+  planets = pd.read_sql(select(Exoplanet.star_id, *[getattr(Exoplanet, c) for c in PLANET_FIELDS]).order_by(Exoplanet.id), conn)
+  shards, lengths = build_shards(stars, planets, max_stars)
+  folder = settings.database.static_catalog_path
+  with file_lock(folder):
+    return write_static_catalog(folder, shards, lengths)
+
+def main():
+  ap = argparse.ArgumentParser(description="Build the static, precompressed catalog shards from the current database.")
+  ap.add_argument("--max_stars", type=int, default=DEFAULT_MAX_SHARD_STARS, help="Maximum stars per shard")
+  args = ap.parse_args()
+  # lê o snapshot publicado (não escreve no banco)
+  with Session(current_engine()) as session:
+    manifest = rebuild_static_catalog(session, args.max_stars)
+  n = sum(len(m["shards"]) for m in manifest["missions"].values())
+  print(f"✅ {n} catalog shards written to {settings.database.static_catalog_path}")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,26 @@
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from database.snapshots import new_snapshot
+from database.models.exoplanet import Exoplanet
+from database.models.star import Stars
+from database.repositorys.system_payload_repository import SystemPayloadRepository
+from app.backend.catalog.system_payloads import build_system_payloads, payload_etag
+
+def rebuild_system_payloads(session: Session) -> int:
+  """Recompute the cached render payload of every star from the current catalog."""
+  conn = session.connection()
+  stars = pd.read_sql(select(Stars), conn)
+  planets = pd.read_sql(select(Exoplanet), conn)
+  payloads = build_system_payloads(stars, planets)
+  etags = {sid: payload_etag(p) for sid, p in payloads.items()}
+  return SystemPayloadRepository.replaceAll(session, payloads, etags)
+
+def main():
+  with new_snapshot() as engine, Session(engine) as session:
+    n = rebuild_system_payloads(session)
+    session.commit()
+  print(f"✅ {n} system payloads rebuilt")
+
+if __name__ == "__main__":
+  main()
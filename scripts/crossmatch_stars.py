@@ -0,0 +1,124 @@
+import argparse
+from typing import Optional
+import pandas as pd
+from sqlalchemy import select, text, update, insert
+from sqlalchemy.orm import Session
+from database.snapshots import new_snapshot
+from database.models.star import Stars
+from database.models.star_alias import StarAlias
+from app.backend.catalog.crossmatch import crossmatch, MISSION_PRIORITY
+from settings import settings
+
+STAR_FIELDS = ["effective_tempk", "mass_solar", "radius_solar", "metallicity_feh", "age_gyr", "ra", "dec"]
+
+def star_sources(df_raw: pd.DataFrame, mission: str) -> pd.DataFrame:
+  """One record per mission-local star (source_id, mission, ra, dec, tic_id)."""
+  if mission == "koi":
+    ids = df_raw["kepoi_name"].astype(str).str.split(".").str[0]
+    tic = pd.Series(None, index=df_raw.index, dtype="object")
+  elif mission == "toi":
+    ids = "T" + df_raw["toipfx"].astype(str)
+    tic = df_raw["tid"] if "tid" in df_raw.columns else pd.Series(None, index=df_raw.index, dtype="object")
+  else:
+    ids = df_raw["epic_hostname"].astype(str).str.replace(" ", "", regex=False)
+    tic = df_raw["tic_id"] if "tic_id" in df_raw.columns else pd.Series(None, index=df_raw.index, dtype="object")
+  out = pd.DataFrame({
+    "source_id": ids,
+    "mission": mission,
+    "ra": pd.to_numeric(df_raw.get("ra"), errors="coerce") if "ra" in df_raw.columns else None,
+    "dec": pd.to_numeric(df_raw.get("dec"), errors="coerce") if "dec" in df_raw.columns else None,
+    "tic_id": tic.astype("string").where(tic.notna(), None),
+  })
+  return out.drop_duplicates("source_id")
+
+def planet_source_id(planet_id: str) -> str:
+  """Mission-local star id of a planet id as written by load_data ("K00001.01" -> "K00001", "TOI123.01" -> "T123")."""
+  base = planet_id.rsplit(".", 1)[0]
+  return "T" + base[3:] if base.startswith("TOI") else base
+
+def backfill_source_stars(session: Session) -> None:
+  # planetas gravados antes de source_star_id: origem derivada do id (se for um registro conhecido) ou a estrela atual
+  conn = session.connection()
+  planets = pd.read_sql(text("SELECT id, star_id FROM exoplanets WHERE source_star_id IS NULL"), conn)
+  if planets.empty:
+    return
+  known = set(pd.read_sql(select(StarAlias.source_id), conn)["source_id"])
+  derived = planets["id"].astype(str).map(planet_source_id)
+  planets["source"] = derived.where(derived.isin(known), planets["star_id"].astype(str))
+  params = [{"id": i, "src": s} for i, s in zip(planets["id"], planets["source"])]
+  session.execute(text("UPDATE exoplanets SET source_star_id = :src WHERE id = :id"), params)
+
+def upsert_sources(session: Session, sources: pd.DataFrame) -> None:
+  """Store the mission records, with the stellar fields just written to `stars` under their source ids."""
+  conn = session.connection()
+  stars = pd.read_sql(select(Stars.id, *[getattr(Stars, f) for f in STAR_FIELDS if f not in ("ra", "dec")]), conn)
+  records = sources.merge(stars.rename(columns={"id": "source_id"}), on="source_id", how="left")
+  records["canonical_id"] = records["source_id"]
+
+  # a ingestão de uma missão substitui todos os registros dela
+  session.query(StarAlias).filter(StarAlias.mission.in_(sources["mission"].unique().tolist())).delete(synchronize_session=False)
+  rows = records.astype(object).where(records.notna(), None).to_dict("records")
+  if rows:
+    session.execute(insert(StarAlias), rows)
+
+def rebuild_crossmatch(session: Session, radius_arcsec: Optional[float] = None) -> int:
+  """
+  Recompute canonical ids over every ingested star record and fold duplicated stars: the
+  canonical row takes, per field, the first non-null value in mission priority order, every
+  planet is pointed at the canonical id of its source record (so links that disappear give the
+  planets back to their own star) and the duplicated rows are removed. Returns the number of
+  folded records.
+  """
+  radius = radius_arcsec or settings.data.crossmatch_radius_arcsec
+  conn = session.connection()
+  aliases = pd.read_sql(select(StarAlias), conn)
+  matched = crossmatch(aliases, radius)
+  if matched.empty:
+    return 0
+
+  session.execute(update(StarAlias), matched[["source_id", "canonical_id", "method"]].to_dict("records"))
+
+  members = aliases.drop(columns=["canonical_id", "method"]).merge(matched[["source_id", "canonical_id"]], on="source_id")
+  members["priority"] = members["mission"].map(MISSION_PRIORITY)
+  members.sort_values(["canonical_id", "priority", "source_id"], inplace=True)
+
+  # campos da estrela canônica: primeiro valor não nulo na ordem de prioridade das missões
+  grouped = members.groupby("canonical_id", sort=False)
+  merged = grouped[STAR_FIELDS].first()
+  merged["missions"] = grouped["mission"].agg(lambda m: ",".join(sorted(set(m))))
+  merged = merged.astype(object).where(merged.notna(), None)
+
+  existing_ids = set(pd.read_sql(select(Stars.id), conn)["id"])
+  rows = [dict(id=cid, **vals) for cid, vals in merged.to_dict("index").items()]
+  existing = [r for r in rows if r["id"] in existing_ids]
+  missing = [r for r in rows if r["id"] not in existing_ids]
+  if existing:
+    session.execute(update(Stars), existing)
+  if missing:
+    session.execute(insert(Stars), missing)
+
+  backfill_source_stars(session)
+  session.execute(text(
+    "UPDATE exoplanets SET star_id = a.canonical_id FROM star_aliases a "
+    "WHERE a.source_id = exoplanets.source_star_id AND a.canonical_id IS NOT NULL "
+    "AND exoplanets.star_id IS NOT a.canonical_id"
+  ))
+
+  moved = members[members["source_id"] != members["canonical_id"]]
+  if len(moved):
+    params = [{"src": s} for s in moved["source_id"]]
+    session.execute(text("DELETE FROM system_payloads WHERE star_id = :src"), params)
+    session.execute(text("DELETE FROM stars WHERE id = :src"), params)
+  return len(moved)
+
+def main():
+  ap = argparse.ArgumentParser(description="Cross-match stars across KOI/TOI/K2 into canonical ids.")
+  ap.add_argument("--radius_arcsec", type=float, default=None)
+  args = ap.parse_args()
+  with new_snapshot() as engine, Session(engine) as session:
+    n = rebuild_crossmatch(session, args.radius_arcsec)
+    session.commit()
+  print(f"✅ Cross-match done: {n} duplicated stars folded")
+
+if __name__ == "__main__":
+  main()
@@ -1,38 +1,86 @@
 import argparse, os, sys
 import numpy as np
 import pandas as pd
-import joblib
+from typing import Dict, Iterable, Tuple
+from sqlalchemy import or_, update
 from sqlalchemy.orm import Session
-from database.database import engine
 from database.models.exoplanet import Exoplanet
 from database.models.star import Stars
-from app.backend.ai.data_utils import basic_clean
-from app.backend.ai.feature_engineering import build_features
+from app.backend.ai.data_utils import basic_clean, read_typed_csv
+from app.backend.ai.feature_engineering import build_features, raw_columns_for
+from app.backend.catalog.similarity import PLANET_RENAME, SIMILARITY_FEATURES
+from app.backend.ai.model_registry import ModelRegistry, load_active_bundle
 from settings import settings
-from database.database import init_db
+from database.database import current_engine
+from database.snapshots import new_snapshot
+from scripts.build_system_payloads import rebuild_system_payloads
+from scripts.build_star_summaries import rebuild_star_summaries, rebuild_planet_facets
+from scripts.build_explanations import store_explanations
+from scripts.crossmatch_stars import star_sources, upsert_sources, rebuild_crossmatch
+from scripts.build_similarity_index import update_similarity_index
+from scripts.build_static_catalog import rebuild_static_catalog
 
-def main():
-  ap = argparse.ArgumentParser()
-  ap.add_argument("--mission", required=True, help="Mission name (koi or toi)")
-  args = ap.parse_args()
+# prefixo dos ids de exoplanetas por missão (mesma convenção da busca)
+MISSION_ID_PREFIX = {"koi": "K", "toi": "TOI", "k2": "EPIC"}
+
+def load_bundle(mission: str) -> Tuple[Dict, str]:
+  legacy_path = {
+    "koi": settings.data.path_model_koi,
+    "toi": settings.data.path_model_toi,
+    "k2": settings.data.path_model_k2,
+  }[mission]
+  return load_active_bundle(ModelRegistry(settings.data.registry_folder), mission, legacy_path)
 
-  if args.mission == "koi":
-    data_path = settings.data.path_raw_koi
-    model_path = settings.data.path_model_koi
-    id_column = "kepid"
-  else:
-    data_path = settings.data.path_raw_toi
-    model_path = settings.data.path_model_toi
-    id_column = "toi"
-
-  bundle = joblib.load(model_path)
-  model = bundle["model"]
+# colunas do CSV usadas na ingestão, além das features do modelo: ids/nomes (lidos como texto)
+# e valores gravados no banco (float64, sem perder precisão); manter em sincronia com main()
+RAW_ID_COLUMNS = {
+  "koi": ["kepid", "kepoi_name", "kepler_name"],
+  "toi": ["toi", "toipfx", "tid"],
+  "k2": ["epic_hostname", "epic_candname", "pl_name", "tic_id"],
+}
+RAW_DB_COLUMNS = {
+  "koi": ["koi_steff", "koi_smass", "koi_srad", "koi_smet", "koi_sage", "ra", "dec", "koi_score",
+          "koi_prad", "koi_teq", "koi_period", "koi_sma", "koi_eccen", "koi_incl"],
+  "toi": ["st_teff", "st_rad", "ra", "dec", "pl_rade", "pl_eqt", "pl_orbper"],
+  "k2": ["st_teff", "st_mass", "st_rad", "st_met", "st_age", "ra", "dec", "pl_rade", "pl_eqt",
+         "pl_orbper", "pl_orbsmax", "pl_orbeccen", "pl_orbincl", "default_flag"],
+}
+
+def read_raw(mission: str, features: Iterable[str]=()) -> pd.DataFrame:
+  """
+  Only the columns the ingestion needs: `features` of the model (their raw inputs, as float32),
+  the similarity index inputs, the ids and the DB mapping; the archive's other columns are skipped.
+  """
+  path = {"koi": settings.data.path_raw_koi, "toi": settings.data.path_raw_toi, "k2": settings.data.path_raw_k2}[mission]
+  model_cols = raw_columns_for([*features, *SIMILARITY_FEATURES]) | set(PLANET_RENAME)
+  df_raw = read_typed_csv(
+    path,
+    usecols=model_cols | set(RAW_ID_COLUMNS[mission]) | set(RAW_DB_COLUMNS[mission]),
+    float32=model_cols - set(RAW_DB_COLUMNS[mission]) - set(RAW_ID_COLUMNS[mission]),
+    float64=RAW_DB_COLUMNS[mission],
+    text=RAW_ID_COLUMNS[mission],
+  )
+  if mission == "k2":
+    # k2pandc tem uma linha por referência: manter só a solução padrão de cada candidato
+    if "default_flag" in df_raw.columns:
+      df_raw = df_raw[df_raw["default_flag"] == 1]
+    df_raw = df_raw.drop_duplicates(subset=["epic_candname"]).reset_index(drop=True)
+  return df_raw
+
+def planet_ids(df_raw: pd.DataFrame, mission: str) -> pd.Series:
+  if mission == "koi":
+    return df_raw["kepoi_name"].astype(str)
+  if mission == "k2":
+    return df_raw["epic_candname"].astype(str).str.replace(" ", "", regex=False)
+  return "TOI" + df_raw["toi"].astype(str)
+
+def model_inputs(df_raw: pd.DataFrame, mission: str, bundle: Dict) -> Tuple[np.ndarray, np.ndarray]:
+  """(features before imputation, imputed matrix fed to the model), both in `bundle["features"]` order."""
   imputer = bundle["imputer"]
   feat_names = bundle["features"]
 
-  df_raw = pd.read_csv(data_path)
-  df = basic_clean(df_raw, dataset=args.mission)
-  Xfe, _ = build_features(df, dataset=args.mission)
+  df = basic_clean(df_raw, dataset=mission)
+  Xfe, _ = build_features(df, dataset=mission)
 
   # garantir TODAS as features esperadas (as ausentes viram NaN)
   for c in feat_names:
@@ -40,75 +88,186 @@ def main():
         Xfe[c] = np.nan
   Xfe = Xfe[feat_names]  # mesma ordem
 
-  # imputar + predição
-  X_np = imputer.transform(Xfe)
-  probs = model.predict_proba(X_np)[:, 1]
+  # valores crus (exibidos nas explicações) + matriz imputada
+  X_raw = Xfe.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+  return X_raw, imputer.transform(Xfe)
+
+def rescore_stale(session: Session, mission: str, df_raw: pd.DataFrame, bundle: Dict, model_version: str) -> int:
+  """Recompute only the probabilities that were produced by a different model version."""
+  stale = {
+    r[0] for r in session.query(Exoplanet.id)
+      .filter(Exoplanet.id.like(f"{MISSION_ID_PREFIX[mission]}%"))
+      .filter(or_(Exoplanet.model_version.is_(None), Exoplanet.model_version != model_version))
+  }
+  if not stale:
+    return 0
+  ids = planet_ids(df_raw, mission)
+  mask = ids.isin(stale).to_numpy()
+  if not mask.any():
+    return 0
+  X_raw, X_np = model_inputs(df_raw[mask], mission, bundle)
+  probs = bundle["model"].predict_proba(X_np)[:, 1]
+  rows = [
+    {"id": pid, "probability": float(p), "model_version": model_version}
+    for pid, p in zip(ids[mask], probs)
+  ]
+  session.execute(update(Exoplanet), rows)
+  # explicações acompanham a versão do modelo que gerou a probabilidade
+  store_explanations(session, ids[mask].tolist(), X_raw, X_np, bundle, model_version)
+  return len(rows)
+
+def main():
+  ap = argparse.ArgumentParser()
+  ap.add_argument("--mission", required=True, choices=["koi", "toi", "k2"], help="Mission name (koi, toi or k2)")
+  args = ap.parse_args()
+
+  id_column = {"koi": "kepid", "toi": "toi", "k2": "epic_hostname"}[args.mission]
+
+  bundle, model_version = load_bundle(args.mission)
+
+  df_raw = read_raw(args.mission, bundle["features"])
+  X_raw, X_np = model_inputs(df_raw, args.mission, bundle)
+  probs = bundle["model"].predict_proba(X_np)[:, 1]
     
   #Salvando os dados no banco de dados
   df_raw['probability'] = probs
   stars_df = df_raw.drop_duplicates(subset=[id_column])
 
-  init_db()
-  
-  if args.mission == "koi":
+  # tudo num snapshot novo do banco, publicado (ANALYZE + VACUUM + troca do ponteiro) só se a ingestão terminar
+  with new_snapshot() as engine:
+    if args.mission == "koi":
+      with Session(engine) as session:
+        for _, row in stars_df.iterrows():
+          star = Stars(
+            id=str(row["kepoi_name"]).split(".")[0],
+            effective_tempk=row.get("koi_steff"),
+            mass_solar=row.get("koi_smass"),
+            radius_solar=row.get("koi_srad"),
+            metallicity_feh=row.get("koi_smet"),
+            age_gyr=row.get("koi_sage"),
+            ra=row.get("ra"),
+            dec=row.get("dec"),
+            missions="koi"
+          )
+          session.merge(star)
+
+        for _, row in df_raw.iterrows():
+          planet = Exoplanet(
+            id=str(row["kepoi_name"]),
+            star_id=str(row["kepoi_name"]).split(".")[0],
+            source_star_id=str(row["kepoi_name"]).split(".")[0],
+            name=row.get("kepler_name"),
+            probability=row.get("probability"),
+            koi_score=row.get("koi_score"),
+            radius_earth=row.get("koi_prad"),
+            equilibrium_tempk=row.get("koi_teq"),
+            orbital_period_days=row.get("koi_period"),
+            semi_major_axis=row.get("koi_sma"),
+            eccentricity=row.get("koi_eccen"),
+            inclination_deg=row.get("koi_incl"),
+            model_version=model_version
+          )
+          session.merge(planet)
+
+        session.commit()
+    elif args.mission == "k2":
+      with Session(engine) as session:
+        for _, row in stars_df.iterrows():
+          star = Stars(
+            id=str(row["epic_hostname"]).replace(" ", ""),
+            effective_tempk=row.get("st_teff"),
+            mass_solar=row.get("st_mass"),
+            radius_solar=row.get("st_rad"),
+            metallicity_feh=row.get("st_met"),
+            age_gyr=row.get("st_age"),
+            ra=row.get("ra"),
+            dec=row.get("dec"),
+            missions="k2"
+          )
+          session.merge(star)
+
+        for _, row in df_raw.iterrows():
+          planet = Exoplanet(
+            id=str(row["epic_candname"]).replace(" ", ""),
+            star_id=str(row["epic_hostname"]).replace(" ", ""),
+            source_star_id=str(row["epic_hostname"]).replace(" ", ""),
+            name=row.get("pl_name"),
+            probability=row.get("probability"),
+            radius_earth=row.get("pl_rade"),
+            equilibrium_tempk=row.get("pl_eqt"),
+            orbital_period_days=row.get("pl_orbper"),
+            semi_major_axis=row.get("pl_orbsmax"),
+            eccentricity=row.get("pl_orbeccen"),
+            inclination_deg=row.get("pl_orbincl"),
+            model_version=model_version
+          )
+          session.merge(planet)
+
+        session.commit()
+    else:
+      with Session(engine) as session:
+        for _, row in stars_df.iterrows():
+          star = Stars(
+            id=f"T{row['toipfx']}",
+            effective_tempk=row.get("st_teff"),
+            mass_solar=None, 
+            radius_solar=row.get("st_rad"),
+            metallicity_feh=None, 
+            age_gyr=None,
+            ra=row.get("ra"),
+            dec=row.get("dec"),
+            missions="toi"
+          )
+          session.merge(star)
+
+        for _, row in df_raw.iterrows():
+          planet = Exoplanet(
+            id=f"TOI{row['toi']}",
+            star_id=f"T{row['toipfx']}",
+            source_star_id=f"T{row['toipfx']}",
+            name=f"TOI{row['toi']}",
+            probability=row.get("probability"),
+            radius_earth=row.get("pl_rade"),
+            equilibrium_tempk=row.get("pl_eqt"),
+            orbital_period_days=row.get("pl_orbper"),
+            semi_major_axis=None ,
+            eccentricity=None ,
+            inclination_deg=None,
+            model_version=model_version
+          )
+          session.merge(planet)
+
+        session.commit()
+
+    # Explicações SHAP (top-k features por planeta), servidas prontas em /exoplanets/{id}/explain
     with Session(engine) as session:
-      for _, row in stars_df.iterrows():
-        star = Stars(
-          id=str(row["kepoi_name"]).split(".")[0],
-          effective_tempk=row.get("koi_steff"),
-          mass_solar=row.get("koi_smass"),
-          radius_solar=row.get("koi_srad"),
-          metallicity_feh=row.get("koi_smet"),
-          age_gyr=row.get("koi_sage")
-        )
-        session.merge(star)
-
-      for _, row in df_raw.iterrows():
-        planet = Exoplanet(
-          id=str(row["kepoi_name"]),
-          star_id=str(row["kepoi_name"]).split(".")[0],
-          name=row.get("kepler_name"),
-          probability=row.get("probability"),
-          koi_score=row.get("koi_score"),
-          radius_earth=row.get("koi_prad"),
-          equilibrium_tempk=row.get("koi_teq"),
-          orbital_period_days=row.get("koi_period"),
-          semi_major_axis=row.get("koi_sma"),
-          eccentricity=row.get("koi_eccen"),
-          inclination_deg=row.get("koi_incl")
-        )
-        session.merge(planet)
+      store_explanations(session, planet_ids(df_raw, args.mission).tolist(), X_raw, X_np, bundle, model_version)
+      session.commit()
 
+    # Cross-match entre missões: uma estrela canônica por estrela física
+    with Session(engine) as session:
+      upsert_sources(session, star_sources(df_raw, args.mission))
+      rebuild_crossmatch(session)
       session.commit()
-  else:
+
+    # Resumo por estrela (contagem, maior probabilidade, candidatos na zona habitável, missões) para rankings
+    # e códigos das facetas da busca por planeta
     with Session(engine) as session:
-      for _, row in stars_df.iterrows():
-        star = Stars(
-          id=f"T{row['toipfx']}",
-          effective_tempk=row.get("st_teff"),
-          mass_solar=None, 
-          radius_solar=row.get("st_rad"),
-          metallicity_feh=None, 
-          age_gyr=None 
-        )
-        session.merge(star)
-
-      for _, row in df_raw.iterrows():
-        planet = Exoplanet(
-          id=f"TOI{row['toi']}",
-          star_id=f"T{row['toipfx']}",
-          name=f"TOI{row['toi']}",
-          probability=row.get("probability"),
-          radius_earth=row.get("pl_rade"),
-          equilibrium_tempk=row.get("pl_eqt"),
-          orbital_period_days=row.get("pl_orbper"),
-          semi_major_axis=None ,
-          eccentricity=None ,
-          inclination_deg=None
-        )
-        session.merge(planet)
+      rebuild_star_summaries(session)
+      rebuild_planet_facets(session)
+      session.commit()
 
+    # Payloads de renderização (órbitas, cores, classes de tamanho) pré-calculados por sistema
+    with Session(engine) as session:
+      rebuild_system_payloads(session)
       session.commit()
+
+  # Índice de similaridade: só as linhas da missão ingerida são recalculadas
+  update_similarity_index(df_raw, args.mission, planet_ids(df_raw, args.mission))
+
+  # Shards estáticos pré-comprimidos (gzip/brotli) do snapshot publicado, servidos em /catalog
+  with Session(current_engine()) as session:
+    rebuild_static_catalog(session)
     
 
 if __name__ == "__main__":
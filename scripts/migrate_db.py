@@ -0,0 +1,15 @@
+from database.database import missing_schema
+from database.snapshots import new_snapshot
+
+def main():
+  missing = missing_schema()
+  if not missing:
+    print("✅ Database schema is up to date")
+    return
+  # new_snapshot cria as tabelas/colunas que faltam na cópia e só então a publica
+  with new_snapshot():
+    pass
+  print(f"✅ Published a migrated snapshot ({len(missing)} tables/columns added)")
+
+if __name__ == "__main__":
+  main()
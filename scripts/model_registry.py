@@ -0,0 +1,68 @@
+import argparse, json
+from sqlalchemy.orm import Session
+from database.database import current_engine
+from database.snapshots import new_snapshot
+from app.backend.ai.model_registry import ModelRegistry
+from scripts.load_data import rescore_stale, read_raw
+from scripts.build_system_payloads import rebuild_system_payloads
+from scripts.build_star_summaries import rebuild_star_summaries, rebuild_planet_facets
+from scripts.build_static_catalog import rebuild_static_catalog
+from settings import settings
+
+def main():
+  ap = argparse.ArgumentParser(description="Versioned model bundles: register, promote and list.")
+  sub = ap.add_subparsers(dest="command", required=True)
+
+  reg = sub.add_parser("register", help="Add a bundle (model/imputer/features) as a new version")
+  reg.add_argument("--mission", required=True, choices=["koi", "toi", "k2"])
+  reg.add_argument("--bundle", required=True, help="Path to a .joblib bundle saved by scripts/train_model.py")
+  reg.add_argument("--metadata", default=None, help="Optional JSON file with extra metadata (metrics, params...)")
+  reg.add_argument("--promote", action="store_true")
+
+  pro = sub.add_parser("promote", help="Make a version active (atomic pointer swap)")
+  pro.add_argument("--mission", required=True, choices=["koi", "toi", "k2"])
+  pro.add_argument("--version", required=True)
+  pro.add_argument("--rescore", action="store_true", help="Recompute probabilities produced by other versions")
+
+  ls = sub.add_parser("list", help="List versions")
+  ls.add_argument("--mission", required=True, choices=["koi", "toi", "k2"])
+
+  args = ap.parse_args()
+  registry = ModelRegistry(settings.data.registry_folder)
+
+  if args.command == "list":
+    for meta in registry.list_versions(args.mission):
+      flag = "*" if meta["active"] else " "
+      print(f"{flag} {meta['version']}  {meta.get('registered_at', '')}")
+    return
+
+  if args.command == "register":
+    metadata = None
+    if args.metadata:
+      with open(args.metadata, "r", encoding="utf-8") as f:
+        metadata = json.load(f)
+    version = registry.register(args.mission, args.bundle, metadata)
+    print(f"✅ Registered {args.mission} version {version}")
+    if args.promote:
+      registry.promote(args.mission, version)
+      print(f"✅ Promoted {args.mission} version {version}")
+    return
+
+  registry.promote(args.mission, args.version)
+  print(f"✅ Promoted {args.mission} version {args.version}")
+
+  if args.rescore:
+    bundle, version = registry.load(args.mission, args.version)
+    df_raw = read_raw(args.mission, bundle["features"])
+    with new_snapshot() as engine, Session(engine) as session:
+      n = rescore_stale(session, args.mission, df_raw, bundle, version)
+      rebuild_star_summaries(session)
+      rebuild_planet_facets(session)
+      rebuild_system_payloads(session)
+      session.commit()
+    with Session(current_engine()) as session:
+      rebuild_static_catalog(session)
+    print(f"✅ Rescored {n} {args.mission} exoplanets with version {version}")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,93 @@
+from __future__ import annotations
+import argparse, os, subprocess, sys, time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+from app.backend.ai.feature_cache import load_or_build
+from app.backend.ai.utils import get_logger, ensure_dir, save_json
+
+DATASETS = ["kepler", "toi", "k2"]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# variáveis lidas pelas bibliotecas nativas (OpenMP do LightGBM, BLAS do numpy/sklearn)
+THREAD_ENV_VARS = ["OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"]
+
+logger = get_logger("train_all")
+
+def split_cpu_budget(weights: Dict[str, float], cpus: int) -> Dict[str, int]:
+    """Threads per dataset proportional to `weights` (largest remainder), at least 1 each."""
+    total = sum(weights.values()) or 1.0
+    spare = max(cpus - len(weights), 0)
+    exact = {k: spare * w / total for k, w in weights.items()}
+    out = {k: 1 + int(v) for k, v in exact.items()}
+    left = cpus - sum(out.values())
+    for k in sorted(exact, key=lambda k: exact[k] - int(exact[k]), reverse=True)[:max(left, 0)]:
+        out[k] += 1
+    return out
+
+def _prepare(dataset: str, data_dir: str, cache_dir: str, label) -> int:
+    df_raw, _, _, _ = load_or_build(dataset, data_dir, cache_dir, label)
+    return len(df_raw)
+
+def prepare_features(datasets: List[str], data_dir: str, cache_dir: str, label=None) -> Dict[str, int]:
+    """Build every dataset's feature cache once, concurrently; returns rows per dataset."""
+    with ProcessPoolExecutor(max_workers=len(datasets)) as ex:
+        futures = {ds: ex.submit(_prepare, ds, data_dir, cache_dir, label) for ds in datasets}
+        return {ds: f.result() for ds, f in futures.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Train several datasets concurrently (extra args go to scripts.train_model, run from the repo root)")
+    parser.add_argument("--datasets", type=str, nargs="+", default=DATASETS, choices=DATASETS)
+    parser.add_argument("--data_dir", type=str, default="./data")
+    parser.add_argument("--out_dir", type=str, default="./results")
+    parser.add_argument("--cpus", type=int, default=os.cpu_count() or 1, help="Total CPU budget split among the datasets")
+    parser.add_argument("--cache_dir", type=str, default="cache/features")
+    parser.add_argument("--label", type=str, default=None)
+    args, extra = parser.parse_known_args()
+
+    t0 = time.perf_counter()
+    rows = prepare_features(args.datasets, args.data_dir, args.cache_dir, args.label)
+    prepare_s = time.perf_counter() - t0
+    # mais threads para os datasets maiores (o custo do LightGBM cresce com as linhas)
+    threads = split_cpu_budget({ds: float(n) for ds, n in rows.items()}, args.cpus)
+    logger.info(f"Features ready in {prepare_s:.1f}s; thread budget {threads} of {args.cpus} CPUs")
+
+    procs, started, logs = {}, {}, {}
+    for ds in args.datasets:
+        cmd = [
+            sys.executable, "-m", "scripts.train_model", "--dataset", ds, "--data_dir", os.path.abspath(args.data_dir),
+            "--out_dir", os.path.abspath(args.out_dir), "--feature_cache", os.path.abspath(args.cache_dir), "--n_threads", str(threads[ds]), *extra,
+        ]
+        if args.label:
+            cmd += ["--label", args.label]
+        env = dict(os.environ, **{v: str(threads[ds]) for v in THREAD_ENV_VARS})
+        ensure_dir(os.path.join(args.out_dir, ds))
+        logs[ds] = open(os.path.join(args.out_dir, ds, "train.log"), "w")
+        started[ds] = time.perf_counter()
+        # a partir da raiz do repositório: `scripts.train_model` e o pacote `app` resolvem sem PYTHONPATH
+        procs[ds] = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=logs[ds], stderr=subprocess.STDOUT)
+
+    runs = {}
+    while len(runs) < len(procs):
+        for ds, proc in procs.items():
+            code = proc.poll()
+            if ds in runs or code is None:
+                continue
+            logs[ds].close()
+            runs[ds] = {"rows": rows[ds], "threads": threads[ds], "wall_s": time.perf_counter() - started[ds], "returncode": code}
+            status = "ok" if code == 0 else f"failed (exit {code}), see {args.out_dir}/{ds}/train.log"
+            logger.info(f"[{ds}] {status} in {runs[ds]['wall_s']:.1f}s with {threads[ds]} threads")
+        time.sleep(0.2)
+
+    total = time.perf_counter() - t0
+    report = {
+        "cpus": args.cpus, "prepare_s": prepare_s, "total_wall_s": total,
+        "sum_of_runs_s": sum(r["wall_s"] for r in runs.values()),
+        "longest_run_s": max(r["wall_s"] for r in runs.values()), "runs": runs,
+    }
+    save_json(report, os.path.join(args.out_dir, "train_all.json"))
+    logger.info(f"Total {total:.1f}s (longest dataset {report['longest_run_s']:.1f}s, sum {report['sum_of_runs_s']:.1f}s)")
+    if any(r["returncode"] != 0 for r in runs.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,6 @@ from __future__ import annotations
 import argparse, os, sys, time, json
 import numpy as np
 import pandas as pd
-from sklearn.impute import SimpleImputer
 from typing import Optional
 
 # Add src directory to sys.path
@@ -12,15 +11,201 @@ if SRC_DIR not in sys.path:
     sys.path.append(SRC_DIR)
 
 
-from app.backend.ai.utils import set_seed, get_logger, ensure_dir, save_json
-from app.backend.ai.data_utils import load_dataset, infer_label, basic_clean, train_val_test_split
-from app.backend.ai.feature_engineering import build_features, select_feature_columns
-from app.backend.ai.modeling import optuna_cv, fit_final_model
+from app.backend.ai.utils import set_seed, get_logger, ensure_dir, save_json, upsert_csv_rows
+from app.backend.ai.data_utils import load_dataset, dataset_path, infer_label, basic_clean, train_val_test_split
+from app.backend.ai.feature_engineering import build_features, select_feature_columns, raw_columns_for
+from app.backend.ai.feature_cache import load_or_build
+from app.backend.ai.modeling import optuna_cv, fit_final_model, continue_training, balanced_weights, build_lgb_dataset, optuna_cv_dataset, fit_final_booster
+from app.backend.ai.out_of_core import (
+    DEFAULT_CHUNK_ROWS, stream_csv_to_memmap, compact_columns, fit_median_imputer, impute_inplace, predict_rows
+)
+from app.backend.ai.imputation import StreamingMedianImputer
+from app.backend.ai.incremental import (
+    DRIFT_THRESHOLD, state_path, row_hashes, split_delta, drift_report, incremental_rounds,
+    load_training_state, save_training_state, new_training_state
+)
+from app.backend.ai.profiling import StageProfiler, peak_rss_mb
+from app.backend.ai.feature_pruning import (
+    DEFAULT_AUC_TOLERANCE, DEFAULT_MIN_FEATURES, prune_features, scoring_cost, pruning_report
+)
 from app.backend.ai.evaluation import (
     compute_all_metrics, plot_roc, plot_pr, plot_feature_importance,
-    plot_calibration, plot_shap_summary, precision_at_k
+    plot_calibration, plot_shap_summary, precision_at_k, bootstrap_metrics
 )
 
+SHAP_MAX_ROWS = 5000
+
+def load_features(args, prof: StageProfiler):
+    if args.feature_cache:
+        # frames limpos + features prontos, montados uma vez por versão do CSV (ver train_all)
+        with prof.stage("load_csv"):
+            df_raw, Xfe, y, _ = load_or_build(args.dataset, args.data_dir, args.feature_cache, args.label)
+    else:
+        with prof.stage("load_csv"):
+            df_raw = load_dataset(args.dataset, args.data_dir)
+        with prof.stage("build_features"):
+            df = basic_clean(df_raw, args.dataset)
+            y, ycol = infer_label(df, args.dataset, args.label)
+            Xfe, feats_info = build_features(df, args.dataset)
+
+    # identify groups to prevent leakage if available
+    group_col = None
+    for c in ["kepid","k2_name","tid","tic_id","epic_hostname","hostname"]:
+        if c in df_raw.columns:
+            group_col = c
+            break
+    groups = df_raw[group_col] if group_col else None
+    if groups is not None and groups.isna().any():
+        # linhas sem identificador viram grupos próprios (o GroupShuffleSplit não aceita NaN)
+        groups = groups.astype(object).where(groups.notna(), "row-" + df_raw.index.astype(str))
+    return df_raw, Xfe, y, groups
+
+def new_imputer(args, feature_cols):
+    """Median imputer of the in-memory path: "sketch" = medianas aproximadas em uma passada (KLL)."""
+    from sklearn.impute import SimpleImputer
+    return SimpleImputer(strategy="median") if args.imputer == "exact" else StreamingMedianImputer(feature_cols)
+
+def select_pruned_features(args, logger, Xtr: pd.DataFrame, ytr: np.ndarray, gtr, best_params):
+    """
+    Importance-driven pruning on an inner split of the training rows (same grouping as the
+    holdout split), so the holdout stays untouched for the metrics of the final model. `Xtr`
+    is the raw (not imputed) training matrix: the medians are refitted on the inner training
+    rows only, so the inner validation rows don't leak into the imputation.
+    """
+    tr, va = train_val_test_split(Xtr, pd.Series(ytr), test_size=args.test_size,
+                                  random_state=args.random_state, groups=gtr)
+    cols = list(Xtr.columns)
+    imputer = new_imputer(args, cols)
+    X_in = pd.DataFrame(imputer.fit_transform(Xtr.iloc[tr]), columns=cols, index=Xtr.index[tr])
+    X_va = pd.DataFrame(imputer.transform(Xtr.iloc[va]), columns=cols, index=Xtr.index[va])
+    kept, history = prune_features(
+        lambda X, y: fit_final_model(X, y, best_params),
+        X_in, ytr[tr], X_va, ytr[va],
+        tolerance=args.prune_tolerance, min_features=args.prune_min_features, random_state=args.random_state,
+    )
+    logger.info(f"Pruning kept {len(kept)} of {Xtr.shape[1]} features")
+    return kept, history
+
+def fit_incremental(args, prof: StageProfiler, logger, study_path: str, bundle_path: str, Xfe, y, groups, hashes, state):
+    """
+    Retrain proportional to the delta: rows not seen by the saved model get the usual holdout
+    share, the rest continue boosting the saved model (`init_model`). Only when the delta's
+    feature distributions drifted (PSI) is the saved study resumed and the model refitted.
+    """
+    import joblib
+    bundle = joblib.load(bundle_path)
+    feature_cols = bundle["features"]
+    X = Xfe.reindex(columns=feature_cols)
+
+    with prof.stage("split"):
+        new_idx, old_tr, old_te = split_delta(hashes, state)
+        if len(new_idx) == 0:
+            return None
+        try:
+            g_new = groups.iloc[new_idx] if groups is not None else None
+            tr, te = train_val_test_split(X.iloc[new_idx], y.iloc[new_idx], test_size=args.test_size,
+                                          random_state=args.random_state, groups=g_new)
+            new_tr, new_te = new_idx[tr], new_idx[te]
+        except ValueError:
+            # delta pequeno demais para estratificar: tudo vai para o treino
+            new_tr, new_te = new_idx, new_idx[:0]
+        idx_te = np.concatenate([old_te, new_te])
+        logger.info(f"Incremental: {len(new_idx)} new/changed rows ({len(new_tr)} train, {len(new_te)} holdout); "
+                    f"{len(old_tr)} rows already trained on")
+
+    with prof.stage("drift"):
+        drift = drift_report(state["reference"], X.iloc[new_tr], threshold=args.drift_threshold)
+        if drift["drifted"]:
+            logger.info(f"Feature drift on {drift['drifted_features'][:10]}; re-tuning")
+        elif not drift["checked"]:
+            logger.info(f"Delta of {drift['n_rows']} rows is below the drift check minimum; keeping params")
+        else:
+            logger.info("No feature drift; keeping params and continuing the saved model")
+
+    with prof.stage("imputation"):
+        imputer = bundle["imputer"]
+        if hasattr(imputer, "partial_fit"):
+            # medianas via sketch: o delta é incorporado sem rever as linhas antigas
+            imputer.partial_fit(X.iloc[new_tr])
+        Xte_df = pd.DataFrame(imputer.transform(X.iloc[idx_te]), columns=feature_cols, index=X.index[idx_te])
+        yte = y.iloc[idx_te].values
+
+    if drift["drifted"]:
+        idx_tr = np.concatenate([old_tr, new_tr])
+        Xtr_df = pd.DataFrame(imputer.transform(X.iloc[idx_tr]), columns=feature_cols, index=X.index[idx_tr])
+        ytr = y.iloc[idx_tr].values
+        gtr = groups.iloc[idx_tr].values if groups is not None else None
+        with prof.stage("optuna"):
+            previous = joblib.load(study_path) if os.path.exists(study_path) else None
+            best_params, study = optuna_cv(
+                Xtr_df.values, ytr, feature_cols, n_splits=args.n_splits,
+                groups=gtr, n_trials=args.incremental_trials, use_gpu=args.use_gpu,
+                study_name=f"{args.dataset}_study", study_path=study_path,
+                study=previous, enqueue_params=state["best_params"], n_threads=args.n_threads,
+            )
+        prof.add_optuna_trials(study)
+        with prof.stage("final_fit"):
+            model = fit_final_model(Xtr_df, ytr, best_params)
+        new_state = new_training_state(hashes, idx_tr, idx_te, X.iloc[idx_tr], best_params)
+    else:
+        best_params = dict(state["best_params"], n_jobs=args.n_threads)
+        n_rounds = incremental_rounds(best_params, len(new_tr), state["n_train"])
+        with prof.stage("final_fit"):
+            Xnew_df = pd.DataFrame(imputer.transform(X.iloc[new_tr]), columns=feature_cols, index=X.index[new_tr])
+            model = continue_training(bundle["model"], Xnew_df, y.iloc[new_tr].values, best_params, n_rounds)
+        logger.info(f"Added {n_rounds} boosting rounds on {len(new_tr)} rows")
+        new_state = dict(state)
+        new_state["train_hashes"] = np.union1d(state["train_hashes"], hashes[new_tr])
+        new_state["holdout_hashes"] = np.union1d(state["holdout_hashes"], hashes[new_te])
+        new_state["n_train"] = state["n_train"] + int(len(new_tr))
+
+    return model, imputer, feature_cols, best_params, Xte_df, yte, new_state
+
+def fit_low_memory(args, prof: StageProfiler, logger, study_path: str):
+    """
+    Memory-lean path: CSV -> chunked float32 memmap -> sketched medians imputed in place -> binned
+    LightGBM Dataset. No full-size DataFrame (raw, engineered or imputed) is ever built.
+    """
+    work_dir = os.path.join(args.out_dir, args.dataset)
+    with prof.stage("stream_csv"):
+        data = stream_csv_to_memmap(
+            dataset_path(args.dataset, args.data_dir), args.dataset,
+            os.path.join(work_dir, f"features_{args.dataset}.raw.f32"), label=args.label, chunk_rows=args.chunk_size,
+        )
+
+    with prof.stage("select_features"):
+        # mesmo critério do modo em memória: descartar colunas com >60% de ausentes
+        miss_rate = 1 - data.non_null / max(data.n_rows, 1)
+        keep = [j for j, m in enumerate(miss_rate) if m <= 0.6]
+        dropped = [c for j, c in enumerate(data.feature_cols) if miss_rate[j] > 0.6]
+        if dropped:
+            logger.info(f"Dropped {len(dropped)} high-missing columns: {dropped[:10]}...")
+        data = compact_columns(data, keep, os.path.join(work_dir, f"features_{args.dataset}.f32"), args.chunk_size)
+        feature_cols = data.feature_cols
+
+    with prof.stage("split"):
+        placeholder = np.zeros((data.n_rows, 1), dtype=np.int8)
+        idx_tr, idx_te = train_val_test_split(placeholder, pd.Series(data.y), test_size=args.test_size,
+                                              random_state=args.random_state, groups=data.groups)
+
+    with prof.stage("imputation"):
+        imputer = fit_median_imputer(data, idx_tr, n_jobs=args.n_jobs, chunk_rows=args.chunk_size)
+        impute_inplace(data, imputer, args.chunk_size)
+
+    with prof.stage("optuna"):
+        dataset = build_lgb_dataset(data.open(), data.y, balanced_weights(data.y, idx_tr), feature_cols)
+        best_params, study = optuna_cv_dataset(
+            dataset, idx_tr, data.y, n_splits=args.n_splits, groups=data.groups,
+            n_trials=args.n_trials, use_gpu=args.use_gpu, study_name=f"{args.dataset}_study", study_path=study_path,
+            n_threads=args.n_threads,
+        )
+    prof.add_optuna_trials(study)
+
+    with prof.stage("final_fit"):
+        model = fit_final_booster(dataset, idx_tr, feature_cols, best_params)
+
+    return model, imputer, feature_cols, best_params, study, data, idx_te
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--dataset", type=str, required=True, choices=["kepler","toi","k2"])
@@ -32,99 +217,206 @@ def main():
     parser.add_argument("--random_state", type=int, default=42)
     parser.add_argument("--label", type=str, default=None)
     parser.add_argument("--use_gpu", action="store_true")
+    parser.add_argument("--n_bootstrap", type=int, default=2000, help="Bootstrap resamples for holdout CIs (0 disables)")
+    parser.add_argument("--profile_stages", type=str, nargs="*", default=[], help="Stages to profile in detail (e.g. optuna shap)")
+    parser.add_argument("--profiler", type=str, default="cprofile", choices=["cprofile","pyspy"])
+    parser.add_argument("--register", action="store_true", help="Register the trained bundle in the model registry")
+    parser.add_argument("--promote", action="store_true", help="Promote the registered version (implies --register)")
+    parser.add_argument("--low_memory", action="store_true", help="Stream the CSV to a float32 memmap and train from a binned LightGBM Dataset")
+    parser.add_argument("--chunk_size", type=int, default=DEFAULT_CHUNK_ROWS, help="CSV rows per chunk in --low_memory mode")
+    parser.add_argument("--imputer", type=str, default="exact", choices=["exact","sketch"],
+                        help="Median imputer of the in-memory path (--low_memory always uses the sketch)")
+    parser.add_argument("--n_jobs", type=int, default=1, help="Workers for the streaming median sketches in --low_memory mode")
+    parser.add_argument("--keep_memmap", action="store_true", help="Keep the --low_memory feature file after training")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Continue the saved model on new/changed rows; re-tune (resuming the study) only if features drifted")
+    parser.add_argument("--incremental_trials", type=int, default=10, help="Optuna trials added to the saved study when drift is detected")
+    parser.add_argument("--drift_threshold", type=float, default=DRIFT_THRESHOLD, help="Per-feature PSI above which the delta counts as drifted")
+    parser.add_argument("--n_threads", type=int, default=-1, help="LightGBM threads (-1 = all cores); set per dataset by train_all")
+    parser.add_argument("--feature_cache", type=str, default=None, help="Directory of cached cleaned/engineered frames (built once per CSV)")
+    parser.add_argument("--prune_features", action="store_true",
+                        help="Drop low-importance features (gain + permutation) while the validation AUC stays within --prune_tolerance")
+    parser.add_argument("--prune_tolerance", type=float, default=DEFAULT_AUC_TOLERANCE, help="Maximum AUC loss accepted by the pruning")
+    parser.add_argument("--prune_min_features", type=int, default=DEFAULT_MIN_FEATURES, help="Features always kept by the pruning")
     args = parser.parse_args()
+    if args.incremental and args.low_memory:
+        parser.error("--incremental is only available for the in-memory path")
+    if args.prune_features and (args.low_memory or args.incremental):
+        parser.error("--prune_features is only available for a full in-memory training")
 
     set_seed(args.random_state)
     logger = get_logger("run_experiment")
-
-    df_raw = load_dataset(args.dataset, args.data_dir)
-    df = basic_clean(df_raw, args.dataset)
-    y, ycol = infer_label(df, args.dataset, args.label)
-    Xfe, feats_info = build_features(df, args.dataset)
-
-    # identify groups to prevent leakage if available
-    group_col = None
-    for c in ["kepid","k2_name","tid","tic_id","epic_hostname","hostname"]:
-        if c in df_raw.columns:
-            group_col = c
-            break
-    groups = df_raw[group_col] if group_col else None
-
-    # choose numeric features
-    all_cols = set(Xfe.columns)
-    feature_cols = select_feature_columns(Xfe)
-    removed = sorted(list(all_cols - set(feature_cols)))
-    if removed:
-        logger.info(f"Excluded {len(removed)} potential leaky/ID columns (first 20 shown): {removed[:20]}")
-    X = Xfe[feature_cols].copy()
-
-    # drop high-missing columns (>60% missing)
-    miss_rate = X.isna().mean()
-    keep_cols = miss_rate[miss_rate <= 0.6].index.tolist()
-    dropped = [c for c in X.columns if c not in keep_cols]
-    if dropped:
-        logger.info(f"Dropped {len(dropped)} high-missing columns: {dropped[:10]}...")
-    X = X[keep_cols]
-    # ✅ manter lista de features em sincronia após o drop
-    feature_cols = list(X.columns)
-
-    # train/holdout split
-    idx_tr, idx_te = train_val_test_split(X, y, test_size=args.test_size, random_state=args.random_state, groups=groups)
-    Xtr, Xte = X.iloc[idx_tr], X.iloc[idx_te]
-    ytr, yte = y.iloc[idx_tr].values, y.iloc[idx_te].values
-    gtr = groups.iloc[idx_tr].values if groups is not None else None
-
-    # imputation pipeline (median)
-    imputer = SimpleImputer(strategy="median")
-    Xtr_np = imputer.fit_transform(Xtr)
-    Xte_np = imputer.transform(Xte)
-
-    # Reconstituir DataFrames com nomes de colunas para manter consistência
-    Xtr_df = pd.DataFrame(Xtr_np, columns=feature_cols, index=Xtr.index)
-    Xte_df = pd.DataFrame(Xte_np, columns=feature_cols, index=Xte.index)
+    ds_out_dir = os.path.join(args.out_dir, args.dataset)
+    prof = StageProfiler(args.profile_stages, profile_dir=ds_out_dir, profiler=args.profiler)
 
     # --- salvar estudo Optuna ---
     ensure_dir("studies")
     study_path = os.path.join("studies", f"optuna_study_{args.dataset}.pkl")
     # -----------------------------
+    bundle_path = os.path.join("models", f"model_{args.dataset}.joblib")
+    state = None
+    pruning = None
 
-    # Optuna CV (usa numpy; sem problema)
-    best_params, study = optuna_cv(
-        Xtr_df.values, ytr, feature_cols, n_splits=args.n_splits,
-        groups=gtr, n_trials=args.n_trials, use_gpu=args.use_gpu,
-        study_name=f"{args.dataset}_study", study_path=study_path
-    )
+    if args.low_memory:
+        model, imputer, feature_cols, best_params, study, data, idx_te = fit_low_memory(args, prof, logger, study_path)
+        yte = data.y[idx_te].astype(int)
+    else:
+        df_raw, Xfe, y, groups = load_features(args, prof)
+        hashes = row_hashes(df_raw)
+        state = load_training_state(bundle_path) if args.incremental else None
+        if args.incremental and state is None:
+            logger.warning(f"No training state next to {bundle_path}; running a full training instead")
 
-    # Fit final com DataFrame (para o LightGBM armazenar feature names)
-    model = fit_final_model(Xtr_df, ytr, best_params)
+    if state is not None:
+        fit = fit_incremental(args, prof, logger, study_path, bundle_path, Xfe, y, groups, hashes, state)
+        if fit is None:
+            logger.info("No new or changed rows since the last training; model left unchanged.")
+            return
+        model, imputer, feature_cols, best_params, Xte_df, yte, state = fit
+    elif not args.low_memory:
+        with prof.stage("select_features"):
+            # choose numeric features
+            all_cols = set(Xfe.columns)
+            feature_cols = select_feature_columns(Xfe)
+            removed = sorted(list(all_cols - set(feature_cols)))
+            if removed:
+                logger.info(f"Excluded {len(removed)} potential leaky/ID columns (first 20 shown): {removed[:20]}")
+            X = Xfe[feature_cols].copy()
 
-    # Predict também com DataFrame para evitar warning
-    p_te = model.predict_proba(Xte_df)[:, 1]
-    metrics_dict = compute_all_metrics(yte, p_te)
-    metrics_dict["precision_at_10pct"] = precision_at_k(yte, p_te, 0.1)
-    metrics_dict["n_samples"] = int(len(yte))
-    metrics_dict["pos_rate"] = float(np.mean(yte))
-    metrics_df = pd.DataFrame([metrics_dict])
-    ds_out_dir = os.path.join(args.out_dir, args.dataset)
-    ensure_dir(ds_out_dir)
-    metrics_df.to_csv(os.path.join(ds_out_dir, f"metrics_{args.dataset}_holdout.csv"), index=False)
-
-    # Plots
-    ensure_dir(os.path.join("plots", args.dataset))
-    plot_roc(yte, p_te, os.path.join("plots", args.dataset, "roc_holdout.png"))
-    plot_pr(yte, p_te, os.path.join("plots", args.dataset, "pr_holdout.png"))
-    plot_calibration(yte, p_te, os.path.join("plots", args.dataset, "calibration_holdout.png"))
-    plot_feature_importance(model, feature_cols, os.path.join("plots", args.dataset, "feature_importance.png"))
-    try:
-        # usar Xte_df.values no SHAP para evitar conflitos com índices/nomes
-        plot_shap_summary(model, Xte_df.values, feature_cols, os.path.join("plots", args.dataset, "shap_summary.png"))
-    except Exception as e:
-        logger.warning(f"SHAP plot failed: {e}")
-
-    # Save model & imputer
-    import joblib
-    ensure_dir("models")
-    joblib.dump({"model": model, "imputer": imputer, "features": feature_cols}, os.path.join("models", f"model_{args.dataset}.joblib"))
+            # drop high-missing columns (>60% missing)
+            miss_rate = X.isna().mean()
+            keep_cols = miss_rate[miss_rate <= 0.6].index.tolist()
+            dropped = [c for c in X.columns if c not in keep_cols]
+            if dropped:
+                logger.info(f"Dropped {len(dropped)} high-missing columns: {dropped[:10]}...")
+            X = X[keep_cols]
+            # ✅ manter lista de features em sincronia após o drop
+            feature_cols = list(X.columns)
+
+        with prof.stage("split"):
+            # train/holdout split
+            idx_tr, idx_te = train_val_test_split(X, y, test_size=args.test_size, random_state=args.random_state, groups=groups)
+            Xtr, Xte = X.iloc[idx_tr], X.iloc[idx_te]
+            ytr, yte = y.iloc[idx_tr].values, y.iloc[idx_te].values
+            gtr = groups.iloc[idx_tr].values if groups is not None else None
+
+        with prof.stage("imputation"):
+            # imputation pipeline (median)
+            imputer = new_imputer(args, feature_cols)
+            Xtr_np = imputer.fit_transform(Xtr)
+            Xte_np = imputer.transform(Xte)
+
+            # Reconstituir DataFrames com nomes de colunas para manter consistência
+            Xtr_df = pd.DataFrame(Xtr_np, columns=feature_cols, index=Xtr.index)
+            Xte_df = pd.DataFrame(Xte_np, columns=feature_cols, index=Xte.index)
+
+        with prof.stage("optuna"):
+            # Optuna CV (usa numpy; sem problema)
+            best_params, study = optuna_cv(
+                Xtr_df.values, ytr, feature_cols, n_splits=args.n_splits,
+                groups=gtr, n_trials=args.n_trials, use_gpu=args.use_gpu,
+                study_name=f"{args.dataset}_study", study_path=study_path, n_threads=args.n_threads
+            )
+        prof.add_optuna_trials(study)
+
+        if args.prune_features:
+            with prof.stage("prune_features"):
+                kept, history = select_pruned_features(args, logger, Xtr, ytr, gtr, best_params)
+                # modelo com todas as features, só para comparar custo e métricas no holdout
+                full_model = fit_final_model(Xtr_df, ytr, best_params)
+                p_full = full_model.predict_proba(Xte_df)[:, 1]
+                pruning = {
+                    "history": history,
+                    "full": dict(scoring_cost(full_model, Xte_df), **compute_all_metrics(yte, p_full),
+                                 raw_csv_columns=len(raw_columns_for(feature_cols) & set(df_raw.columns))),
+                }
+                feature_cols = kept
+                Xtr, Xte = Xtr[feature_cols], Xte[feature_cols]
+                # medianas por coluna: reajustar nas colunas mantidas dá os mesmos valores
+                imputer = new_imputer(args, feature_cols)
+                Xtr_df = pd.DataFrame(imputer.fit_transform(Xtr), columns=feature_cols, index=Xtr.index)
+                Xte_df = pd.DataFrame(imputer.transform(Xte), columns=feature_cols, index=Xte.index)
+
+        with prof.stage("final_fit"):
+            # Fit final com DataFrame (para o LightGBM armazenar feature names)
+            model = fit_final_model(Xtr_df, ytr, best_params)
+        state = new_training_state(hashes, idx_tr, idx_te, Xtr, best_params)
+
+    with prof.stage("evaluate"):
+        if args.low_memory:
+            p_te = predict_rows(model, data, idx_te, args.chunk_size)
+        else:
+            # Predict também com DataFrame para evitar warning
+            p_te = model.predict_proba(Xte_df)[:, 1]
+        metrics_dict = compute_all_metrics(yte, p_te)
+        metrics_dict["precision_at_10pct"] = precision_at_k(yte, p_te, 0.1)
+        metrics_dict["n_samples"] = int(len(yte))
+        metrics_dict["pos_rate"] = float(np.mean(yte))
+        metrics_df = pd.DataFrame([metrics_dict])
+        ensure_dir(ds_out_dir)
+        metrics_df.to_csv(os.path.join(ds_out_dir, f"metrics_{args.dataset}_holdout.csv"), index=False)
+
+        if pruning is not None:
+            # custo de inferência (latência, bytes por linha, tamanho do modelo, colunas do CSV) antes/depois da poda
+            pruned = dict(scoring_cost(model, Xte_df), **compute_all_metrics(yte, p_te),
+                          raw_csv_columns=len(raw_columns_for(feature_cols) & set(df_raw.columns)))
+            report = pruning_report(pruning["full"], pruned, {"prune_tolerance": args.prune_tolerance})
+            report.to_csv(os.path.join(ds_out_dir, f"pruning_{args.dataset}_holdout.csv"), index=False)
+            pruning["history"].to_csv(os.path.join(ds_out_dir, f"pruning_{args.dataset}_rounds.csv"), index=False)
+            logger.info(f"Pruned model: {len(feature_cols)}/{pruning['full']['n_features']} features, "
+                        f"holdout AUC {metrics_dict['roc_auc']:.4f} vs {pruning['full']['roc_auc']:.4f}, "
+                        f"scoring {pruned['latency_ms']:.1f}ms vs {pruning['full']['latency_ms']:.1f}ms")
+
+    with prof.stage("bootstrap"):
+        # Intervalos de confiança (bootstrap) para comparar retreinos
+        if args.n_bootstrap > 0:
+            ci = bootstrap_metrics(yte, p_te, n_boot=args.n_bootstrap, k=0.1, random_state=args.random_state)
+            ci_df = pd.DataFrame.from_dict(ci, orient="index")
+            ci_df.to_csv(os.path.join(ds_out_dir, f"metrics_{args.dataset}_holdout_ci.csv"), index_label="metric")
+
+    with prof.stage("plots"):
+        # Plots
+        ensure_dir(os.path.join("plots", args.dataset))
+        plot_roc(yte, p_te, os.path.join("plots", args.dataset, "roc_holdout.png"))
+        plot_pr(yte, p_te, os.path.join("plots", args.dataset, "pr_holdout.png"))
+        plot_calibration(yte, p_te, os.path.join("plots", args.dataset, "calibration_holdout.png"))
+        plot_feature_importance(model, feature_cols, os.path.join("plots", args.dataset, "feature_importance.png"))
+
+    with prof.stage("shap"):
+        try:
+            if args.low_memory:
+                # amostra do holdout lida do memmap; TreeExplainer recebe o Booster nativo
+                rows = np.sort(np.random.default_rng(args.random_state).choice(idx_te, min(len(idx_te), SHAP_MAX_ROWS), replace=False))
+                plot_shap_summary(model.booster_, np.asarray(data.open()[rows]), feature_cols, os.path.join("plots", args.dataset, "shap_summary.png"))
+            else:
+                # usar Xte_df.values no SHAP para evitar conflitos com índices/nomes
+                plot_shap_summary(model, Xte_df.values, feature_cols, os.path.join("plots", args.dataset, "shap_summary.png"))
+        except Exception as e:
+            logger.warning(f"SHAP plot failed: {e}")
+
+    with prof.stage("save_model"):
+        # Save model & imputer
+        import joblib
+        ensure_dir("models")
+        joblib.dump({"model": model, "imputer": imputer, "features": feature_cols}, bundle_path)
+        if state is not None:
+            # hashes das linhas vistas + histogramas de referência, usados pelo --incremental
+            save_training_state(bundle_path, state)
+        elif os.path.exists(state_path(bundle_path)):
+            os.remove(state_path(bundle_path))
+
+    if args.register or args.promote:
+        from app.backend.ai.model_registry import ModelRegistry
+        from settings import settings
+        mission = {"kepler": "koi"}.get(args.dataset, args.dataset)
+        registry = ModelRegistry(settings.data.registry_folder)
+        version = registry.register(mission, bundle_path, {
+            "dataset": args.dataset, "n_features": len(feature_cols), "best_params": best_params,
+            "holdout": {k: float(v) for k, v in metrics_dict.items()},
+        })
+        if args.promote:
+            registry.promote(mission, version)
+        logger.info(f"Registered {mission} model version {version}" + (" (active)" if args.promote else ""))
 
     # Append to dataset comparison
     comp_path = os.path.join(args.out_dir, "dataset_comparison.csv")
@@ -132,17 +424,19 @@ def main():
         "dataset": args.dataset, "roc_auc": metrics_dict["roc_auc"], "pr_auc": metrics_dict["pr_auc"],
         "f1": metrics_dict["f1"], "precision": metrics_dict["precision"], "recall": metrics_dict["recall"],
         "brier": metrics_dict["brier"], "precision_at_10pct": metrics_dict["precision_at_10pct"],
-        "n_samples": metrics_dict["n_samples"], "pos_rate": metrics_dict["pos_rate"]
+        "n_samples": metrics_dict["n_samples"], "pos_rate": metrics_dict["pos_rate"],
+        "training_mode": "low_memory" if args.low_memory else "in_memory", "peak_rss_mb": peak_rss_mb(),
     }
-    if os.path.exists(comp_path):
-        comp_df = pd.read_csv(comp_path)
-        comp_df = comp_df[comp_df["dataset"] != args.dataset]
-        comp_df = pd.concat([comp_df, pd.DataFrame([row])], ignore_index=True)
-    else:
-        comp_df = pd.DataFrame([row])
-    comp_df.sort_values(by="roc_auc", ascending=False, inplace=True)
-    comp_df.to_csv(comp_path, index=False)
+    # uma linha por dataset e modo; lock + rename atômico porque o train_all roda datasets em paralelo
+    upsert_csv_rows(comp_path, [row], keys=["dataset", "training_mode"],
+                    defaults={"training_mode": "in_memory"}, sort_by="roc_auc")
+
+    if args.low_memory and not args.keep_memmap:
+        os.remove(data.path)
 
+    rep = prof.save(ds_out_dir, args.dataset)
+    logger.info(f"Total wall time {rep['total_wall_s']:.1f}s; peak RSS {rep['peak_rss_mb']:.0f}MB "
+                f"({'low_memory' if args.low_memory else 'in_memory'}); profile saved to {ds_out_dir}/profile_{args.dataset}.json")
     logger.info(f"Done. Results saved to {ds_out_dir} and plots/{args.dataset}.")
 
 if __name__ == "__main__":
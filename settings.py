@@ -1,15 +1,54 @@
 import os
 import json
+from typing import Dict, Optional
 from pydantic import BaseModel, Field
 
 class AppConfig(BaseModel):
   name: str
   version: str
 
+class ServerConfig(BaseModel):
+  # "dev": um processo com --reload; "production": mestre pre-fork com vários workers
+  mode: str = "dev"
+  workers: int = 0                # 0 = um por CPU
+  preload: bool = True            # importa o app e aquece os caches no mestre, antes do fork
+  loop: str = "auto"              # auto | asyncio | uvloop
+  http: str = "auto"              # auto | h11 | httptools
+  backlog: int = 2048
+  keepalive_timeout: int = 5
+  graceful_timeout: int = 30      # segundos para os workers terminarem requisições em andamento
+  worker_timeout: int = 30        # worker sem heartbeat por mais que isso é reiniciado
+  startup_timeout: int = 120      # prazo do worker até o primeiro heartbeat (import do app, warm-up sem preload)
+  max_restart_backoff: float = 30.0  # espera máxima entre workers que morrem antes de ficarem prontos
+  access_log: bool = False
+
+class RouteLimit(BaseModel):
+  concurrency: int = 4            # requisições da rota executando ao mesmo tempo (por worker)
+  queue: int = 32                 # esperando por uma vaga; além disso -> 503 imediato
+  queue_timeout: float = 2.0      # segundos na fila antes do 503
+  coalesce: bool = True           # requisições GET idênticas em andamento compartilham a mesma resposta
+
+def default_route_limits() -> Dict[str, RouteLimit]:
+  return {
+    "/stars": RouteLimit(concurrency=8, queue=64),
+    "/stars/search": RouteLimit(concurrency=4, queue=32),
+    "/stars/{star_id}/ephemeris": RouteLimit(concurrency=2, queue=16, queue_timeout=5.0),
+    "/exoplanets/{exoplanet_id}/similar": RouteLimit(concurrency=4, queue=32),
+    "/getInfos": RouteLimit(concurrency=4, queue=64),
+  }
+
+class AdmissionConfig(BaseModel):
+  enabled: bool = True
+  retry_after: int = 1            # segundos, no header Retry-After dos 503
+  routes: Dict[str, RouteLimit] = Field(default_factory=default_route_limits)  # template da rota -> limites
+
 class APIConfig(BaseModel):
   base_url: str
   port: int = 8000
   folder: str
+  instrumentation: bool = True
+  server: ServerConfig = Field(default_factory=ServerConfig)
+  admission: AdmissionConfig = Field(default_factory=AdmissionConfig)
 
 class FrontendConfig(BaseModel):
   base_url: str
@@ -19,10 +58,37 @@ class DatabaseConfig(BaseModel):
   folder: str
   filename: str
   models_folder: str
+  similarity_index: str = "similarity_index.npz"
+  catalog_backend: str = "sql"    # "sql" | "memory" (cópia colunar do catálogo em RAM)
+  snapshots: bool = True          # ingestões montam um arquivo novo e o publicam trocando o ponteiro (database/snapshots.py)
+  snapshot_folder: str = "snapshots"
+  pointer: str = "CURRENT"
+  keep_snapshots: int = 3         # snapshots antigos mantidos (além do atual) para rollback
+  static_catalog: str = "static_catalog"  # shards estáticos pré-comprimidos servidos em /catalog
 
   @property
   def path(self) -> str:
-    return os.path.join("sqlite:///", self.folder, self.filename)
+    return f"sqlite:///{self.file_path}"
+
+  @property
+  def file_path(self) -> str:
+    return os.path.join(self.folder, self.filename)
+
+  @property
+  def pointer_path(self) -> str:
+    return os.path.join(self.folder, self.pointer)
+
+  @property
+  def snapshots_path(self) -> str:
+    return os.path.join(self.folder, self.snapshot_folder)
+
+  @property
+  def static_catalog_path(self) -> str:
+    return os.path.join(self.folder, self.static_catalog)
+
+  @property
+  def similarity_index_path(self) -> str:
+    return os.path.join(self.folder, self.similarity_index)
 
   @property
   def url(self) -> str:
@@ -35,6 +101,10 @@ class DataConfig(BaseModel):
   raw_folder: str
   raw_koi: str
   raw_toi: str
+  registry_folder: str = "data/models/registry"
+  models_k2_name: str = "model_k2.joblib"
+  raw_k2: str = "k2.csv"
+  crossmatch_radius_arcsec: float = 2.0
   
   @property
   def path_model_koi(self) -> str:
@@ -44,6 +114,10 @@ class DataConfig(BaseModel):
   def path_model_toi(self) -> str:
     return os.path.join(self.models_folder, self.models_toi_name)
 
+  @property
+  def path_model_k2(self) -> str:
+    return os.path.join(self.models_folder, self.models_k2_name)
+
   @property
   def path_raw_koi(self) -> str:
     return os.path.join(self.raw_folder, self.raw_koi)
@@ -52,6 +126,10 @@ class DataConfig(BaseModel):
   def path_raw_toi(self) -> str:
     return os.path.join(self.raw_folder, self.raw_toi)
 
+  @property
+  def path_raw_k2(self) -> str:
+    return os.path.join(self.raw_folder, self.raw_k2)
+
 # ============================================================
 # CONFIGURAÇÃO PRINCIPAL
 # ============================================================
@@ -64,11 +142,26 @@ class Settings(BaseModel):
   data: DataConfig
   
   @classmethod
-  def load(cls, file_path: str = "config.json") -> "Settings":
+  def load(cls, file_path: Optional[str] = None) -> "Settings":
+    # EXO_CONFIG permite apontar para outro config (ex.: benchmarks com banco temporário)
+    file_path = file_path or os.environ.get("EXO_CONFIG", "config.json")
     if not os.path.exists(file_path):
       raise FileNotFoundError(f"Config file not found: {file_path}")
     with open(file_path, "r", encoding="utf-8") as f:
       data = json.load(f)
     return cls(**data)
 
-settings = Settings.load()
\ No newline at end of file
+_settings: Optional[Settings] = None
+
+def get_settings() -> Settings:
+  # lido no primeiro uso, não no import do módulo
+  global _settings
+  if _settings is None:
+    _settings = Settings.load()
+  return _settings
+
+def __getattr__(name: str):
+  # `from settings import settings` continua funcionando (PEP 562)
+  if name == "settings":
+    return get_settings()
+  raise AttributeError(f"module {__name__!r} has no attribute {name!r}")